@@ -0,0 +1,62 @@
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from memberships.models import L3Addon, UserMembership
+from .models import TrainerProfile, User
+from .stats import EXPIRING_SOON_DAYS
+
+
+def dashboard_users(role, payment_status='', search=''):
+    """
+    Rows of the admin dashboard's User Management tab as (queryset, keyset ordering).
+
+    role is USER, TRAINER, ADMIN or PENDING (trainer applications awaiting review).
+    Pages are read in index order from user_role_registered_idx, or
+    trainer_approval_status_idx for PENDING.
+    """
+    if role == 'PENDING':
+        users = TrainerProfile.objects.filter(approval_status='PENDING').select_related('user')
+        if search:
+            users = users.filter(
+                Q(user__full_name__icontains=search) | Q(user__email__icontains=search) |
+                Q(user__username__icontains=search) | Q(specialization__icontains=search)
+            )
+        return users, ('-id',)
+
+    users = User.objects.filter(role=role)
+    if role == 'USER':
+        users = users.select_related('membership')
+        if payment_status:
+            users = users.filter(membership__payment_status=payment_status)
+    elif role == 'TRAINER':
+        users = users.select_related('trainer_profile')
+    else:
+        users = users.select_related('admin_profile')
+    if search:
+        users = users.filter(Q(full_name__icontains=search) | Q(email__icontains=search) | Q(username__icontains=search))
+    return users, ('-date_of_registration', '-id')
+
+
+def dashboard_memberships(tier, payment_status='', search='', expiring=False, today=None):
+    """
+    Rows of the admin dashboard's Membership Management tab as (queryset, keyset ordering).
+
+    Add-ons are counted in a correlated subquery rather than a GROUP BY, so a
+    page is read in index order (membership_tier_created_idx, or
+    membership_tier_payment_idx when filtered by payment status). expiring
+    lists the soonest expiry first, an index range scan on expiry_date.
+    """
+    addon_counts = L3Addon.objects.filter(membership=OuterRef('pk')).order_by().values('membership').annotate(
+        count=Count('id')
+    ).values('count')
+    memberships = UserMembership.objects.filter(
+        user__role='USER', membership_tier=tier
+    ).select_related('user').annotate(addon_count=Coalesce(Subquery(addon_counts), 0))
+    if payment_status:
+        memberships = memberships.filter(payment_status=payment_status)
+    if search:
+        memberships = memberships.filter(Q(user__full_name__icontains=search) | Q(user__email__icontains=search))
+    if expiring:
+        return memberships.expiring_soon(EXPIRING_SOON_DAYS, today or timezone.now().date()), ('expiry_date', 'id')
+    return memberships, ('-created_at', '-id')
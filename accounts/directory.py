@@ -0,0 +1,122 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from memberships.models import TrainerRating
+from .models import TrainerProfile
+
+
+DIRECTORY_CACHE_KEY = 'accounts:trainer_directory:json:{sort}'
+LATEST_RATINGS_PER_TRAINER = 5
+
+# ?sort= values accepted by the directory
+DIRECTORY_ORDERINGS = {
+    'default': ('id',),
+    'rating': (F('user__rating_summary__bayesian_score').desc(nulls_last=True), 'id'),
+}
+
+
+def latest_ratings_by_trainer(trainer_user_ids, limit=LATEST_RATINGS_PER_TRAINER):
+    """
+    Latest `limit` ratings for each trainer from one window-function query.
+
+    Returns a dict of trainer user id -> list of TrainerRating, newest first.
+    """
+    ratings = TrainerRating.objects.filter(trainer_id__in=trainer_user_ids).annotate(
+        position=Window(
+            RowNumber(),
+            partition_by=F('trainer_id'),
+            order_by=[F('created_at').desc(), F('id').desc()],
+        )
+    ).filter(position__lte=limit).select_related('user').order_by('trainer_id', 'position')
+
+    latest = {trainer_id: [] for trainer_id in trainer_user_ids}
+    for rating in ratings:
+        latest[rating.trainer_id].append(rating)
+    return latest
+
+
+def approved_trainer_profiles(sort='default'):
+    """Approved trainer profiles joined to their user, rating summary and approving admin"""
+    return TrainerProfile.objects.filter(approval_status='APPROVED').select_related(
+        'user', 'user__rating_summary', 'approved_by'
+    ).order_by(*DIRECTORY_ORDERINGS.get(sort, DIRECTORY_ORDERINGS['default']))
+
+
+def get_trainer_directory(sort='default'):
+    """
+    Approved trainers with their rating summary and latest ratings.
+
+    Costs two queries regardless of the number of trainers: the profiles joined
+    to their precomputed TrainerRatingSummary, and one window-function query
+    for the latest ratings. sort='rating' orders by the Bayesian score.
+    """
+    profiles = list(approved_trainer_profiles(sort))
+    latest = latest_ratings_by_trainer([profile.user_id for profile in profiles])
+
+    directory = []
+    for profile in profiles:
+        summary = getattr(profile.user, 'rating_summary', None)
+        directory.append({
+            'profile': profile,
+            'avg_rating': summary.average if summary else 0,
+            'rating_count': summary.rating_count if summary else 0,
+            'score': round(summary.bayesian_score, 2) if summary else None,
+            'ratings': latest[profile.user_id],
+        })
+    return directory
+
+
+def _directory_payload(directory):
+    trainers = []
+    for item in directory:
+        trainer = item['profile']
+        trainers.append({
+            'id': trainer.user.id,
+            'full_name': trainer.user.full_name,
+            'email': trainer.user.email,
+            'phone': trainer.user.phone_number,
+            'specialization': trainer.specialization,
+            'qualification': trainer.qualification,
+            'experience_years': trainer.experience_years,
+            'certification_details': trainer.certification_details,
+            'licenses': trainer.licenses,
+            'accreditations': trainer.accreditations,
+            'approval_date': trainer.approval_date.strftime('%Y-%m-%d') if trainer.approval_date else None,
+            'avg_rating': item['avg_rating'],
+            'rating_count': item['rating_count'],
+            'rating_score': item['score'],
+            'latest_ratings': [
+                {'rating': rating.rating, 'review': rating.review, 'created_at': rating.created_at}
+                for rating in item['ratings']
+            ],
+        })
+    return {'total_trainers': len(trainers), 'trainers': trainers}
+
+
+def get_trainer_directory_json(sort='default'):
+    """
+    Serialized JSON directory and its ETag, cached until a trainer profile,
+    trainer account or rating changes (see accounts.signals).
+
+    Returns (body_bytes, etag).
+    """
+    if sort not in DIRECTORY_ORDERINGS:
+        sort = 'default'
+    key = DIRECTORY_CACHE_KEY.format(sort=sort)
+    cached = cache.get(key)
+    if cached is None:
+        body = json.dumps(_directory_payload(get_trainer_directory(sort)), cls=DjangoJSONEncoder).encode('utf-8')
+        cached = (body, hashlib.sha256(body).hexdigest())
+        cache.set(key, cached, getattr(settings, 'TRAINER_DIRECTORY_CACHE_SECONDS', 3600))
+    return cached
+
+
+def invalidate_trainer_directory():
+    """Drop the cached JSON directory"""
+    cache.delete_many([DIRECTORY_CACHE_KEY.format(sort=sort) for sort in DIRECTORY_ORDERINGS])
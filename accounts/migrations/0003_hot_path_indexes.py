@@ -0,0 +1,22 @@
+# Generated by Django 5.2.9 on 2026-10-17 01:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_trainerprofile_accreditations_and_more'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='trainerprofile',
+            index=models.Index(fields=['approval_status', 'id'], name='trainer_approval_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'date_of_registration', 'id'], name='user_role_registered_idx'),
+        ),
+    ]
@@ -31,6 +31,10 @@ class User(AbstractUser):
         verbose_name = 'User'
         verbose_name_plural = 'Users'
         ordering = ['-date_of_registration']
+        indexes = [
+            # Admin dashboard user tables: filter by role, newest first (keyset order)
+            models.Index(fields=['role', 'date_of_registration', 'id'], name='user_role_registered_idx'),
+        ]
     
     def __str__(self):
         return f"{self.full_name} ({self.role})"
@@ -87,6 +91,10 @@ class TrainerProfile(models.Model):
     class Meta:
         verbose_name = 'Trainer Profile'
         verbose_name_plural = 'Trainer Profiles'
+        indexes = [
+            # Pending approvals queue and the approved trainer directory
+            models.Index(fields=['approval_status', 'id'], name='trainer_approval_status_idx'),
+        ]
     
     def __str__(self):
         return f"Trainer: {self.user.full_name} - {self.specialization} ({self.approval_status})"
@@ -0,0 +1,112 @@
+import base64
+import datetime
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """JSON encoder that keeps full microsecond precision for datetimes"""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPage:
+    """A single page of keyset-paginated results"""
+
+    def __init__(self, object_list, next_cursor, is_first_page):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.is_first_page = is_first_page
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def encode_cursor(values):
+    """Encode the ordering values of the last row into an opaque URL-safe token"""
+    raw = json.dumps(values, cls=CursorEncoder).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, fields):
+    """Decode a cursor token back into python values, or None if it is invalid"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(fields):
+            return None
+        return [field.to_python(value) for field, value in zip(fields, values)]
+    except Exception:
+        return None
+
+
+def _after_q(names, descending, values):
+    """
+    Build the "row comes after the cursor" condition for a composite key,
+    e.g. (a < va) OR (a = va AND id < vid) for a descending ordering.
+    """
+    condition = Q()
+    for i, name in enumerate(names):
+        lookup = 'lt' if descending[i] else 'gt'
+        clause = Q(**{f'{name}__{lookup}': values[i]})
+        for prev_name, prev_value in zip(names[:i], values[:i]):
+            clause &= Q(**{prev_name: prev_value})
+        condition |= clause
+    return condition
+
+
+def _seek(queryset, ordering, cursor):
+    """Order the queryset and skip past the cursor; returns (queryset, ordering fields, cursor values)"""
+    names = [name.lstrip('-') for name in ordering]
+    descending = [name.startswith('-') for name in ordering]
+    fields = [queryset.model._meta.get_field(name) for name in names]
+
+    queryset = queryset.order_by(*ordering)
+    values = decode_cursor(cursor, fields) if cursor else None
+    if values is not None:
+        queryset = queryset.filter(_after_q(names, descending, values))
+    return queryset, fields, values
+
+
+def keyset_query(queryset, ordering, cursor=None, page_size=25):
+    """
+    The query keyset_paginate runs for a page, without running it: ordered,
+    past the cursor and one row longer than the page to tell if another follows.
+    """
+    queryset, fields, values = _seek(queryset, ordering, cursor)
+    return queryset[:page_size + 1]
+
+
+def keyset_paginate(queryset, ordering, cursor=None, page_size=25):
+    """
+    Paginate a queryset by seeking past the last row of the previous page
+    instead of using OFFSET, so deep pages cost the same as the first one.
+
+    Args:
+        queryset: QuerySet to paginate
+        ordering: Field names to order by, e.g. ('-date_of_registration', '-id').
+                  The last field must be unique so the ordering is total.
+        cursor: Token from a previous page's ``next_cursor``
+        page_size: Number of rows per page
+    """
+    queryset, fields, values = _seek(queryset, ordering, cursor)
+    rows = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, field.attname) for field in fields])
+
+    return KeysetPage(rows, next_cursor, values is None)
@@ -0,0 +1,25 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .directory import invalidate_trainer_directory
+from .models import TrainerProfile, User
+
+
+@receiver([post_save, post_delete], sender=TrainerProfile)
+@receiver([post_save, post_delete], sender='memberships.TrainerRating')
+def trainer_directory_changed(sender, **kwargs):
+    """Approval changes and new or edited ratings change the cached trainer directory"""
+    # After commit: clearing it earlier lets a concurrent read cache the old rows (and rating scores) again
+    transaction.on_commit(invalidate_trainer_directory)
+
+
+@receiver([post_save, post_delete], sender=User)
+def trainer_account_changed(sender, instance, update_fields=None, **kwargs):
+    """Trainer names and contact details are part of the cached directory"""
+    if instance.role != 'TRAINER':
+        return
+    # Logins only touch last_login
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    transaction.on_commit(invalidate_trainer_directory)
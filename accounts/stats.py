@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from memberships.models import expiring_between_q
+from .models import User
+
+
+EXPIRING_SOON_DAYS = 7
+
+
+def get_admin_dashboard_stats(today=None):
+    """
+    Return every admin dashboard counter from a single conditional-aggregation query.
+
+    User is joined one-to-one with its membership and trainer profile, so each
+    row is counted at most once and all counters come back in one round trip.
+
+    Returns a dict with total_users, total_trainers (approved), trainer_accounts,
+    total_admins, pending_trainers_count, l1_count, l2_count, l3_count,
+    pending_payments_count and expiring_soon_count.
+    """
+    today = today or timezone.now().date()
+    member = Q(role='USER')
+
+    return User.objects.aggregate(
+        total_users=Count('id', filter=member),
+        total_trainers=Count('id', filter=Q(role='TRAINER', trainer_profile__approval_status='APPROVED')),
+        trainer_accounts=Count('id', filter=Q(role='TRAINER')),
+        total_admins=Count('id', filter=Q(role='ADMIN')),
+        pending_trainers_count=Count('id', filter=Q(trainer_profile__approval_status='PENDING')),
+        l1_count=Count('id', filter=member & Q(membership__membership_tier='L1')),
+        l2_count=Count('id', filter=member & Q(membership__membership_tier='L2')),
+        l3_count=Count('id', filter=member & Q(membership__membership_tier='L3')),
+        pending_payments_count=Count('id', filter=member & Q(membership__payment_status='PENDING')),
+        expiring_soon_count=Count('id', filter=member & expiring_between_q(
+            today, today + timedelta(days=EXPIRING_SOON_DAYS), prefix='membership__'
+        )),
+    )
@@ -13,20 +13,36 @@ urlpatterns = [
     path('dashboard/user/', views.user_dashboard, name='user_dashboard'),
     path('dashboard/admin/edit-user/<int:user_id>/', views.admin_edit_user, name='admin_edit_user'),
     
+    # Admin dashboard modal fragments (loaded on demand)
+    path('dashboard/admin/modal/user/<int:user_id>/', views.admin_user_modal, name='admin_user_modal'),
+    path('dashboard/admin/modal/membership/<int:membership_id>/', views.admin_membership_modal, name='admin_membership_modal'),
+    path('dashboard/admin/modal/payment/<int:user_id>/<str:action>/', views.admin_payment_modal, name='admin_payment_modal'),
+    path('dashboard/admin/modal/trainer/<int:trainer_id>/', views.admin_trainer_review_modal, name='admin_trainer_review_modal'),
+    
     # Trainer approval URLs
     path('dashboard/admin/approve-trainer/<int:trainer_id>/', views.approve_trainer, name='approve_trainer'),
     path('dashboard/admin/reject-trainer/<int:trainer_id>/', views.reject_trainer, name='reject_trainer'),
+    path('dashboard/admin/review-trainers/', views.bulk_review_trainers, name='bulk_review_trainers'),
     
     # Approved trainers list (public)
     path('trainers/', views.approved_trainers_list, name='approved_trainers_list'),
     
     # New URLs for workout, protein, and medical management
     path('toggle-exercise/', views.toggle_exercise_completion, name='toggle_exercise_completion'),
+    path('exercises/completion/', views.update_exercise_completion, name='update_exercise_completion'),
     path('dashboard/admin/manage-user/<int:user_id>/', views.admin_manage_user_data, name='admin_manage_user_data'),
     path('dashboard/admin/update-protein/', views.admin_update_protein_intake, name='admin_update_protein_intake'),
+    path('dashboard/admin/protein-grid/', views.protein_grid, name='protein_grid'),
+    path('dashboard/admin/protein-grid/save/', views.save_protein_grid_view, name='save_protein_grid'),
+    path('protein-adherence/', views.protein_adherence, name='protein_adherence'),
     path('dashboard/admin/create-workout/<int:user_id>/', views.admin_create_workout_plan, name='admin_create_workout_plan'),
     path('dashboard/admin/add-checkup/<int:user_id>/', views.admin_add_medical_checkup, name='admin_add_medical_checkup'),
     
+    # Workout templates assigned to cohorts of L2 members
+    path('dashboard/admin/workout-templates/', views.workout_templates, name='workout_templates'),
+    path('dashboard/admin/workout-templates/new/', views.new_workout_template, name='new_workout_template'),
+    path('dashboard/admin/workout-templates/<int:template_id>/assign/', views.assign_workout_template, name='assign_workout_template'),
+    
     # Workout progress charts
     path('workout-progress/', views.workout_progress_chart, name='workout_progress_chart'),
     path('dashboard/admin/workout-progress/<int:user_id>/', views.workout_progress_chart, name='admin_workout_progress_chart'),
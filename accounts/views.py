@@ -2,22 +2,35 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.decorators import login_required
-from django.core.mail import EmailMessage
 from django.conf import settings
 from django.utils import timezone
-from django.db.models import Avg, Count
+from django.db import transaction
+from django.db.models import Count, Q
+from django.urls import reverse
 from datetime import timedelta, datetime
-from django.http import JsonResponse
+import json
+from django.http import Http404, HttpResponse, HttpResponseForbidden, JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 from django.views.decorators.http import require_POST
 from .forms import CommonRegistrationForm, AdminRegistrationForm, TrainerRegistrationForm
 from .models import User, AdminProfile, TrainerProfile
+from .dashboard import dashboard_memberships, dashboard_users
+from .directory import get_trainer_directory, get_trainer_directory_json, invalidate_trainer_directory
+from .pagination import keyset_paginate
+from .stats import get_admin_dashboard_stats
 from memberships.models import (
-    UserMembership, WorkoutPlan, Exercise, ProteinIntake, MedicalCheckup
+    UserMembership, WorkoutPlan, Exercise, ProteinIntake, MedicalCheckup, WorkoutTemplate,
+    WorkoutTemplateExercise
 )
+from memberships.checkups import latest_checkups
+from memberships.outbox import queue_email, queue_emails
+from memberships.protein import get_protein_adherence, latest_protein_intakes, save_protein_grid
+from memberships.workouts import clone_workout_template, current_week_plans, get_workout_stats, save_week_plan, set_exercise_completion
 
 
 def send_registration_email(user, role):
-    """Send registration confirmation email to user"""
+    """Queue registration confirmation email to user (delivered by flush_outbox)"""
     subject = f'Welcome to HealthHub - {role} Registration Successful'
     message = f"""
 Dear {user.full_name},
@@ -45,16 +58,50 @@ The HealthHub Team
 Where Fitness Meets Wellness
 """
     
-    try:
-        email = EmailMessage(
-            subject=subject,
-            body=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[user.email]
-        )
-        email.send(fail_silently=False)
-    except Exception as e:
-        print(f"Error sending email: {e}")
+    queue_email(subject, message, user.email)
+
+
+def trainer_approval_email(trainer_user, approved_by, approval_date):
+    """Outbox arguments (see memberships.outbox.queue_email) for a trainer approval notice"""
+    message = f"""
+Dear {trainer_user.full_name},
+
+Congratulations! Your trainer account has been approved by the admin.
+
+You can now login to your trainer dashboard using your credentials:
+- Username: {trainer_user.username}
+- Login URL: http://127.0.0.1:8000/login/
+
+Approved By: {approved_by.full_name}
+Approval Date: {approval_date.strftime('%B %d, %Y at %I:%M %p')}
+
+Welcome to the HealthHub team!
+
+Best regards,
+The HealthHub Team
+Where Fitness Meets Wellness
+"""
+    return {'subject': 'HealthHub - Trainer Account Approved', 'body': message, 'to': trainer_user.email}
+
+
+def trainer_rejection_email(trainer_user, rejection_reason):
+    """Outbox arguments (see memberships.outbox.queue_email) for a trainer rejection notice"""
+    message = f"""
+Dear {trainer_user.full_name},
+
+We regret to inform you that your trainer application has not been approved at this time.
+
+Reason: {rejection_reason}
+
+If you believe this is an error or would like to reapply, please contact us at {settings.DEFAULT_FROM_EMAIL}.
+
+Thank you for your interest in HealthHub.
+
+Best regards,
+The HealthHub Team
+Where Fitness Meets Wellness
+"""
+    return {'subject': 'HealthHub - Trainer Application Status', 'body': message, 'to': trainer_user.email}
 
 
 def landing_page(request):
@@ -207,47 +254,180 @@ def user_logout(request):
     return redirect('landing_page')
 
 
+DASHBOARD_PAGE_SIZE = 25
+
+USER_TABS = [
+    ('USER', 'Members', 'fa-user'),
+    ('TRAINER', 'Trainers', 'fa-user-tie'),
+    ('PENDING', 'Pending Trainers', 'fa-user-clock'),
+    ('ADMIN', 'Administrators', 'fa-user-shield'),
+]
+
+TIER_TABS = [
+    ('L1', 'L1 FitStarter', 'fa-walking'),
+    ('L2', 'L2 ProActive', 'fa-running'),
+    ('L3', 'L3 EliteChamp', 'fa-crown'),
+]
+
+CURSOR_PARAMS = ['users_cursor', 'memberships_cursor']
+
+
+def _dashboard_url(request, **changes):
+    """Build an admin dashboard URL from the current query string with some parameters changed.
+
+    Changing any filter resets both cursors so the tables start again from their first page.
+    A value of None removes the parameter.
+    """
+    params = request.GET.copy()
+    if any(key not in CURSOR_PARAMS for key in changes):
+        for key in CURSOR_PARAMS:
+            params.pop(key, None)
+    for key, value in changes.items():
+        if value is None:
+            params.pop(key, None)
+        else:
+            params[key] = value
+    query = params.urlencode()
+    return f"{reverse('admin_dashboard')}?{query}" if query else reverse('admin_dashboard')
+
+
+def _admin_only_fragment(request):
+    """Return a 403 response for fragment requests from non-admins, or None if allowed"""
+    if request.user.role != 'ADMIN':
+        return HttpResponseForbidden('Access denied. Admin only.')
+    return None
+
+
 @login_required
 def admin_dashboard(request):
-    """Admin dashboard - view all users and their information"""
+    """Admin dashboard - paginated, server-side filtered user and membership tables"""
     if request.user.role != 'ADMIN':
         messages.error(request, 'Access denied. Admin only.')
         return redirect('landing_page')
     
-    all_users = User.objects.all().select_related('admin_profile', 'trainer_profile', 'membership').order_by('-date_of_registration')
-    memberships = UserMembership.objects.filter(user__role='USER').select_related('user').prefetch_related('l3_addons')
-    
-    # Get pending trainer requests
-    pending_trainers = TrainerProfile.objects.filter(approval_status='PENDING').select_related('user').order_by('-user__date_of_registration')
-    
-    # Count memberships expiring within 7 days
-    expiring_soon_count = sum(1 for m in memberships if m.is_expiring_soon())
-    
-    # Count memberships by tier
-    l1_count = memberships.filter(membership_tier='L1').count()
-    l2_count = memberships.filter(membership_tier='L2').count()
-    l3_count = memberships.filter(membership_tier='L3').count()
+    # Filters (all optional)
+    role = request.GET.get('role', 'USER')
+    if role not in [key for key, label, icon in USER_TABS]:
+        role = 'USER'
+    tier = request.GET.get('tier', 'L1')
+    if tier not in dict(UserMembership.MEMBERSHIP_TIERS):
+        tier = 'L1'
+    payment_status = request.GET.get('payment_status', '')
+    if payment_status not in dict(UserMembership.PAYMENT_STATUS_CHOICES):
+        payment_status = ''
+    expiring = request.GET.get('expiring') == '1'
+    search = request.GET.get('q', '').strip()
+    
+    today = timezone.now().date()
+    
+    # User Management and Membership Management tables, a keyset page each
+    users_qs, users_ordering = dashboard_users(role, payment_status, search)
+    users_page = keyset_paginate(users_qs, users_ordering, request.GET.get('users_cursor'), DASHBOARD_PAGE_SIZE)
+    memberships_qs, memberships_ordering = dashboard_memberships(tier, payment_status, search, expiring, today)
+    memberships_page = keyset_paginate(
+        memberships_qs, memberships_ordering, request.GET.get('memberships_cursor'), DASHBOARD_PAGE_SIZE
+    )
+    
+    # Counters (one aggregate query)
+    stats = get_admin_dashboard_stats(today)
+    tier_counts = {key: stats[f'{key.lower()}_count'] for key, label, icon in TIER_TABS}
+    role_counts = {
+        'USER': stats['total_users'],
+        'TRAINER': stats['trainer_accounts'],
+        'PENDING': stats['pending_trainers_count'],
+        'ADMIN': stats['total_admins'],
+    }
     
-    # Count pending payments
-    pending_payments_count = memberships.filter(payment_status='PENDING').count()
+    user_tabs = [
+        {'key': key, 'label': label, 'icon': icon, 'count': role_counts[key],
+         'url': _dashboard_url(request, role=key), 'active': key == role}
+        for key, label, icon in USER_TABS
+    ]
+    tier_tabs = [
+        {'key': key, 'label': label, 'icon': icon, 'count': tier_counts[key],
+         'url': _dashboard_url(request, tier=key), 'active': key == tier}
+        for key, label, icon in TIER_TABS
+    ]
     
     context = {
-        'all_users': all_users,
-        'memberships': memberships,
-        'pending_trainers': pending_trainers,
-        'pending_trainers_count': pending_trainers.count(),
-        'pending_payments_count': pending_payments_count,
-        'total_users': all_users.filter(role='USER').count(),
-        'total_trainers': all_users.filter(role='TRAINER', trainer_profile__approval_status='APPROVED').count(),
-        'total_admins': all_users.filter(role='ADMIN').count(),
-        'expiring_soon_count': expiring_soon_count,
-        'l1_count': l1_count,
-        'l2_count': l2_count,
-        'l3_count': l3_count,
+        'role': role,
+        'tier': tier,
+        'payment_status': payment_status,
+        'expiring': expiring,
+        'search': search,
+        'payment_status_choices': UserMembership.PAYMENT_STATUS_CHOICES,
+        'user_tabs': user_tabs,
+        'tier_tabs': tier_tabs,
+        'users_page': users_page,
+        'users_next_url': _dashboard_url(request, users_cursor=users_page.next_cursor) if users_page.has_next else None,
+        'users_first_url': _dashboard_url(request, users_cursor=None),
+        'memberships_page': memberships_page,
+        'memberships_next_url': _dashboard_url(request, memberships_cursor=memberships_page.next_cursor) if memberships_page.has_next else None,
+        'memberships_first_url': _dashboard_url(request, memberships_cursor=None),
+        'clear_filters_url': _dashboard_url(request, q=None, payment_status=None, expiring=None),
+        'expiring_url': _dashboard_url(request, expiring='1'),
+        'pending_trainers_url': _dashboard_url(request, role='PENDING'),
+        **stats,
     }
     return render(request, 'accounts/admin_dashboard.html', context)
 
 
+@login_required
+def admin_user_modal(request, user_id):
+    """HTML fragment for the edit user modal, loaded when the modal is opened"""
+    denied = _admin_only_fragment(request)
+    if denied:
+        return denied
+    
+    user = get_object_or_404(
+        User.objects.select_related('admin_profile', 'trainer_profile'), id=user_id
+    )
+    return render(request, 'accounts/partials/user_edit_modal.html', {'user': user})
+
+
+@login_required
+def admin_membership_modal(request, membership_id):
+    """HTML fragment for the membership details modal"""
+    denied = _admin_only_fragment(request)
+    if denied:
+        return denied
+    
+    membership = get_object_or_404(
+        UserMembership.objects.select_related('user', 'payment_confirmed_by', 'receipt').prefetch_related(
+            'l3_addons__assigned_trainer'
+        ),
+        id=membership_id
+    )
+    return render(request, 'accounts/partials/membership_modal.html', {'membership': membership})
+
+
+@login_required
+def admin_payment_modal(request, user_id, action):
+    """HTML fragment for the confirm/cancel payment modal"""
+    denied = _admin_only_fragment(request)
+    if denied:
+        return denied
+    if action not in ('confirm', 'cancel'):
+        raise Http404('Unknown payment action')
+    
+    membership = get_object_or_404(UserMembership.objects.select_related('user'), user_id=user_id)
+    return render(request, 'accounts/partials/payment_modal.html', {
+        'membership': membership,
+        'action': action,
+    })
+
+
+@login_required
+def admin_trainer_review_modal(request, trainer_id):
+    """HTML fragment for reviewing (approving or rejecting) a pending trainer application"""
+    denied = _admin_only_fragment(request)
+    if denied:
+        return denied
+    
+    trainer_profile = get_object_or_404(TrainerProfile.objects.select_related('user'), id=trainer_id)
+    return render(request, 'accounts/partials/trainer_review_modal.html', {'trainer_profile': trainer_profile})
+
+
 @login_required
 def approve_trainer(request, trainer_id):
     """Admin approves a pending trainer"""
@@ -268,37 +448,8 @@ def approve_trainer(request, trainer_id):
     trainer_user.is_active = True
     trainer_user.save()
     
-    # Send approval email
-    subject = 'HealthHub - Trainer Account Approved'
-    message = f"""
-Dear {trainer_user.full_name},
-
-Congratulations! Your trainer account has been approved by the admin.
-
-You can now login to your trainer dashboard using your credentials:
-- Username: {trainer_user.username}
-- Login URL: http://127.0.0.1:8000/login/
-
-Approved By: {request.user.full_name}
-Approval Date: {timezone.now().strftime('%B %d, %Y at %I:%M %p')}
-
-Welcome to the HealthHub team!
-
-Best regards,
-The HealthHub Team
-Where Fitness Meets Wellness
-"""
-    
-    try:
-        email = EmailMessage(
-            subject=subject,
-            body=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[trainer_user.email]
-        )
-        email.send(fail_silently=False)
-    except Exception as e:
-        print(f"Error sending email: {e}")
+    # Queue approval email
+    queue_email(**trainer_approval_email(trainer_user, request.user, trainer_profile.approval_date))
     
     messages.success(request, f'Trainer {trainer_user.full_name} has been approved successfully!')
     return redirect('admin_dashboard')
@@ -328,34 +479,8 @@ def reject_trainer(request, trainer_id):
         trainer_user.is_active = False
         trainer_user.save()
         
-        # Send rejection email
-        subject = 'HealthHub - Trainer Application Status'
-        message = f"""
-Dear {trainer_user.full_name},
-
-We regret to inform you that your trainer application has not been approved at this time.
-
-Reason: {rejection_reason}
-
-If you believe this is an error or would like to reapply, please contact us at {settings.DEFAULT_FROM_EMAIL}.
-
-Thank you for your interest in HealthHub.
-
-Best regards,
-The HealthHub Team
-Where Fitness Meets Wellness
-"""
-        
-        try:
-            email = EmailMessage(
-                subject=subject,
-                body=message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[trainer_user.email]
-            )
-            email.send(fail_silently=False)
-        except Exception as e:
-            print(f"Error sending email: {e}")
+        # Queue rejection email
+        queue_email(**trainer_rejection_email(trainer_user, rejection_reason))
         
         messages.success(request, f'Trainer {trainer_user.full_name} application has been rejected.')
         return redirect('admin_dashboard')
@@ -364,6 +489,66 @@ Where Fitness Meets Wellness
     return redirect('admin_dashboard')
 
 
+@login_required
+@require_POST
+def bulk_review_trainers(request):
+    """Admin approves or rejects several pending trainers at once"""
+    if request.user.role != 'ADMIN':
+        messages.error(request, 'Access denied. Admin only.')
+        return redirect('landing_page')
+    
+    action = request.POST.get('action')
+    trainer_ids = [int(i) for i in request.POST.getlist('trainer_ids') if i.isdigit()]
+    pending_url = f"{reverse('admin_dashboard')}?role=PENDING#users-section"
+    if action not in ('approve', 'reject'):
+        messages.error(request, 'Invalid action.')
+        return redirect(pending_url)
+    if not trainer_ids:
+        messages.warning(request, 'Select at least one trainer application.')
+        return redirect(pending_url)
+    
+    rejection_reason = request.POST.get('rejection_reason', '').strip() or 'Not specified'
+    now = timezone.now()
+    
+    with transaction.atomic():
+        # Lock the selected applications so a concurrent review cannot process them twice
+        profiles = list(
+            TrainerProfile.objects.select_for_update().select_related('user').filter(
+                id__in=trainer_ids, approval_status='PENDING'
+            )
+        )
+        if not profiles:
+            messages.warning(request, 'The selected applications have already been reviewed.')
+            return redirect(pending_url)
+        
+        profile_ids = [profile.id for profile in profiles]
+        trainer_users = [profile.user for profile in profiles]
+        changes = {'approved_by': request.user, 'approval_date': now}
+        if action == 'approve':
+            changes['approval_status'] = 'APPROVED'
+        else:
+            changes['approval_status'] = 'REJECTED'
+            changes['rejection_reason'] = rejection_reason
+        TrainerProfile.objects.filter(id__in=profile_ids).update(**changes)
+        User.objects.filter(id__in=[user.id for user in trainer_users]).update(is_active=(action == 'approve'))
+        
+        # Notifications are committed with the status change, in one INSERT
+        if action == 'approve':
+            queue_emails([trainer_approval_email(user, request.user, now) for user in trainer_users])
+        else:
+            queue_emails([trainer_rejection_email(user, rejection_reason) for user in trainer_users])
+        
+        # update() sends no post_save signals, so drop the cached directory here
+        transaction.on_commit(invalidate_trainer_directory)
+    
+    verb = 'approved' if action == 'approve' else 'rejected'
+    messages.success(request, f'{len(profiles)} trainer application{"s" if len(profiles) != 1 else ""} {verb}.')
+    skipped = len(set(trainer_ids)) - len(profiles)
+    if skipped:
+        messages.info(request, f'{skipped} selected application{"s were" if skipped != 1 else " was"} already reviewed and skipped.')
+    return redirect(pending_url)
+
+
 @login_required
 def trainer_dashboard(request):
     """Trainer dashboard - view personal info and assigned clients"""
@@ -392,7 +577,7 @@ def user_dashboard(request):
     try:
         from memberships.models import L3Addon, TrainerRating
         
-        membership = UserMembership.objects.get(user=request.user)
+        membership = UserMembership.objects.select_related('receipt').get(user=request.user)
         addons = membership.l3_addons.all()
         
         # Get L3 assigned trainers with ratings
@@ -415,27 +600,22 @@ def user_dashboard(request):
         # Get current week workout plans for L2 users
         workout_plans = []
         if membership.membership_tier == 'L2':
-            current_date = timezone.now().date()
-            workout_plans = WorkoutPlan.objects.filter(
-                membership=membership,
-                start_date__lte=current_date,
-                end_date__gte=current_date,
-                is_active=True
-            ).prefetch_related('exercises').order_by('day_of_week')
+            workout_plans = current_week_plans(membership)
         
         # Get protein intake records if extra protein is needed
         protein_intakes = []
+        protein_adherence = None
         if membership.extra_protein_needed:
-            protein_intakes = ProteinIntake.objects.filter(
-                membership=membership
-            ).order_by('-date')[:30]  # Last 30 days
+            protein_intakes = latest_protein_intakes(membership)
+            today = timezone.now().date()
+            protein_adherence = get_protein_adherence(
+                today - timedelta(days=ADHERENCE_DEFAULT_DAYS - 1), today, [membership.id]
+            )['members'][0]
         
         # Get medical checkups if medical history exists
         medical_checkups = []
         if membership.medical_history:
-            medical_checkups = MedicalCheckup.objects.filter(
-                membership=membership
-            ).order_by('-checkup_date')[:10]  # Last 10 checkups
+            medical_checkups = latest_checkups(membership, limit=10)
             
     except UserMembership.DoesNotExist:
         membership = None
@@ -443,6 +623,7 @@ def user_dashboard(request):
         assigned_trainers = []
         workout_plans = []
         protein_intakes = []
+        protein_adherence = None
         medical_checkups = []
     
     # Check membership expiry
@@ -450,7 +631,7 @@ def user_dashboard(request):
     expiry_date = None
     days_remaining = None
     if membership:
-        expiry_date = membership.get_membership_expiry_date()
+        expiry_date = membership.expiry_date
         expiry_warning = membership.is_expiring_soon()
         days_remaining = membership.days_until_expiry()
     
@@ -460,6 +641,7 @@ def user_dashboard(request):
         'assigned_trainers': assigned_trainers,
         'workout_plans': workout_plans,
         'protein_intakes': protein_intakes,
+        'protein_adherence': protein_adherence,
         'medical_checkups': medical_checkups,
         'expiry_warning': expiry_warning,
         'expiry_date': expiry_date,
@@ -511,23 +693,72 @@ def toggle_exercise_completion(request):
     if request.user.role != 'USER':
         return JsonResponse({'success': False, 'error': 'Access denied'}, status=403)
     
-    exercise_id = request.POST.get('exercise_id')
-    try:
-        exercise = Exercise.objects.get(id=exercise_id, workout_plan__membership__user=request.user)
-        exercise.is_completed = not exercise.is_completed
-        if exercise.is_completed:
-            exercise.completed_at = timezone.now()
-        else:
-            exercise.completed_at = None
-        exercise.save()
-        
-        return JsonResponse({
-            'success': True,
-            'is_completed': exercise.is_completed,
-            'completed_at': exercise.completed_at.strftime('%Y-%m-%d %H:%M') if exercise.completed_at else None
-        })
-    except Exercise.DoesNotExist:
+    exercise_id = request.POST.get('exercise_id', '')
+    is_completed = Exercise.objects.filter(
+        id=exercise_id if exercise_id.isdigit() else None, workout_plan__membership__user=request.user
+    ).values_list('is_completed', flat=True).first()
+    if is_completed is None:
         return JsonResponse({'success': False, 'error': 'Exercise not found'}, status=404)
+    
+    # Set (rather than flip) the state so two quick clicks cannot race each other
+    exercises, _ = set_exercise_completion(request.user, {int(exercise_id): not is_completed})
+    exercise = exercises[0]
+    return JsonResponse({
+        'success': True,
+        'is_completed': exercise['is_completed'],
+        'completed_at': exercise['completed_at'].strftime('%Y-%m-%d %H:%M') if exercise['completed_at'] else None
+    })
+
+
+MAX_EXERCISE_BATCH = 200
+
+
+@login_required
+@require_POST
+def update_exercise_completion(request):
+    """
+    Set the completion state of several exercises at once.
+    
+    Expects a JSON body {"exercises": [{"id": 12, "completed": true}, ...]} and
+    returns the resulting states plus updated totals for the affected weeks.
+    """
+    if request.user.role != 'USER':
+        return JsonResponse({'success': False, 'error': 'Access denied'}, status=403)
+    
+    # ids must be JSON integers and completed a JSON boolean: "false" or 0 must not tick an exercise
+    try:
+        items = json.loads(request.body)['exercises']
+        if not isinstance(items, list) or not all(
+            isinstance(item, dict)
+            and type(item.get('id')) is int
+            and isinstance(item.get('completed'), bool)
+            for item in items
+        ):
+            raise ValueError
+        states = {item['id']: item['completed'] for item in items}
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse(
+            {'success': False, 'error': 'Expected {"exercises": [{"id": <integer>, "completed": true|false}]}'},
+            status=400,
+        )
+    if not states or len(states) > MAX_EXERCISE_BATCH:
+        return JsonResponse({'success': False, 'error': f'Send between 1 and {MAX_EXERCISE_BATCH} exercises'}, status=400)
+    
+    exercises, week_totals = set_exercise_completion(request.user, states)
+    found = {exercise['id'] for exercise in exercises}
+    return JsonResponse({
+        'success': True,
+        'exercises': [
+            {
+                'id': exercise['id'],
+                'is_completed': exercise['is_completed'],
+                'completed_at': exercise['completed_at'].strftime('%Y-%m-%d %H:%M') if exercise['completed_at'] else None,
+            }
+            for exercise in exercises
+        ],
+        'not_found': sorted(exercise_id for exercise_id in states if exercise_id not in found),
+        'week_totals': week_totals,
+    })
 
 
 @login_required
@@ -545,23 +776,13 @@ def admin_manage_user_data(request, user_id):
         return redirect('admin_dashboard')
     
     # Get current week workout plans
-    current_date = timezone.now().date()
-    workout_plans = WorkoutPlan.objects.filter(
-        membership=membership,
-        start_date__lte=current_date,
-        end_date__gte=current_date,
-        is_active=True
-    ).prefetch_related('exercises').order_by('day_of_week')
+    workout_plans = current_week_plans(membership)
     
     # Get protein intake records
-    protein_intakes = ProteinIntake.objects.filter(
-        membership=membership
-    ).order_by('-date')[:30]
+    protein_intakes = latest_protein_intakes(membership)
     
     # Get medical checkups
-    medical_checkups = MedicalCheckup.objects.filter(
-        membership=membership
-    ).order_by('-checkup_date')
+    medical_checkups = latest_checkups(membership)
     
     context = {
         'managed_user': user,
@@ -609,6 +830,249 @@ def admin_update_protein_intake(request):
         return JsonResponse({'success': False, 'error': str(e)}, status=400)
 
 
+PROTEIN_GRID_PAGE_SIZE = 50
+MAX_PROTEIN_GRID_ENTRIES = 2000
+
+
+@login_required
+def protein_grid(request):
+    """Admin weekly grid of morning/evening protein shakes for every extra-protein member"""
+    if request.user.role != 'ADMIN':
+        messages.error(request, 'Access denied. Admin only.')
+        return redirect('landing_page')
+    
+    today = timezone.now().date()
+    try:
+        week_start = datetime.strptime(request.GET.get('week', ''), '%Y-%m-%d').date()
+    except ValueError:
+        week_start = today
+    week_start -= timedelta(days=week_start.weekday())
+    week_dates = [week_start + timedelta(days=offset) for offset in range(7)]
+    
+    memberships = UserMembership.objects.filter(extra_protein_needed=True).select_related('user')
+    page = keyset_paginate(memberships, ('id',), request.GET.get('cursor'), PROTEIN_GRID_PAGE_SIZE)
+    
+    intakes = {
+        (intake.membership_id, intake.date): intake
+        for intake in ProteinIntake.objects.filter(
+            membership__in=[membership.id for membership in page], date__range=(week_dates[0], week_dates[-1])
+        )
+    }
+    adherence = {
+        member['id']: member
+        for member in get_protein_adherence(week_dates[0], week_dates[-1], [membership.id for membership in page])['members']
+    }
+    rows = [
+        {
+            'membership': membership,
+            'adherence': adherence.get(membership.id),
+            'days': [
+                {'date': day, 'intake': intakes.get((membership.id, day))}
+                for day in week_dates
+            ],
+        }
+        for membership in page
+    ]
+    
+    params = request.GET.copy()
+    params['week'] = week_start.isoformat()
+    params['cursor'] = page.next_cursor
+    context = {
+        'rows': rows,
+        'page': page,
+        'week_dates': week_dates,
+        'today': today,
+        'previous_week': week_start - timedelta(days=7),
+        'next_week': week_start + timedelta(days=7),
+        'next_url': f'?{params.urlencode()}' if page.has_next else None,
+    }
+    return render(request, 'accounts/protein_grid.html', context)
+
+
+@login_required
+@require_POST
+def save_protein_grid_view(request):
+    """
+    Save a batch of protein grid cells in one transaction.
+    
+    Expects a JSON body {"entries": [{"membership_id": 3, "date": "2026-10-12",
+    "morning": true, "evening": false}, ...]}.
+    """
+    if request.user.role != 'ADMIN':
+        return JsonResponse({'success': False, 'error': 'Access denied'}, status=403)
+    
+    # membership_id must be a JSON integer and morning/evening JSON booleans: "false" or 0 must not tick a cell
+    try:
+        items = json.loads(request.body)['entries']
+        if not isinstance(items, list) or not all(
+            isinstance(item, dict)
+            and type(item.get('membership_id')) is int
+            and isinstance(item.get('morning'), bool)
+            and isinstance(item.get('evening'), bool)
+            for item in items
+        ):
+            raise ValueError
+        entries = [
+            (
+                item['membership_id'],
+                datetime.strptime(item['date'], '%Y-%m-%d').date(),
+                item['morning'],
+                item['evening'],
+            )
+            for item in items
+        ]
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse(
+            {'success': False, 'error': 'Expected {"entries": [{"membership_id": <integer>, "date": "YYYY-MM-DD", "morning": true|false, "evening": true|false}]}'},
+            status=400,
+        )
+    if not entries or len(entries) > MAX_PROTEIN_GRID_ENTRIES:
+        return JsonResponse({'success': False, 'error': f'Send between 1 and {MAX_PROTEIN_GRID_ENTRIES} entries'}, status=400)
+    
+    membership_ids = {entry[0] for entry in entries}
+    allowed = set(UserMembership.objects.filter(
+        id__in=membership_ids, extra_protein_needed=True
+    ).values_list('id', flat=True))
+    if membership_ids - allowed:
+        return JsonResponse({
+            'success': False,
+            'error': 'Unknown membership or no extra protein: ' + ', '.join(map(str, sorted(membership_ids - allowed))),
+        }, status=400)
+    
+    saved = save_protein_grid(entries, request.user)
+    return JsonResponse({'success': True, 'saved': saved})
+
+
+ADHERENCE_DEFAULT_DAYS = 30
+ADHERENCE_MAX_DAYS = 366
+
+
+@login_required
+def protein_adherence(request):
+    """
+    Protein adherence JSON for dashboards.
+    
+    Admins get every extra-protein member (or ?membership=<id>, repeatable) and
+    the cohort totals; members get their own figures. ?start= and ?end=
+    (YYYY-MM-DD) default to the last 30 days.
+    """
+    today = timezone.now().date()
+    try:
+        end = datetime.strptime(request.GET['end'], '%Y-%m-%d').date() if request.GET.get('end') else today
+        start = (datetime.strptime(request.GET['start'], '%Y-%m-%d').date() if request.GET.get('start')
+                 else end - timedelta(days=ADHERENCE_DEFAULT_DAYS - 1))
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Dates must be YYYY-MM-DD'}, status=400)
+    if start > end or (end - start).days >= ADHERENCE_MAX_DAYS:
+        return JsonResponse({'success': False, 'error': f'Choose a range of 1 to {ADHERENCE_MAX_DAYS} days'}, status=400)
+    
+    if request.user.role == 'ADMIN':
+        membership_ids = [value for value in request.GET.getlist('membership') if value.isdigit()] or None
+    elif request.user.role == 'USER':
+        membership_ids = list(UserMembership.objects.filter(user=request.user).values_list('id', flat=True))
+    else:
+        return JsonResponse({'success': False, 'error': 'Access denied'}, status=403)
+    
+    adherence = get_protein_adherence(start, end, membership_ids)
+    if request.user.role == 'USER':
+        adherence.pop('cohort')
+    return JsonResponse({'success': True, **adherence})
+
+
+# Per-exercise inputs of the workout forms, named {day}_exercise_{i}_{field}
+EXERCISE_FORM_FIELDS = ('name', 'type', 'sets', 'reps', 'description')
+MAX_EXERCISES_PER_DAY = 30  # {day}_exercise_count is client-supplied, so bound the rows read per day
+
+
+def _exercises_from_post(post):
+    """
+    Parse and validate the day-by-day exercise rows of a workout form.
+    
+    Returns (exercises_by_day, errors); rows without an exercise name are skipped.
+    """
+    errors = []
+    exercise_types = dict(Exercise.EXERCISE_TYPES)
+    exercises_by_day = {}
+    for day, day_label in WorkoutPlan.DAYS_OF_WEEK:
+        try:
+            exercise_count = int(post.get(f'{day}_exercise_count', 0))
+        except (TypeError, ValueError):
+            exercise_count = 0
+        if exercise_count > MAX_EXERCISES_PER_DAY:
+            errors.append(f'{day_label}: add at most {MAX_EXERCISES_PER_DAY} exercises.')
+            continue
+        day_exercises = []
+        for i in range(exercise_count):
+            exercise_name = post.get(f'{day}_exercise_{i}_name', '').strip()
+            if not exercise_name:
+                continue
+            exercise_type = post.get(f'{day}_exercise_{i}_type')
+            if exercise_type not in exercise_types:
+                errors.append(f'{day_label}: choose an exercise type for "{exercise_name}".')
+            try:
+                sets = int(post.get(f'{day}_exercise_{i}_sets') or 1)
+                reps = int(post.get(f'{day}_exercise_{i}_reps') or 1)
+                if sets < 1 or reps < 1:
+                    raise ValueError
+            except ValueError:
+                sets = reps = 1
+                errors.append(f'{day_label}: sets and reps for "{exercise_name}" must be positive numbers.')
+            day_exercises.append({
+                'exercise_name': exercise_name,
+                'exercise_type': exercise_type,
+                'sets': sets,
+                'reps': reps,
+                'description': post.get(f'{day}_exercise_{i}_description', ''),
+            })
+        if day_exercises:
+            exercises_by_day[day] = day_exercises
+    return exercises_by_day, errors
+
+
+def _workout_form_days(post=None, require_monday=False):
+    """
+    (day, label, exercise rows) for the day-by-day workout form: the rows as
+    submitted when it is shown again after a validation error, otherwise one
+    blank row per day. require_monday makes Monday's first exercise required.
+    """
+    days = []
+    for day, day_label in WorkoutPlan.DAYS_OF_WEEK:
+        rows = []
+        if post is not None:
+            try:
+                exercise_count = min(int(post.get(f'{day}_exercise_count', 0)), MAX_EXERCISES_PER_DAY)
+            except (TypeError, ValueError):
+                exercise_count = 0
+            rows = [
+                {field: post.get(f'{day}_exercise_{i}_{field}', '') for field in EXERCISE_FORM_FIELDS}
+                for i in range(exercise_count)
+                if post.get(f'{day}_exercise_{i}_name', '').strip()
+            ]
+        rows = rows or [{'name': '', 'type': 'STRENGTH', 'sets': 3, 'reps': 10, 'description': ''}]
+        if require_monday and day == 'MON':
+            rows[0]['required'] = True
+        days.append((day, day_label, rows))
+    return days
+
+
+def _week_from_post(post):
+    """Validated (week_number, start_date, errors) of a workout week form"""
+    errors = []
+    try:
+        week_number = int(post.get('week_number', 1))
+        if week_number < 1:
+            raise ValueError
+    except (TypeError, ValueError):
+        week_number = None
+        errors.append('Week number must be a positive whole number.')
+    try:
+        start_date = datetime.strptime(post.get('start_date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        start_date = None
+        errors.append('Enter a valid start date.')
+    return week_number, start_date, errors
+
+
 @login_required
 def admin_create_workout_plan(request, user_id):
     """Admin creates/updates workout plan for L2 user"""
@@ -620,56 +1084,186 @@ def admin_create_workout_plan(request, user_id):
     membership = get_object_or_404(UserMembership, user=user, membership_tier='L2')
     
     if request.method == 'POST':
-        week_number = int(request.POST.get('week_number', 1))
-        start_date = datetime.strptime(request.POST.get('start_date'), '%Y-%m-%d').date()
-        end_date = start_date + timedelta(days=6)
+        # Validate the whole form before anything is written
+        week_number, start_date, errors = _week_from_post(request.POST)
+        exercises_by_day, exercise_errors = _exercises_from_post(request.POST)
+        errors += exercise_errors
+        if errors:
+            # Show the form again with everything entered, rather than losing a week of exercises
+            for error in errors:
+                messages.error(request, error)
+            return render(request, 'accounts/admin_create_workout.html', {
+                'managed_user': user,
+                'membership': membership,
+                'form': request.POST,
+                'days': _workout_form_days(request.POST, require_monday=True),
+            })
         
-        # Create workout plans for 6 days
-        days = ['MON', 'TUE', 'WED', 'THU', 'FRI', 'SAT']
+        replace = request.POST.get('replace_existing') == 'on'
+        result = save_week_plan(membership, week_number, start_date, exercises_by_day, replace=replace)
         
-        for day in days:
-            workout_plan, created = WorkoutPlan.objects.get_or_create(
-                membership=membership,
-                week_number=week_number,
-                day_of_week=day,
-                defaults={
-                    'start_date': start_date,
-                    'end_date': end_date,
-                    'is_active': True
-                }
-            )
-            
-            # Get exercises for this day from POST data
-            exercise_count = int(request.POST.get(f'{day}_exercise_count', 0))
-            for i in range(exercise_count):
-                exercise_name = request.POST.get(f'{day}_exercise_{i}_name')
-                exercise_type = request.POST.get(f'{day}_exercise_{i}_type')
-                sets = request.POST.get(f'{day}_exercise_{i}_sets', 1)
-                reps = request.POST.get(f'{day}_exercise_{i}_reps', 1)
-                description = request.POST.get(f'{day}_exercise_{i}_description', '')
-                
-                if exercise_name:
-                    Exercise.objects.create(
-                        workout_plan=workout_plan,
-                        exercise_name=exercise_name,
-                        exercise_type=exercise_type,
-                        sets=sets,
-                        reps=reps,
-                        description=description,
-                        order=i
-                    )
-        
-        messages.success(request, f'Workout plan for week {week_number} created successfully!')
+        messages.success(
+            request,
+            f'Workout plan for week {week_number} {"replaced" if replace else "created"} successfully! '
+            f'{result["exercises_created"]} exercise(s) saved in {result["seconds"] * 1000:.0f} ms.'
+        )
         return redirect('admin_manage_user_data', user_id=user_id)
     
     # Generate AI-based workout suggestions
     context = {
         'managed_user': user,
         'membership': membership,
+        'days': _workout_form_days(require_monday=True),
     }
     return render(request, 'accounts/admin_create_workout.html', context)
 
 
+@login_required
+def workout_templates(request):
+    """Admin lists workout templates and creates new ones"""
+    if request.user.role != 'ADMIN':
+        messages.error(request, 'Access denied. Admin only.')
+        return redirect('landing_page')
+    
+    if request.method == 'POST':
+        name = request.POST.get('name', '').strip()
+        exercises_by_day, errors = _exercises_from_post(request.POST)
+        if not name:
+            errors.insert(0, 'Give the template a name.')
+        elif WorkoutTemplate.objects.filter(name=name).exists():
+            errors.insert(0, f'A template named "{name}" already exists.')
+        if not exercises_by_day:
+            errors.append('Add at least one exercise.')
+        if errors:
+            for error in errors:
+                messages.error(request, error)
+            return render(request, 'accounts/workout_template_form.html', {
+                'form': request.POST,
+                'days': _workout_form_days(request.POST),
+            })
+        
+        with transaction.atomic():
+            template = WorkoutTemplate.objects.create(
+                name=name, description=request.POST.get('description', ''), created_by=request.user
+            )
+            WorkoutTemplateExercise.objects.bulk_create([
+                WorkoutTemplateExercise(template=template, day_of_week=day, order=order, **fields)
+                for day, day_exercises in exercises_by_day.items()
+                for order, fields in enumerate(day_exercises)
+            ])
+        messages.success(request, f'Workout template "{template.name}" created.')
+        return redirect('workout_templates')
+    
+    templates = WorkoutTemplate.objects.select_related('created_by').annotate(
+        exercise_count=Count('exercises'),
+        day_count=Count('exercises__day_of_week', distinct=True),
+    )
+    return render(request, 'accounts/workout_templates.html', {'templates': templates})
+
+
+@login_required
+def new_workout_template(request):
+    """Form for building a workout template (submitted to workout_templates)"""
+    if request.user.role != 'ADMIN':
+        messages.error(request, 'Access denied. Admin only.')
+        return redirect('landing_page')
+    
+    return render(request, 'accounts/workout_template_form.html', {'days': _workout_form_days()})
+
+
+# Explicit member picker on the assign page: a searchable, keyset-paginated list
+MEMBER_PICKER_PAGE_SIZE = 25
+MAX_SELECTED_MEMBERS = 500
+
+
+def _assign_template_context(request, template, l2_memberships, form=None, selected_ids=()):
+    """Context for the assign form; selected members stay listed (and ticked) when it is shown again"""
+    search = request.GET.get('q', '').strip()
+    candidates = l2_memberships.select_related('user')
+    if search:
+        candidates = candidates.filter(
+            Q(user__full_name__icontains=search) | Q(user__email__icontains=search) |
+            Q(user__username__icontains=search)
+        )
+    members_page = keyset_paginate(
+        candidates.exclude(id__in=selected_ids), ('-date_of_joining', '-id'),
+        request.GET.get('members_cursor'), MEMBER_PICKER_PAGE_SIZE,
+    )
+    params = request.GET.copy()
+    params['members_cursor'] = members_page.next_cursor
+    exercises_by_day = template.exercises_by_day()
+    return {
+        'template': template,
+        'template_days': [(label, exercises_by_day.get(day, [])) for day, label in WorkoutPlan.DAYS_OF_WEEK],
+        'l2_count': l2_memberships.count(),
+        'selected_members': list(l2_memberships.filter(id__in=selected_ids).select_related('user')),
+        'members_page': members_page,
+        'search': search,
+        'next_url': f'?{params.urlencode()}' if members_page.has_next else None,
+        'form': form or {},
+    }
+
+
+@login_required
+def assign_workout_template(request, template_id):
+    """Admin clones a workout template onto a cohort of L2 members for one week"""
+    if request.user.role != 'ADMIN':
+        messages.error(request, 'Access denied. Admin only.')
+        return redirect('landing_page')
+    
+    template = get_object_or_404(WorkoutTemplate, id=template_id)
+    l2_memberships = UserMembership.objects.filter(membership_tier='L2')
+    
+    if request.method == 'POST':
+        week_number, start_date, errors = _week_from_post(request.POST)
+        
+        # Cohort: the whole L2 tier, members who joined in a date range, or an explicit selection
+        cohort = request.POST.get('cohort', 'all')
+        memberships = l2_memberships
+        membership_ids = [value for value in request.POST.getlist('membership_ids') if value.isdigit()]
+        if cohort == 'joined':
+            try:
+                joined_from = datetime.strptime(request.POST.get('joined_from', ''), '%Y-%m-%d').date()
+                joined_to = datetime.strptime(request.POST.get('joined_to', ''), '%Y-%m-%d').date()
+                memberships = memberships.filter(date_of_joining__range=(joined_from, joined_to))
+            except ValueError:
+                errors.append('Enter both join dates.')
+        elif cohort == 'selected':
+            if not membership_ids:
+                errors.append('Select at least one member.')
+            elif len(membership_ids) > MAX_SELECTED_MEMBERS:
+                errors.append(f'Select at most {MAX_SELECTED_MEMBERS} members; use a join date range for larger groups.')
+            memberships = memberships.filter(id__in=membership_ids)
+        # Only the members kept ticked when the form is shown again
+        membership_ids = membership_ids[:MAX_SELECTED_MEMBERS]
+        
+        if errors:
+            # Show the form again with the submitted values, keeping the picked members ticked
+            for error in errors:
+                messages.error(request, error)
+            return render(request, 'accounts/assign_workout_template.html', _assign_template_context(
+                request, template, l2_memberships, form=request.POST, selected_ids=membership_ids,
+            ))
+        
+        result = clone_workout_template(template, memberships, week_number, start_date)
+        if result['assigned']:
+            messages.success(
+                request,
+                f'"{template.name}" assigned to {result["assigned"]} member(s) for week {week_number}: '
+                f'{result["exercises_created"]} exercise(s) in {result["seconds"]:.2f}s.'
+            )
+        else:
+            messages.warning(request, 'No members matched, nothing was assigned.')
+        if result['skipped']:
+            messages.warning(
+                request, f'{result["skipped"]} member(s) already had exercises in week {week_number} and were skipped.'
+            )
+        return redirect('workout_templates')
+    
+    return render(request, 'accounts/assign_workout_template.html',
+                  _assign_template_context(request, template, l2_memberships))
+
+
 @login_required
 def admin_add_medical_checkup(request, user_id):
     """Admin adds medical checkup record"""
@@ -716,7 +1310,7 @@ def admin_add_medical_checkup(request, user_id):
 
 @login_required
 def workout_progress_chart(request, user_id=None):
-    """View workout progress charts for L2 users"""
+    """View workout progress charts for L2 users - supports both HTML and JSON format"""
     # Determine which user to show stats for
     if user_id and request.user.role == 'ADMIN':
         user = get_object_or_404(User, id=user_id, role='USER')
@@ -735,73 +1329,24 @@ def workout_progress_chart(request, user_id=None):
         messages.error(request, 'No membership found.')
         return redirect('user_dashboard' if request.user.role == 'USER' else 'admin_dashboard')
     
-    # Get all workout plans for this user
-    workout_plans = WorkoutPlan.objects.filter(
-        membership=membership
-    ).prefetch_related('exercises').order_by('week_number', 'day_of_week')
-    
-    # Calculate statistics
-    weekly_stats = {}
-    day_stats = {
-        'MON': {'total': 0, 'completed': 0},
-        'TUE': {'total': 0, 'completed': 0},
-        'WED': {'total': 0, 'completed': 0},
-        'THU': {'total': 0, 'completed': 0},
-        'FRI': {'total': 0, 'completed': 0},
-        'SAT': {'total': 0, 'completed': 0},
-    }
-    
-    for plan in workout_plans:
-        week = plan.week_number
-        if week not in weekly_stats:
-            weekly_stats[week] = {
-                'total_exercises': 0,
-                'completed_exercises': 0,
-                'start_date': plan.start_date,
-                'end_date': plan.end_date
-            }
-        
-        exercises = plan.exercises.all()
-        total_count = exercises.count()
-        completed_count = exercises.filter(is_completed=True).count()
-        
-        weekly_stats[week]['total_exercises'] += total_count
-        weekly_stats[week]['completed_exercises'] += completed_count
-        
-        # Day-wise statistics
-        day_stats[plan.day_of_week]['total'] += total_count
-        day_stats[plan.day_of_week]['completed'] += completed_count
-    
-    # Calculate percentages
-    for week in weekly_stats:
-        if weekly_stats[week]['total_exercises'] > 0:
-            weekly_stats[week]['completion_rate'] = round(
-                (weekly_stats[week]['completed_exercises'] / weekly_stats[week]['total_exercises']) * 100, 1
-            )
-        else:
-            weekly_stats[week]['completion_rate'] = 0
-    
-    for day in day_stats:
-        if day_stats[day]['total'] > 0:
-            day_stats[day]['completion_rate'] = round(
-                (day_stats[day]['completed'] / day_stats[day]['total']) * 100, 1
-            )
-        else:
-            day_stats[day]['completion_rate'] = 0
+    # Totals per week and per day from one GROUP BY query
+    stats = get_workout_stats(membership)
     
-    # Overall statistics
-    total_exercises = sum(ws['total_exercises'] for ws in weekly_stats.values())
-    completed_exercises = sum(ws['completed_exercises'] for ws in weekly_stats.values())
-    overall_completion_rate = round((completed_exercises / total_exercises * 100), 1) if total_exercises > 0 else 0
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'success': True,
+            'user_id': user.id,
+            'weekly_stats': [{'week_number': week, **week_stats} for week, week_stats in stats['weekly_stats'].items()],
+            'day_stats': stats['day_stats'],
+            'total_exercises': stats['total_exercises'],
+            'completed_exercises': stats['completed_exercises'],
+            'overall_completion_rate': stats['overall_completion_rate'],
+        })
     
     context = {
         'target_user': user,
         'membership': membership,
-        'weekly_stats': dict(sorted(weekly_stats.items())),
-        'day_stats': day_stats,
-        'total_exercises': total_exercises,
-        'completed_exercises': completed_exercises,
-        'overall_completion_rate': overall_completion_rate,
+        **stats,
         'is_admin_viewing': request.user.role == 'ADMIN' and user != request.user,
     }
     return render(request, 'accounts/workout_progress_chart.html', context)
@@ -867,57 +1412,22 @@ def cancel_payment(request, user_id):
 
 def approved_trainers_list(request):
     """View approved trainers with ratings - supports both HTML and JSON format"""
-    from memberships.models import TrainerRating
-    
-    # Get all approved trainers
-    approved_trainers = TrainerProfile.objects.filter(
-        approval_status='APPROVED'
-    ).select_related('user', 'approved_by')
-    
-    # Add rating information to each trainer
-    trainers_with_ratings = []
-    for trainer_profile in approved_trainers:
-        ratings = TrainerRating.objects.filter(trainer=trainer_profile.user)
-        avg_rating = ratings.aggregate(Avg('rating'))['rating__avg'] or 0
-        rating_count = ratings.count()
-        
-        trainers_with_ratings.append({
-            'profile': trainer_profile,
-            'avg_rating': round(avg_rating, 1),
-            'rating_count': rating_count,
-            'ratings': ratings[:5]  # Get latest 5 ratings for preview
-        })
-    
     # Check if JSON format requested (for API)
     if request.GET.get('format') == 'json':
-        trainers_json = []
-        for item in trainers_with_ratings:
-            trainer = item['profile']
-            trainers_json.append({
-                'id': trainer.user.id,
-                'full_name': trainer.user.full_name,
-                'email': trainer.user.email,
-                'phone': trainer.user.phone_number,
-                'specialization': trainer.specialization,
-                'qualification': trainer.qualification,
-                'experience_years': trainer.experience_years,
-                'certification_details': trainer.certification_details,
-                'licenses': trainer.licenses,
-                'accreditations': trainer.accreditations,
-                'approval_date': trainer.approval_date.strftime('%Y-%m-%d') if trainer.approval_date else None,
-                'avg_rating': item['avg_rating'],
-                'rating_count': item['rating_count']
-            })
-        
-        return JsonResponse({
-            'total_trainers': len(trainers_json),
-            'trainers': trainers_json
-        })
+        body, etag = get_trainer_directory_json(request.GET.get('sort', 'default'))
+        etag = quote_etag(etag)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+        return response
     
     # HTML response
+    sort = request.GET.get('sort', 'default')
+    trainers_with_ratings = get_trainer_directory(sort)
     context = {
         'trainers_with_ratings': trainers_with_ratings,
-        'total_approved': len(trainers_with_ratings)
+        'total_approved': len(trainers_with_ratings),
+        'sort': sort
     }
     return render(request, 'accounts/approved_trainers.html', context)
-    return redirect('admin_dashboard')
\ No newline at end of file
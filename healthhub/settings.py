@@ -88,6 +88,19 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Shared by every process, so clearing an entry (e.g. the trainer directory) is
+# seen by all workers. Its table is created by migrate (accounts/migrations/0004).
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'healthhub_cache',
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -128,6 +141,9 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Receipt PDFs: outside MEDIA_ROOT so they are only served by download_receipt's access check
+RECEIPT_ROOT = BASE_DIR / 'private'
+
 # Custom User Model
 AUTH_USER_MODEL = 'accounts.User'
 
@@ -145,6 +161,31 @@ EMAIL_HOST_USER = 'healthhub@example.com'  # Replace with actual email
 EMAIL_HOST_PASSWORD = ''  # Replace with actual password
 DEFAULT_FROM_EMAIL = 'HealthHub <healthhub@example.com>'
 
+# Background job queue (python manage.py run_workers)
+RECEIPT_RENDER_CONCURRENCY = 2  # Max PDFs rendered at once per worker process
+RECEIPT_PDF_COMPRESSION = True  # Compress PDF page streams (smaller receipts, slightly more CPU per render)
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_BASE_DELAY_SECONDS = 30  # Doubles after every failed attempt
+JOB_RETRY_MAX_DELAY_SECONDS = 3600
+JOB_LOCK_TIMEOUT_SECONDS = 600  # Running jobs older than this are assumed abandoned and re-queued
+
+# Public trainer directory JSON (/trainers/?format=json); also cleared whenever trainers or ratings change
+TRAINER_DIRECTORY_CACHE_SECONDS = 3600
+
+# Trainer rating score: averages are smoothed towards this mean, weighted as this many ratings
+RATING_PRIOR_MEAN = 3.0
+RATING_PRIOR_WEIGHT = 5
+
+# Email outbox (python manage.py flush_outbox)
+EMAIL_OUTBOX_BATCH_SIZE = 100  # Messages sent per SMTP connection
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+
+# Medical checkup reminders (python manage.py send_checkup_reminders, run daily)
+CHECKUP_REMINDER_DAYS = 3  # Remind about checkups due within this many days
+
+# Membership renewal notices (python manage.py send_expiry_notices, run daily)
+MEMBERSHIP_EXPIRY_NOTICE_DAYS = (7, 3, 1)  # A notice is sent as a membership enters each window
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -25,6 +25,7 @@ urlpatterns = [
     path('membership/', include('memberships.urls')),
 ]
 
-# Serve media and static files (in development with DEBUG=False as well)
+# Serve media and static files (in development with DEBUG=False as well). Receipt PDFs
+# live under RECEIPT_ROOT, outside MEDIA_ROOT, so they are only served by download_receipt.
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
@@ -1,7 +1,8 @@
 from django.contrib import admin
 from .models import (
     UserMembership, L3Addon, PaymentReceipt, WorkoutPlan, 
-    Exercise, ProteinIntake, MedicalCheckup, TrainerRating
+    Exercise, ProteinIntake, MedicalCheckup, TrainerRating, TrainerRatingSummary, BackgroundJob, EmailOutbox,
+    WorkoutWeekRollup, WorkoutTemplate, WorkoutTemplateExercise, MembershipExpiryNotice
 )
 
 
@@ -12,10 +13,10 @@ class L3AddonInline(admin.TabularInline):
 
 @admin.register(UserMembership)
 class UserMembershipAdmin(admin.ModelAdmin):
-    list_display = ['user', 'membership_tier', 'registration_id', 'total_amount', 'created_at']
+    list_display = ['user', 'membership_tier', 'registration_id', 'total_amount', 'expiry_date', 'created_at']
     list_filter = ['membership_tier', 'pay_monthly_in_advance', 'created_at']
     search_fields = ['user__full_name', 'registration_id']
-    readonly_fields = ['registration_id', 'total_amount', 'discount_amount', 'created_at', 'updated_at']
+    readonly_fields = ['registration_id', 'total_amount', 'discount_amount', 'expiry_date', 'created_at', 'updated_at']
     inlines = [L3AddonInline]
     
     fieldsets = (
@@ -26,7 +27,7 @@ class UserMembershipAdmin(admin.ModelAdmin):
             'fields': ('age', 'current_weight', 'date_of_joining', 'medical_history')
         }),
         ('Payment Details', {
-            'fields': ('pay_monthly_in_advance', 'months_selected', 'extra_protein_needed')
+            'fields': ('pay_monthly_in_advance', 'months_selected', 'expiry_date', 'extra_protein_needed')
         }),
         ('Fee Breakdown', {
             'fields': ('base_registration_fee', 'monthly_fee', 'discount_amount', 'addon_fees', 'total_amount')
@@ -37,6 +38,14 @@ class UserMembershipAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(MembershipExpiryNotice)
+class MembershipExpiryNoticeAdmin(admin.ModelAdmin):
+    list_display = ['membership', 'expiry_date', 'days_before', 'sent_at']
+    list_filter = ['days_before', 'sent_at']
+    search_fields = ['membership__user__full_name']
+    readonly_fields = ['membership', 'expiry_date', 'days_before', 'sent_at']
+
+
 @admin.register(L3Addon)
 class L3AddonAdmin(admin.ModelAdmin):
     list_display = ['membership', 'addon_type', 'fee']
@@ -45,8 +54,9 @@ class L3AddonAdmin(admin.ModelAdmin):
 
 @admin.register(PaymentReceipt)
 class PaymentReceiptAdmin(admin.ModelAdmin):
-    list_display = ['receipt_number', 'membership', 'generated_at']
-    readonly_fields = ['receipt_number', 'generated_at']
+    list_display = ['receipt_number', 'membership', 'status', 'generated_at', 'rendered_at']
+    list_filter = ['status']
+    readonly_fields = ['receipt_number', 'generated_at', 'status', 'last_error', 'fingerprint', 'rendered_at']
     search_fields = ['receipt_number', 'membership__user__full_name']
 
 
@@ -87,7 +97,7 @@ class MedicalCheckupAdmin(admin.ModelAdmin):
     list_filter = ['status', 'checkup_date']
     search_fields = ['membership__user__full_name', 'checkup_type', 'conducted_by']
     date_hierarchy = 'checkup_date'
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['reminder_sent_for', 'created_at', 'updated_at']
     
     fieldsets = (
         ('Checkup Information', {
@@ -97,7 +107,7 @@ class MedicalCheckupAdmin(admin.ModelAdmin):
             'fields': ('conducted_by', 'findings', 'recommendations', 'next_checkup_date')
         }),
         ('Admin Details', {
-            'fields': ('updated_by_admin', 'created_at', 'updated_at')
+            'fields': ('updated_by_admin', 'reminder_sent_for', 'created_at', 'updated_at')
         }),
     )
 
@@ -120,3 +130,50 @@ class TrainerRatingAdmin(admin.ModelAdmin):
             'fields': ('created_at', 'updated_at')
         }),
     )
+
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'task', 'status', 'attempts', 'max_attempts', 'run_after', 'locked_by', 'updated_at']
+    list_filter = ['status', 'task']
+    readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ['id', 'subject', 'to', 'status', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = ['status']
+    search_fields = ['subject', 'to']
+    readonly_fields = ['created_at', 'sent_at', 'attachment_content']
+
+
+@admin.register(TrainerRatingSummary)
+class TrainerRatingSummaryAdmin(admin.ModelAdmin):
+    list_display = ['trainer', 'rating_count', 'average', 'bayesian_score', 'updated_at']
+    ordering = ['-bayesian_score']
+    readonly_fields = [
+        'trainer', 'rating_count', 'rating_sum', 'stars_1', 'stars_2', 'stars_3', 'stars_4', 'stars_5',
+        'bayesian_score', 'updated_at'
+    ]
+
+
+@admin.register(WorkoutWeekRollup)
+class WorkoutWeekRollupAdmin(admin.ModelAdmin):
+    list_display = ['membership', 'week_number', 'day_of_week', 'total_exercises', 'completed_exercises', 'updated_at']
+    list_filter = ['day_of_week']
+    readonly_fields = [
+        'workout_plan', 'membership', 'week_number', 'day_of_week', 'total_exercises', 'completed_exercises',
+        'updated_at'
+    ]
+
+
+class WorkoutTemplateExerciseInline(admin.TabularInline):
+    model = WorkoutTemplateExercise
+    extra = 0
+
+
+@admin.register(WorkoutTemplate)
+class WorkoutTemplateAdmin(admin.ModelAdmin):
+    list_display = ['name', 'created_by', 'created_at']
+    search_fields = ['name']
+    inlines = [WorkoutTemplateExerciseInline]
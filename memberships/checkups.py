@@ -0,0 +1,149 @@
+"""
+Medical checkup reminders.
+
+send_checkup_reminders() finds checkups coming due within a window: SCHEDULED
+checkups by checkup_date and COMPLETED ones by their next_checkup_date follow-up.
+Each is marked with the due date it was reminded for, in the same transaction
+that queues the member's email, so reruns skip it until the checkup is
+rescheduled. Every admin then gets one digest of the checkups they recorded;
+checkups without a recording admin go to all admins.
+"""
+import logging
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+
+from accounts.models import User
+from .models import MedicalCheckup
+from .outbox import queue_emails
+
+logger = logging.getLogger(__name__)
+
+
+def due_checkups(today, horizon):
+    """
+    Checkups due in [today, horizon] that have not been reminded for that date,
+    as (kind, due date field, queryset) pairs.
+
+    Both lookups are index range scans, on checkup_status_date_idx
+    (status, checkup_date) and checkup_status_next_idx (status, next_checkup_date).
+    """
+    scheduled = MedicalCheckup.objects.filter(
+        status='SCHEDULED', checkup_date__range=(today, horizon)
+    ).exclude(reminder_sent_for=F('checkup_date'))
+
+    # A follow-up is only due if nothing has been booked for the member yet
+    booked = MedicalCheckup.objects.filter(
+        membership=OuterRef('membership'), status='SCHEDULED', checkup_date__gte=today
+    )
+    follow_ups = MedicalCheckup.objects.filter(
+        next_checkup_date__range=(today, horizon), status='COMPLETED'
+    ).exclude(reminder_sent_for=F('next_checkup_date')).exclude(Exists(booked))
+
+    return [('scheduled', 'checkup_date', scheduled), ('follow-up', 'next_checkup_date', follow_ups)]
+
+
+def latest_checkups(membership, limit=None):
+    """The membership's checkups, latest first (checkup_member_date_idx); only the first `limit` if given"""
+    return MedicalCheckup.objects.filter(membership=membership).order_by('-checkup_date')[:limit]
+
+
+def _member_reminder(checkup, kind, due_date):
+    user = checkup.membership.user
+    what = f'{checkup.checkup_type} checkup' if kind == 'scheduled' else f'follow-up to your {checkup.checkup_type} checkup'
+    message = f"""
+Dear {user.full_name},
+
+This is a reminder that your {what} is due on {due_date.strftime('%A, %B %d, %Y')}.
+
+If you need to reschedule, please contact the HealthHub front desk.
+
+Best regards,
+The HealthHub Team
+Where Fitness Meets Wellness
+"""
+    return {'subject': f'HealthHub - Medical checkup reminder for {due_date.strftime("%B %d")}',
+            'body': message, 'to': user.email}
+
+
+def _admin_digest(admin, lines, today, horizon):
+    message = f"""
+Dear {admin.full_name},
+
+The following medical checkups are due between {today.strftime('%B %d')} and {horizon.strftime('%B %d, %Y')}.
+The members have been sent a reminder.
+
+""" + '\n'.join(sorted(lines)) + """
+
+Best regards,
+HealthHub System
+"""
+    return {'subject': f'HealthHub - {len(lines)} medical checkup(s) due soon', 'body': message, 'to': admin.email}
+
+
+def send_checkup_reminders(today=None, days=None, chunk_size=500, dry_run=False):
+    """
+    Queue reminders for checkups due within `days` days and a digest per admin.
+
+    Checkups are handled in chunks of chunk_size; each chunk is locked, marked
+    and its member emails queued in one transaction.
+
+    Returns metrics: scheduled, follow_ups, reminders, digests, seconds.
+    With dry_run nothing is written and reminders counts what would be sent.
+    """
+    started = time.monotonic()
+    today = today or timezone.now().date()
+    horizon = today + timedelta(days=days if days is not None else getattr(settings, 'CHECKUP_REMINDER_DAYS', 3))
+    metrics = {'scheduled': 0, 'follow_ups': 0, 'reminders': 0, 'digests': 0}
+    digest_lines = defaultdict(list)
+
+    for kind, due_field, queryset in due_checkups(today, horizon):
+        last_id = 0
+        while True:
+            with transaction.atomic():
+                chunk = list(
+                    queryset.filter(id__gt=last_id).select_related('membership__user')
+                    .select_for_update(skip_locked=True, of=('self',)).order_by('id')[:chunk_size]
+                )
+                if not chunk:
+                    break
+                last_id = chunk[-1].id
+                if not dry_run:
+                    queryset.filter(id__in=[checkup.id for checkup in chunk]).update(reminder_sent_for=F(due_field))
+                    queue_emails([_member_reminder(checkup, kind, getattr(checkup, due_field)) for checkup in chunk])
+
+            metrics['scheduled' if kind == 'scheduled' else 'follow_ups'] += len(chunk)
+            metrics['reminders'] += len(chunk)
+            for checkup in chunk:
+                digest_lines[checkup.updated_by_admin_id].append(
+                    f'- {getattr(checkup, due_field):%a %b %d}: {checkup.membership.user.full_name} - '
+                    f'{checkup.checkup_type}{" (follow-up)" if kind == "follow-up" else ""}'
+                )
+
+    if digest_lines:
+        admins = {admin.id: admin for admin in User.objects.filter(role='ADMIN', is_active=True)}
+        # Checkups recorded by nobody (or by a former admin) go to every admin
+        unassigned = []
+        for admin_id in list(digest_lines):
+            if admin_id not in admins:
+                unassigned += digest_lines.pop(admin_id)
+        per_admin = {admin_id: digest_lines.get(admin_id, []) + unassigned for admin_id in admins}
+        digests = [
+            _admin_digest(admins[admin_id], lines, today, horizon)
+            for admin_id, lines in per_admin.items() if lines
+        ]
+        if not dry_run:
+            queue_emails(digests)
+        metrics['digests'] = len(digests)
+
+    metrics['seconds'] = time.monotonic() - started
+    logger.info(
+        'Checkup reminders: %(scheduled)s scheduled, %(follow_ups)s follow-up(s), %(digests)s digest(s) in %(seconds).2fs',
+        metrics,
+    )
+    return metrics
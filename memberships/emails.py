@@ -0,0 +1,61 @@
+from .outbox import queue_email
+
+
+def send_membership_email(user, membership, pdf_bytes=None):
+    """Queue membership registration confirmation email with PDF receipt (delivered by flush_outbox)"""
+    subject = 'Welcome to HealthHub - Membership Registration Successful'
+    
+    # Get membership tier display name
+    tier_names = {
+        'L1': 'L1 FitStarter',
+        'L2': 'L2 ProActive',
+        'L3': 'L3 EliteChamp'
+    }
+    tier_name = tier_names.get(membership.membership_tier, membership.membership_tier)
+    
+    # Build addons list
+    addons_list = ""
+    if membership.membership_tier == 'L3':
+        l3_addons = membership.l3_addons.all()
+        if l3_addons:
+            addons_list = "\n\nL3 Add-ons Selected:"
+            for addon in l3_addons:
+                addons_list += f"\n  - {addon.get_addon_type_display()}"
+                if addon.assigned_trainer:
+                    addons_list += f" (Trainer: {addon.assigned_trainer.full_name})"
+    
+    message = f"""
+Dear {user.full_name},
+
+Congratulations! Your HealthHub membership registration is complete.
+
+Membership Details:
+- Registration ID: {membership.registration_id}
+- Tier: {tier_name}
+- Base Fee: ₹{membership.base_registration_fee}
+- Monthly Fee: ₹{membership.monthly_fee:.2f}
+- Discount: ₹{membership.discount_amount:.2f}
+- Add-on Fees: ₹{membership.addon_fees:.2f}
+- Total Amount: ₹{membership.total_amount:.2f}
+- Registration Date: {membership.date_of_joining.strftime('%B %d, %Y')}
+{addons_list}
+
+Your membership receipt is attached to this email for your records.
+
+You can now login to your member dashboard using your username and password.
+
+Login URL: http://127.0.0.1:8000/login/
+
+Thank you for choosing HealthHub. We look forward to helping you achieve your fitness goals!
+
+Best regards,
+The HealthHub Team
+Where Fitness Meets Wellness
+"""
+    
+    # The outbox row keeps the PDF bytes until the message is delivered
+    attachment = None
+    if pdf_bytes:
+        attachment = (f'receipt_{membership.registration_id}.pdf', pdf_bytes, 'application/pdf')
+    
+    return queue_email(subject, message, user.email, attachment=attachment)
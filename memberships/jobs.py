@@ -0,0 +1,135 @@
+"""
+Database-backed background job queue.
+
+Jobs are rows in BackgroundJob, so they are committed atomically with the data
+that created them and survive restarts without an external broker. Workers
+(see the run_workers management command) claim a job with a conditional UPDATE,
+run the registered task and either mark it DONE or reschedule it with
+exponential backoff until max_attempts is reached.
+"""
+import logging
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+# Registered task handlers: name -> (handler, on_give_up)
+TASKS = {}
+
+# Limits how many PDFs a worker process renders at the same time
+RENDER_SLOTS = threading.BoundedSemaphore(getattr(settings, 'RECEIPT_RENDER_CONCURRENCY', 2))
+
+
+def task(name, on_give_up=None):
+    """
+    Register a function as a background task.
+
+    Args:
+        name: Task name stored on BackgroundJob.task
+        on_give_up: Optional callback(payload, error) run once the job has
+                    failed for the last time
+    """
+    def decorator(func):
+        TASKS[name] = (func, on_give_up)
+        return func
+    return decorator
+
+
+def enqueue(task_name, payload=None, delay=None, max_attempts=None):
+    """
+    Add a job to the queue. Call inside the same transaction as the rows the
+    job depends on, so the job only exists if they were committed.
+    """
+    run_after = timezone.now() + delay if delay else timezone.now()
+    return BackgroundJob.objects.create(
+        task=task_name,
+        payload=payload or {},
+        run_after=run_after,
+        max_attempts=max_attempts or getattr(settings, 'JOB_MAX_ATTEMPTS', 5),
+    )
+
+
+def retry_delay(attempts):
+    """Exponential backoff: base, 2*base, 4*base, ... capped at JOB_RETRY_MAX_DELAY_SECONDS"""
+    base = getattr(settings, 'JOB_RETRY_BASE_DELAY_SECONDS', 30)
+    cap = getattr(settings, 'JOB_RETRY_MAX_DELAY_SECONDS', 3600)
+    return timedelta(seconds=min(base * 2 ** max(attempts - 1, 0), cap))
+
+
+def _claimable(now):
+    """Pending jobs that are due, plus running jobs whose worker appears to have died"""
+    stale_before = now - timedelta(seconds=getattr(settings, 'JOB_LOCK_TIMEOUT_SECONDS', 600))
+    return (
+        Q(status='PENDING', run_after__lte=now) |
+        Q(status='RUNNING', locked_at__lt=stale_before)
+    )
+
+
+def claim_job(worker_name, batch=10):
+    """
+    Claim the next due job for this worker, or return None if the queue is empty.
+
+    Candidates are read first and then claimed one by one with a conditional
+    UPDATE, so two workers can never claim the same job.
+    """
+    now = timezone.now()
+    candidate_ids = list(
+        BackgroundJob.objects.filter(_claimable(now)).order_by('run_after', 'id').values_list('id', flat=True)[:batch]
+    )
+    for job_id in candidate_ids:
+        claimed = BackgroundJob.objects.filter(_claimable(now), id=job_id).update(
+            status='RUNNING',
+            locked_by=worker_name,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return BackgroundJob.objects.get(id=job_id)
+    return None
+
+
+def _finish(job, **fields):
+    """
+    Record a job's outcome and release its lock, but only while this worker
+    still holds it: a job reclaimed as stale belongs to its new worker, whose
+    result must not be overwritten. Returns whether the row was updated.
+    """
+    finished = BackgroundJob.objects.filter(id=job.id, locked_by=job.locked_by, locked_at=job.locked_at).update(
+        locked_by='', locked_at=None, updated_at=timezone.now(), **fields
+    )
+    if not finished:
+        logger.warning('Job %s (%s) was reclaimed by another worker; dropping this result', job.id, job.task)
+    return bool(finished)
+
+
+def run_job(job):
+    """Run a claimed job and record its outcome. Returns True on success."""
+    handler, on_give_up = TASKS.get(job.task, (None, None))
+    try:
+        if handler is None:
+            raise LookupError(f'Unknown task: {job.task}')
+        handler(job.payload)
+    except Exception as e:
+        last_error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            logger.warning('Job %s (%s) failed on attempt %s, retrying: %s', job.id, job.task, job.attempts, e)
+            _finish(job, status='PENDING', run_after=timezone.now() + retry_delay(job.attempts), last_error=last_error)
+            return False
+
+        logger.error('Job %s (%s) failed permanently: %s', job.id, job.task, e)
+        # Record the failure first, so a failing callback cannot leave the job RUNNING
+        if _finish(job, status='FAILED', last_error=last_error) and on_give_up:
+            try:
+                on_give_up(job.payload, e)
+            except Exception:
+                logger.exception('on_give_up for job %s (%s) failed', job.id, job.task)
+        return False
+
+    return _finish(job, status='DONE')
@@ -0,0 +1,52 @@
+import io
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from memberships.models import UserMembership
+from memberships.utils import ReceiptRenderer
+
+
+class Command(BaseCommand):
+    help = 'Benchmark receipt PDF rendering and report receipts per second'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=200, help='Receipts to render per scenario (default: 200)')
+        parser.add_argument('--sample', type=int, default=50,
+                            help='Distinct memberships to cycle through (default: 50)')
+
+    def handle(self, *args, **options):
+        memberships = list(
+            UserMembership.objects.select_related('user', 'receipt').prefetch_related(
+                'l3_addons__assigned_trainer__trainer_profile'
+            ).order_by('id')[:options['sample']]
+        )
+        if not memberships:
+            raise CommandError('No memberships to render. Register a member (or run seed data) first.')
+
+        count = options['count']
+        scenarios = [
+            # Styles rebuilt for every receipt, as before the shared renderer
+            ('per-call renderer, compressed', lambda: ReceiptRenderer(compress=True), True),
+            ('per-call renderer, uncompressed', lambda: ReceiptRenderer(compress=False), True),
+            ('shared renderer, compressed', lambda: ReceiptRenderer(compress=True), False),
+            ('shared renderer, uncompressed', lambda: ReceiptRenderer(compress=False), False),
+        ]
+
+        self.stdout.write(f'Rendering {count} receipts per scenario from {len(memberships)} membership(s)')
+        for label, make_renderer, per_call in scenarios:
+            shared = make_renderer()
+            total_bytes = 0
+            started = time.perf_counter()
+            for i in range(count):
+                renderer = make_renderer() if per_call else shared
+                buffer = io.BytesIO()
+                renderer.render(memberships[i % len(memberships)], buffer)
+                total_bytes += buffer.tell()
+            elapsed = time.perf_counter() - started
+
+            self.stdout.write(
+                f'{label:<34} {count / elapsed:8.1f} receipts/s  '
+                f'{elapsed * 1000 / count:6.2f} ms/receipt  '
+                f'{total_bytes / count / 1024:6.1f} KiB avg'
+            )
@@ -0,0 +1,52 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from memberships.outbox import flush_batch
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued emails from the outbox in batches, one SMTP connection per batch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 100),
+                            help='Messages sent per SMTP connection')
+        parser.add_argument('--max-batches', type=int, default=0,
+                            help='Stop after this many batches (default: until the outbox is empty)')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep polling for new messages instead of exiting when the outbox is empty')
+        parser.add_argument('--poll-interval', type=float, default=5.0,
+                            help='Seconds to sleep when the outbox is empty with --loop (default: 5)')
+
+    def handle(self, *args, **options):
+        batches = 0
+        totals = {'sent': 0, 'retried': 0, 'failed': 0}
+        started = time.monotonic()
+
+        try:
+            while not options['max_batches'] or batches < options['max_batches']:
+                metrics = flush_batch(options['batch_size'])
+                if metrics is None:
+                    if not options['loop']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                batches += 1
+                for key in totals:
+                    totals[key] += metrics[key]
+                rate = metrics['sent'] / metrics['seconds'] if metrics['seconds'] else 0
+                self.stdout.write(
+                    f"Batch {batches}: {metrics['sent']}/{metrics['claimed']} sent, "
+                    f"{metrics['retried']} to retry, {metrics['failed']} failed "
+                    f"in {metrics['seconds']:.2f}s ({rate:.1f} msg/s)"
+                )
+        except KeyboardInterrupt:
+            self.stdout.write('Interrupted.')
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Outbox flushed: {totals['sent']} sent, {totals['retried']} to retry, "
+            f"{totals['failed']} failed in {batches} batch(es), {elapsed:.1f}s"
+        ))
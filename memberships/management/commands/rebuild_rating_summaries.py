@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from memberships.models import TrainerRatingSummary
+from memberships.ratings import SUMMARY_FIELDS, compute_rating_summaries, rebuild_rating_summaries
+
+
+class Command(BaseCommand):
+    help = 'Recompute TrainerRatingSummary rows from TrainerRating (backfill or repair)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--trainer', type=int, action='append', dest='trainer_ids',
+                            help='Only this trainer user id (repeatable)')
+        parser.add_argument('--check', action='store_true',
+                            help='Report summaries that differ from the ratings table without writing')
+
+    def handle(self, *args, **options):
+        if options['check']:
+            expected = compute_rating_summaries(options['trainer_ids'])
+            stored = TrainerRatingSummary.objects.in_bulk([s.trainer_id for s in expected])
+            drifted = 0
+            for summary in expected:
+                current = stored.get(summary.trainer_id)
+                if current is None:
+                    # Trainers without ratings only get a row once they are rated
+                    differs = summary.rating_count > 0
+                else:
+                    differs = any(
+                        abs(getattr(current, f) - getattr(summary, f)) > 1e-9 for f in SUMMARY_FIELDS
+                    )
+                if differs:
+                    drifted += 1
+                    self.stdout.write(f'Trainer #{summary.trainer_id}: stored summary is out of date')
+            style = self.style.WARNING if drifted else self.style.SUCCESS
+            self.stdout.write(style(f'{drifted} of {len(expected)} summaries out of date'))
+            return
+
+        written = rebuild_rating_summaries(options['trainer_ids'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} trainer rating summaries'))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from memberships.models import WorkoutWeekRollup
+from memberships.workouts import compute_workout_rollups, rebuild_workout_rollups
+
+
+COUNT_FIELDS = ['membership_id', 'week_number', 'day_of_week', 'total_exercises', 'completed_exercises']
+
+
+class Command(BaseCommand):
+    help = 'Recompute WorkoutWeekRollup rows from Exercise (backfill or repair)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--membership', type=int, action='append', dest='membership_ids',
+                            help='Only this membership id (repeatable)')
+        parser.add_argument('--check', action='store_true',
+                            help='Report rollups that differ from the exercises table without writing')
+
+    def handle(self, *args, **options):
+        if options['check']:
+            expected = compute_workout_rollups(options['membership_ids'])
+            stored = WorkoutWeekRollup.objects.in_bulk([r.workout_plan_id for r in expected])
+            drifted = 0
+            for rollup in expected:
+                current = stored.get(rollup.workout_plan_id)
+                if current is None or any(getattr(current, f) != getattr(rollup, f) for f in COUNT_FIELDS):
+                    drifted += 1
+                    self.stdout.write(
+                        f'Workout plan #{rollup.workout_plan_id} (membership #{rollup.membership_id}, '
+                        f'week {rollup.week_number} {rollup.day_of_week}): rollup is '
+                        f'{"missing" if current is None else "out of date"}'
+                    )
+            style = self.style.WARNING if drifted else self.style.SUCCESS
+            self.stdout.write(style(f'{drifted} of {len(expected)} rollups out of date'))
+            return
+
+        written = rebuild_workout_rollups(options['membership_ids'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} workout rollups'))
@@ -0,0 +1,136 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from memberships.models import PaymentReceipt, UserMembership
+from memberships.utils import init_render_worker, receipt_fingerprint, render_receipt_in_worker
+
+
+class Command(BaseCommand):
+    help = 'Regenerate stale receipt PDFs in parallel (resumable with --resume, --force to re-render all)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Render processes (default: number of CPUs)')
+        parser.add_argument('--chunk-size', type=int, default=200,
+                            help='Memberships loaded, rendered and saved per batch (default: 200)')
+        parser.add_argument('--force', action='store_true',
+                            help='Re-render every receipt, not only those whose fingerprint changed')
+        parser.add_argument('--resume', action='store_true',
+                            help='Continue after the last completed batch of an interrupted run, '
+                                 'retrying receipts that failed')
+        parser.add_argument('--checkpoint', default=os.path.join('receipts', '.regenerate_receipts.checkpoint'),
+                            help='Checkpoint file, relative to RECEIPT_ROOT')
+
+    def handle(self, *args, **options):
+        chunk_size = max(options['chunk_size'], 1)
+        checkpoint_path = os.path.join(settings.RECEIPT_ROOT, options['checkpoint'])
+
+        start_after = 0
+        if options['resume'] and os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as f:
+                start_after = int(f.read().strip() or 0)
+            self.stdout.write(f'Resuming after membership #{start_after}')
+
+        # Failures are recorded on the receipt, so a resumed run retries them as well
+        resume_q = Q(id__gt=start_after) | Q(receipt__status='FAILED') if start_after else Q()
+        memberships = UserMembership.objects.filter(
+            resume_q, receipt__isnull=False
+        ).select_related('user', 'receipt').prefetch_related(
+            'l3_addons__assigned_trainer__trainer_profile'
+        ).order_by('id')
+        total = memberships.count()
+        if not total:
+            self.stdout.write('No receipts to regenerate.')
+            return
+        self.stdout.write(f'Regenerating {total} receipt(s) with {options["workers"]} worker(s)...')
+
+        done = 0
+        skipped = 0
+        failed = []
+        started = time.monotonic()
+        # Spawned (not forked) workers never inherit the parent's open DB connection
+        with ProcessPoolExecutor(max_workers=max(options['workers'], 1),
+                                 mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=init_render_worker) as pool:
+            for batch in self._batches(memberships.iterator(chunk_size=chunk_size), chunk_size):
+                rendered, unchanged = self._process_batch(
+                    pool, batch, failed, checkpoint_path, options['force'], start_after
+                )
+                done += rendered
+                skipped += unchanged
+                self._report(done + skipped, total, started)
+
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Regenerated {done} receipt(s) in {elapsed:.1f}s ({done / elapsed if elapsed else 0:.1f} receipts/s), '
+            f'{skipped} already up to date'
+        ))
+        if failed:
+            self.stdout.write(self.style.WARNING(f'{len(failed)} receipt(s) failed:'))
+            for receipt_id, error in failed:
+                self.stdout.write(f'  receipt #{receipt_id}: {error}')
+
+    def _batches(self, iterable, size):
+        batch = []
+        for item in iterable:
+            batch.append(item)
+            if len(batch) == size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _process_batch(self, pool, batch, failed, checkpoint_path, force, start_after=0):
+        """
+        Render the stale receipts of a batch across the pool, save them in one
+        UPDATE and advance the checkpoint. Failed receipts are marked FAILED
+        with their error so --resume picks them up again. Returns (rendered, skipped).
+        """
+        fingerprints = {}
+        stale = []
+        for membership in batch:
+            fingerprint = receipt_fingerprint(membership)
+            if force or membership.receipt.status == 'FAILED' or not membership.receipt.is_current(fingerprint):
+                fingerprints[membership.receipt.id] = fingerprint
+                stale.append(membership)
+
+        receipts = []
+        failures = []
+        rendered_at = timezone.now()
+        for receipt_id, file_name, error in pool.map(render_receipt_in_worker, stale):
+            if error:
+                failed.append((receipt_id, error))
+                failures.append(PaymentReceipt(id=receipt_id, status='FAILED', last_error=error))
+                continue
+            receipts.append(PaymentReceipt(
+                id=receipt_id, pdf_file=file_name, fingerprint=fingerprints[receipt_id],
+                rendered_at=rendered_at, status='READY', last_error='',
+            ))
+
+        with transaction.atomic():
+            PaymentReceipt.objects.bulk_update(
+                receipts, ['pdf_file', 'fingerprint', 'rendered_at', 'status', 'last_error']
+            )
+            PaymentReceipt.objects.bulk_update(failures, ['status', 'last_error'])
+
+        os.makedirs(os.path.dirname(checkpoint_path), exist_ok=True)
+        with open(checkpoint_path, 'w') as f:
+            # Retried failures sort before the checkpoint; never move it backwards
+            f.write(str(max(batch[-1].id, start_after)))
+        return len(receipts), len(batch) - len(stale)
+
+    def _report(self, done, total, started):
+        elapsed = time.monotonic() - started
+        rate = done / elapsed if elapsed else 0
+        self.stdout.write(f'  {done}/{total} checked ({rate:.1f} receipts/s)')
@@ -0,0 +1,66 @@
+import os
+import socket
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from memberships import tasks  # noqa: F401  (registers task handlers)
+from memberships.jobs import claim_job, run_job
+
+
+class Command(BaseCommand):
+    help = 'Run background job workers (receipt PDFs, confirmation emails) from the database queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='Number of worker threads (default: 2)')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds to sleep when the queue is empty (default: 1)')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once the queue has no due jobs instead of polling forever')
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+        base_name = f'{socket.gethostname()}:{os.getpid()}'
+        counts = {'done': 0, 'failed': 0}
+        lock = threading.Lock()
+
+        def work(worker_name):
+            try:
+                while not stop.is_set():
+                    job = claim_job(worker_name)
+                    if job is None:
+                        if options['once']:
+                            return
+                        stop.wait(options['poll_interval'])
+                        continue
+                    ok = run_job(job)
+                    with lock:
+                        counts['done' if ok else 'failed'] += 1
+            finally:
+                close_old_connections()
+
+        threads = [
+            threading.Thread(target=work, args=(f'{base_name}-{i}',), daemon=True)
+            for i in range(max(options['workers'], 1))
+        ]
+        self.stdout.write(f'Starting {len(threads)} worker(s)...')
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+
+        try:
+            while any(thread.is_alive() for thread in threads):
+                for thread in threads:
+                    thread.join(timeout=0.5)
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping workers after their current job...')
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Workers stopped: {counts['done']} job(s) done, {counts['failed']} failed in {elapsed:.1f}s"
+        ))
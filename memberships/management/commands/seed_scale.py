@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from memberships.seeding import ScaleSeeder
+
+
+class Command(BaseCommand):
+    help = 'Generate a deterministic, production-sized synthetic dataset for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--members', type=int, default=10000, help='Members to create (default: 10000)')
+        parser.add_argument('--trainers', type=int, default=None,
+                            help='Trainers to create, in mixed approval states (default: 1 per 100 members)')
+        parser.add_argument('--admins', type=int, default=5, help='Admins to create (default: 5)')
+        parser.add_argument('--weeks', type=int, default=4,
+                            help='Weeks of workout and protein history per member (default: 4)')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed and prefix give the same data')
+        parser.add_argument('--prefix', default='scale', help='Username/email prefix for the generated accounts')
+        parser.add_argument('--password', default=None,
+                            help='Shared password for the generated accounts (default: unusable)')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Members written per batch of inserts')
+
+    def handle(self, *args, **options):
+        trainers = options['trainers'] if options['trainers'] is not None else max(options['members'] // 100, 1)
+        seeder = ScaleSeeder(
+            seed=options['seed'], prefix=options['prefix'], weeks=max(options['weeks'], 0),
+            batch_size=max(options['batch_size'], 1), password=options['password'],
+        )
+        try:
+            counts = seeder.seed(max(options['admins'], 0), max(trainers, 0), max(options['members'], 0))
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        seconds = counts.pop('seconds')
+        for name, count in counts.items():
+            self.stdout.write(f'  {name}: {count}')
+        self.stdout.write(self.style.SUCCESS(f'Seeded {sum(counts.values())} rows in {seconds:.1f}s'))
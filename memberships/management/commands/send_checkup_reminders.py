@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from memberships.checkups import send_checkup_reminders
+
+
+class Command(BaseCommand):
+    help = 'Queue reminders for medical checkups coming due, plus a digest per admin (safe to rerun)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=getattr(settings, 'CHECKUP_REMINDER_DAYS', 3),
+                            help='Remind about checkups due within this many days (default: CHECKUP_REMINDER_DAYS)')
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help='Checkups marked and queued per transaction (default: 500)')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report what would be sent without marking or queueing anything')
+
+    def handle(self, *args, **options):
+        metrics = send_checkup_reminders(
+            days=options['days'], chunk_size=max(options['chunk_size'], 1), dry_run=options['dry_run']
+        )
+        verb = 'Would queue' if options['dry_run'] else 'Queued'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {metrics["reminders"]} reminder(s) ({metrics["scheduled"]} scheduled, '
+            f'{metrics["follow_ups"]} follow-up) and {metrics["digests"]} admin digest(s) '
+            f'in {metrics["seconds"]:.2f}s'
+        ))
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from memberships.renewals import send_expiry_notices
+
+
+class Command(BaseCommand):
+    help = 'Queue renewal notices for memberships entering an expiry window (safe to rerun)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, nargs='+',
+                            default=list(getattr(settings, 'MEMBERSHIP_EXPIRY_NOTICE_DAYS', (7, 3, 1))),
+                            help='Notice windows in days before expiry (default: MEMBERSHIP_EXPIRY_NOTICE_DAYS)')
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Memberships recorded and queued per transaction (default: 1000)')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report what would be sent without recording or queueing anything')
+
+    def handle(self, *args, **options):
+        metrics = send_expiry_notices(
+            days=options['days'], chunk_size=max(options['chunk_size'], 1), dry_run=options['dry_run']
+        )
+        verb = 'Would queue' if options['dry_run'] else 'Queued'
+        windows = ', '.join(f'{count} at {window} days' for window, count in metrics['windows'].items())
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {metrics["notices"]} expiry notice(s) ({windows}) in {metrics["seconds"]:.2f}s'
+        ))
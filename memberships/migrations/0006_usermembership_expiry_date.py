@@ -0,0 +1,37 @@
+# Generated by Django 5.2.9 on 2026-10-17 01:01
+
+from dateutil.relativedelta import relativedelta
+from django.db import migrations, models
+
+
+def backfill_expiry_date(apps, schema_editor):
+    """Store the expiry date of existing memberships (same rule as UserMembership.calculate_expiry_date)"""
+    UserMembership = apps.get_model('memberships', 'UserMembership')
+    batch = []
+    memberships = UserMembership.objects.filter(
+        pay_monthly_in_advance=True, months_selected__gt=0
+    ).only('id', 'date_of_joining', 'months_selected')
+    for membership in memberships.iterator(chunk_size=2000):
+        membership.expiry_date = membership.date_of_joining + relativedelta(months=membership.months_selected)
+        batch.append(membership)
+        if len(batch) >= 2000:
+            UserMembership.objects.bulk_update(batch, ['expiry_date'])
+            batch = []
+    if batch:
+        UserMembership.objects.bulk_update(batch, ['expiry_date'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('memberships', '0005_trainerrating'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usermembership',
+            name='expiry_date',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_expiry_date, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.9 on 2026-10-17 01:03
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def mark_existing_receipts_ready(apps, schema_editor):
+    """Receipts generated before the job queue already have their PDF"""
+    PaymentReceipt = apps.get_model('memberships', 'PaymentReceipt')
+    PaymentReceipt.objects.exclude(pdf_file='').exclude(pdf_file__isnull=True).update(status='READY')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('memberships', '0006_usermembership_expiry_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paymentreceipt',
+            name='last_error',
+            field=models.TextField(blank=True, help_text='Error from the last failed generation attempt'),
+        ),
+        migrations.AddField(
+            model_name='paymentreceipt',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'Queued'), ('PROCESSING', 'Generating'), ('READY', 'Ready'), ('FAILED', 'Failed')], default='PENDING', max_length=10),
+        ),
+        migrations.CreateModel(
+            name='BackgroundJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task', models.CharField(help_text='Registered task name, e.g. receipts.generate', max_length=100)),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='PENDING', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('max_attempts', models.PositiveIntegerField(default=5)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, help_text='Job is not picked up before this time')),
+                ('locked_by', models.CharField(blank=True, help_text='Worker currently running the job', max_length=100)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Background Job',
+                'verbose_name_plural': 'Background Jobs',
+                'ordering': ['run_after', 'id'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx')],
+            },
+        ),
+        migrations.RunPython(mark_existing_receipts_ready, migrations.RunPython.noop),
+    ]
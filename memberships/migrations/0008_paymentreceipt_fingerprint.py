@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-17 01:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('memberships', '0007_backgroundjob_paymentreceipt_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paymentreceipt',
+            name='fingerprint',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='paymentreceipt',
+            name='rendered_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.9 on 2026-10-17 01:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_summaries(apps, schema_editor):
+    """Summaries for existing trainers (same totals as memberships.ratings.compute_rating_summaries)"""
+    User = apps.get_model('accounts', 'User')
+    TrainerRatingSummary = apps.get_model('memberships', 'TrainerRatingSummary')
+    mean = float(getattr(settings, 'RATING_PRIOR_MEAN', 3.0))
+    weight = float(getattr(settings, 'RATING_PRIOR_WEIGHT', 5))
+    rows = User.objects.filter(role='TRAINER').values('id').annotate(
+        rating_count=Count('received_ratings'),
+        rating_sum=Coalesce(Sum('received_ratings__rating'), 0),
+        **{f'stars_{n}': Count('received_ratings', filter=Q(received_ratings__rating=n)) for n in range(1, 6)},
+    )
+    TrainerRatingSummary.objects.bulk_create([
+        TrainerRatingSummary(
+            trainer_id=row.pop('id'),
+            bayesian_score=(mean * weight + row['rating_sum']) / (weight + row['rating_count']),
+            **row,
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_trainerprofile_accreditations_and_more'),
+        ('memberships', '0009_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrainerRatingSummary',
+            fields=[
+                ('trainer', models.OneToOneField(limit_choices_to={'role': 'TRAINER'}, on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_summary', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('rating_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('stars_1', models.PositiveIntegerField(default=0)),
+                ('stars_2', models.PositiveIntegerField(default=0)),
+                ('stars_3', models.PositiveIntegerField(default=0)),
+                ('stars_4', models.PositiveIntegerField(default=0)),
+                ('stars_5', models.PositiveIntegerField(default=0)),
+                ('bayesian_score', models.FloatField(db_index=True, default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Trainer Rating Summary',
+                'verbose_name_plural': 'Trainer Rating Summaries',
+            },
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
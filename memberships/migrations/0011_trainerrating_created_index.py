@@ -0,0 +1,19 @@
+# Generated by Django 5.2.9 on 2026-10-17 01:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('memberships', '0010_trainerratingsummary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='trainerrating',
+            index=models.Index(fields=['trainer', 'created_at', 'id'], name='rating_trainer_created_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.9 on 2026-10-17 01:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_rollups(apps, schema_editor):
+    """Rollups for existing plans (same counts as memberships.workouts.compute_workout_rollups)"""
+    WorkoutPlan = apps.get_model('memberships', 'WorkoutPlan')
+    WorkoutWeekRollup = apps.get_model('memberships', 'WorkoutWeekRollup')
+    rows = WorkoutPlan.objects.values('id', 'membership_id', 'week_number', 'day_of_week').annotate(
+        total_exercises=Count('exercises'),
+        completed_exercises=Count('exercises', filter=Q(exercises__is_completed=True)),
+    )
+    WorkoutWeekRollup.objects.bulk_create(
+        [WorkoutWeekRollup(workout_plan_id=row.pop('id'), **row) for row in rows], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('memberships', '0011_trainerrating_created_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkoutWeekRollup',
+            fields=[
+                ('workout_plan', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rollup', serialize=False, to='memberships.workoutplan')),
+                ('week_number', models.PositiveIntegerField()),
+                ('day_of_week', models.CharField(choices=[('MON', 'Monday'), ('TUE', 'Tuesday'), ('WED', 'Wednesday'), ('THU', 'Thursday'), ('FRI', 'Friday'), ('SAT', 'Saturday')], max_length=3)),
+                ('total_exercises', models.PositiveIntegerField(default=0)),
+                ('completed_exercises', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('membership', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='workout_rollups', to='memberships.usermembership')),
+            ],
+            options={
+                'verbose_name': 'Workout Week Rollup',
+                'verbose_name_plural': 'Workout Week Rollups',
+                'ordering': ['membership', 'week_number', 'day_of_week'],
+                'constraints': [models.UniqueConstraint(fields=('membership', 'week_number', 'day_of_week'), name='workout_rollup_unique_day')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.9 on 2026-10-17 01:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('memberships', '0012_workoutweekrollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkoutTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('description', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(blank=True, limit_choices_to={'role': 'ADMIN'}, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='workout_templates', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Workout Template',
+                'verbose_name_plural': 'Workout Templates',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='WorkoutTemplateExercise',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day_of_week', models.CharField(choices=[('MON', 'Monday'), ('TUE', 'Tuesday'), ('WED', 'Wednesday'), ('THU', 'Thursday'), ('FRI', 'Friday'), ('SAT', 'Saturday')], max_length=3)),
+                ('exercise_name', models.CharField(max_length=200)),
+                ('exercise_type', models.CharField(choices=[('CARDIO', 'Cardio'), ('STRENGTH', 'Strength Training'), ('FLEXIBILITY', 'Flexibility'), ('HIIT', 'High Intensity Interval Training'), ('YOGA', 'Yoga'), ('CORE', 'Core Training')], max_length=20)),
+                ('sets', models.PositiveIntegerField(default=1)),
+                ('reps', models.PositiveIntegerField(default=1, help_text='Repetitions or duration in minutes')),
+                ('description', models.TextField(blank=True, help_text='Exercise instructions')),
+                ('order', models.PositiveIntegerField(default=0)),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exercises', to='memberships.workouttemplate')),
+            ],
+            options={
+                'verbose_name': 'Workout Template Exercise',
+                'verbose_name_plural': 'Workout Template Exercises',
+                'ordering': ['template', 'day_of_week', 'order'],
+            },
+        ),
+    ]
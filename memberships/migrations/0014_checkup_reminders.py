@@ -0,0 +1,28 @@
+# Generated by Django 5.2.9 on 2026-10-17 01:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('memberships', '0013_workouttemplate'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='medicalcheckup',
+            name='reminder_sent_for',
+            field=models.DateField(blank=True, editable=False, help_text='Due date the last reminder was sent for (see send_checkup_reminders)', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='medicalcheckup',
+            index=models.Index(fields=['status', 'checkup_date'], name='checkup_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medicalcheckup',
+            index=models.Index(fields=['status', 'next_checkup_date'], name='checkup_status_next_idx'),
+        ),
+    ]
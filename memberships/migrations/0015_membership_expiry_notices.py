@@ -0,0 +1,30 @@
+# Generated by Django 5.2.9 on 2026-10-17 01:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('memberships', '0014_checkup_reminders'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MembershipExpiryNotice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('expiry_date', models.DateField(help_text='Expiry date the notice was sent for')),
+                ('days_before', models.PositiveSmallIntegerField(help_text='Notice window the membership fell into, in days')),
+                ('sent_at', models.DateTimeField(auto_now_add=True)),
+                ('membership', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='expiry_notices', to='memberships.usermembership')),
+            ],
+            options={
+                'verbose_name': 'Membership Expiry Notice',
+                'verbose_name_plural': 'Membership Expiry Notices',
+                'ordering': ['-sent_at'],
+                'constraints': [models.UniqueConstraint(fields=('membership', 'expiry_date', 'days_before'), name='expiry_notice_unique')],
+            },
+        ),
+    ]
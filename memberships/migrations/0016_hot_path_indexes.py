@@ -0,0 +1,31 @@
+# Generated by Django 5.2.9 on 2026-10-17 01:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('memberships', '0015_membership_expiry_notices'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='medicalcheckup',
+            index=models.Index(fields=['membership', '-checkup_date'], name='checkup_member_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usermembership',
+            index=models.Index(fields=['membership_tier', 'created_at', 'id'], name='membership_tier_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usermembership',
+            index=models.Index(fields=['membership_tier', 'payment_status', 'created_at', 'id'], name='membership_tier_payment_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workoutplan',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['membership', 'start_date', 'end_date'], name='workout_active_week_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.9 on 2026-10-17 02:23
+
+import memberships.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('memberships', '0016_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='paymentreceipt',
+            name='pdf_file',
+            field=models.FileField(blank=True, null=True, storage=memberships.storage.ReceiptStorage(), upload_to='receipts/'),
+        ),
+    ]
@@ -1,9 +1,44 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import F, Q, Value
+from django.utils import timezone
+from dateutil.relativedelta import relativedelta
+from datetime import timedelta
 from accounts.models import User
+from .storage import receipt_storage
+from .utils import generate_membership_receipt, receipt_fingerprint, store_receipt_pdf
 import uuid
 from decimal import Decimal
 
 
+def expiring_between_q(start, end, prefix=''):
+    """
+    Q object matching memberships whose stored expiry date falls within [start, end].
+
+    Args:
+        start, end: Inclusive date bounds
+        prefix: Lookup prefix when filtering from a related model, e.g. 'membership__'
+    """
+    return Q(**{f'{prefix}expiry_date__range': (start, end)})
+
+
+class UserMembershipQuerySet(models.QuerySet):
+    """Range queries over the indexed expiry_date column"""
+
+    def expiring_between(self, start, end):
+        """Memberships expiring on or between the two dates"""
+        return self.filter(expiring_between_q(start, end))
+
+    def expiring_soon(self, days=7, today=None):
+        """Memberships expiring within the next `days` days (inclusive of today)"""
+        today = today or timezone.now().date()
+        return self.expiring_between(today, today + timedelta(days=days))
+
+    def expired_as_of(self, date):
+        """Memberships whose expiry date is before the given date"""
+        return self.filter(expiry_date__lt=date)
+
+
 class UserMembership(models.Model):
     """User membership with tier selection"""
     MEMBERSHIP_TIERS = [
@@ -46,14 +81,25 @@ class UserMembership(models.Model):
     addon_fees = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
     
+    # Stored so expiry reports can filter and sort on it; kept in sync in save()
+    expiry_date = models.DateField(null=True, blank=True, editable=False, db_index=True)
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = UserMembershipQuerySet.as_manager()
+    
     class Meta:
         verbose_name = 'User Membership'
         verbose_name_plural = 'User Memberships'
         ordering = ['-created_at']
+        indexes = [
+            # Admin dashboard membership table: tier tab, optional payment filter, newest first
+            models.Index(fields=['membership_tier', 'created_at', 'id'], name='membership_tier_created_idx'),
+            models.Index(fields=['membership_tier', 'payment_status', 'created_at', 'id'],
+                         name='membership_tier_payment_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.full_name} - {self.get_membership_tier_display()}"
@@ -93,35 +139,54 @@ class UserMembership(models.Model):
         self.total_amount = total
         return total
     
-    def get_membership_expiry_date(self):
+    def calculate_expiry_date(self):
         """Calculate membership expiry date based on months selected"""
         if self.pay_monthly_in_advance and self.months_selected > 0:
-            from dateutil.relativedelta import relativedelta
             return self.date_of_joining + relativedelta(months=self.months_selected)
         return None
     
+    def get_membership_expiry_date(self):
+        """Membership expiry date (stored, see calculate_expiry_date)"""
+        return self.expiry_date
+    
     def is_expiring_soon(self):
         """Check if membership expires within 7 days"""
-        expiry_date = self.get_membership_expiry_date()
-        if expiry_date:
-            from django.utils import timezone
-            days_until_expiry = (expiry_date - timezone.now().date()).days
+        if self.expiry_date:
+            days_until_expiry = (self.expiry_date - timezone.now().date()).days
             return 0 <= days_until_expiry <= 7
         return False
     
     def days_until_expiry(self):
         """Get number of days until membership expires"""
-        expiry_date = self.get_membership_expiry_date()
-        if expiry_date:
-            from django.utils import timezone
-            return (expiry_date - timezone.now().date()).days
+        if self.expiry_date:
+            return (self.expiry_date - timezone.now().date()).days
         return None
     
     def save(self, *args, **kwargs):
         self.calculate_total_fee()
+        self.expiry_date = self.calculate_expiry_date()
         super().save(*args, **kwargs)
 
 
+class MembershipExpiryNotice(models.Model):
+    """Renewal notice sent for a membership expiry date (see send_expiry_notices)"""
+    membership = models.ForeignKey(UserMembership, on_delete=models.CASCADE, related_name='expiry_notices')
+    expiry_date = models.DateField(help_text="Expiry date the notice was sent for")
+    days_before = models.PositiveSmallIntegerField(help_text="Notice window the membership fell into, in days")
+    sent_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Membership Expiry Notice'
+        verbose_name_plural = 'Membership Expiry Notices'
+        ordering = ['-sent_at']
+        constraints = [
+            models.UniqueConstraint(fields=['membership', 'expiry_date', 'days_before'], name='expiry_notice_unique'),
+        ]
+    
+    def __str__(self):
+        return f"{self.membership} - {self.days_before} day notice for {self.expiry_date}"
+
+
 class L3Addon(models.Model):
     """Add-ons for L3 Elite Champion tier"""
     ADDON_CHOICES = [
@@ -148,17 +213,69 @@ class L3Addon(models.Model):
 
 class PaymentReceipt(models.Model):
     """Payment receipt for user memberships"""
+    STATUS_CHOICES = [
+        ('PENDING', 'Queued'),
+        ('PROCESSING', 'Generating'),
+        ('READY', 'Ready'),
+        ('FAILED', 'Failed'),
+    ]
+    
     membership = models.OneToOneField(UserMembership, on_delete=models.CASCADE, related_name='receipt')
     receipt_number = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
-    pdf_file = models.FileField(upload_to='receipts/', blank=True, null=True)
+    pdf_file = models.FileField(upload_to='receipts/', storage=receipt_storage, blank=True, null=True)
     generated_at = models.DateTimeField(auto_now_add=True)
     
+    # Background generation status (see memberships.tasks)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    last_error = models.TextField(blank=True, help_text="Error from the last failed generation attempt")
+    
+    # What the current PDF was built from (see memberships.utils.receipt_fingerprint)
+    fingerprint = models.CharField(max_length=64, blank=True, editable=False)
+    rendered_at = models.DateTimeField(null=True, blank=True, editable=False)
+    
     class Meta:
         verbose_name = 'Payment Receipt'
         verbose_name_plural = 'Payment Receipts'
     
     def __str__(self):
         return f"Receipt #{self.receipt_number} - {self.membership.user.full_name}"
+    
+    def is_current(self, fingerprint):
+        """Check the stored PDF exists and was rendered from these inputs"""
+        return (
+            self.fingerprint == fingerprint
+            and bool(self.pdf_file)
+            and self.pdf_file.storage.exists(self.pdf_file.name)
+        )
+    
+    def ensure_pdf(self, renderer=None, force=False):
+        """
+        Render the PDF if it is missing or its inputs have changed since it was built.
+        Returns the new PDF bytes if it was rendered, otherwise None.
+        """
+        membership = self.membership
+        membership.receipt = self
+        fingerprint = receipt_fingerprint(membership)
+        if not force and self.is_current(fingerprint):
+            return None
+        
+        PaymentReceipt.objects.filter(id=self.id).update(status='PROCESSING')
+        pdf = generate_membership_receipt(membership, renderer=renderer)
+        self.pdf_file = store_receipt_pdf(membership, pdf)
+        self.fingerprint = fingerprint
+        self.rendered_at = timezone.now()
+        self.status = 'READY'
+        self.last_error = ''
+        self.save(update_fields=['pdf_file', 'fingerprint', 'rendered_at', 'status', 'last_error'])
+        return pdf
+    
+    def get_pdf_bytes(self, renderer=None):
+        """Up-to-date PDF bytes, read back from storage only if no render was needed"""
+        pdf = self.ensure_pdf(renderer)
+        if pdf is None:
+            with self.pdf_file.open('rb') as f:
+                pdf = f.read()
+        return pdf
 
 
 class WorkoutPlan(models.Model):
@@ -185,6 +302,11 @@ class WorkoutPlan(models.Model):
         verbose_name_plural = 'Workout Plans'
         ordering = ['week_number', 'day_of_week']
         unique_together = ['membership', 'week_number', 'day_of_week']
+        indexes = [
+            # Current week's plans on the dashboards (only active plans are ever shown)
+            models.Index(fields=['membership', 'start_date', 'end_date'], condition=Q(is_active=True),
+                         name='workout_active_week_idx'),
+        ]
     
     def __str__(self):
         return f"{self.membership.user.full_name} - Week {self.week_number} - {self.get_day_of_week_display()}"
@@ -218,6 +340,115 @@ class Exercise(models.Model):
     
     def __str__(self):
         return f"{self.exercise_name} - {self.workout_plan}"
+    
+    def save(self, *args, **kwargs):
+        # The week rollup is updated by a post_save receiver inside this transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+
+
+class WorkoutTemplate(models.Model):
+    """Reusable week of exercises that admins assign to many L2 members at once"""
+    name = models.CharField(max_length=100, unique=True)
+    description = models.TextField(blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True,
+                                   related_name='workout_templates', limit_choices_to={'role': 'ADMIN'})
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Workout Template'
+        verbose_name_plural = 'Workout Templates'
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+    
+    def exercises_by_day(self):
+        """{day code: [Exercise field dicts]} in the shape taken by memberships.workouts"""
+        days = {}
+        for exercise in self.exercises.all():
+            days.setdefault(exercise.day_of_week, []).append({
+                'exercise_name': exercise.exercise_name,
+                'exercise_type': exercise.exercise_type,
+                'sets': exercise.sets,
+                'reps': exercise.reps,
+                'description': exercise.description,
+            })
+        return days
+
+
+class WorkoutTemplateExercise(models.Model):
+    """One exercise of a WorkoutTemplate day"""
+    template = models.ForeignKey(WorkoutTemplate, on_delete=models.CASCADE, related_name='exercises')
+    day_of_week = models.CharField(max_length=3, choices=WorkoutPlan.DAYS_OF_WEEK)
+    exercise_name = models.CharField(max_length=200)
+    exercise_type = models.CharField(max_length=20, choices=Exercise.EXERCISE_TYPES)
+    sets = models.PositiveIntegerField(default=1)
+    reps = models.PositiveIntegerField(default=1, help_text="Repetitions or duration in minutes")
+    description = models.TextField(blank=True, help_text="Exercise instructions")
+    order = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        verbose_name = 'Workout Template Exercise'
+        verbose_name_plural = 'Workout Template Exercises'
+        ordering = ['template', 'day_of_week', 'order']
+    
+    def __str__(self):
+        return f"{self.exercise_name} - {self.template} ({self.day_of_week})"
+
+
+class WorkoutWeekRollup(models.Model):
+    """
+    Exercise totals per (membership, week, day), kept in step with Exercise by
+    the receivers in memberships.signals and by the bulk paths in
+    memberships.workouts (rebuild with rebuild_workout_rollups).
+
+    There is one row per WorkoutPlan, which owns it so the row goes away with
+    the plan.
+    """
+    workout_plan = models.OneToOneField(WorkoutPlan, on_delete=models.CASCADE, primary_key=True,
+                                        related_name='rollup')
+    membership = models.ForeignKey(UserMembership, on_delete=models.CASCADE, related_name='workout_rollups')
+    week_number = models.PositiveIntegerField()
+    day_of_week = models.CharField(max_length=3, choices=WorkoutPlan.DAYS_OF_WEEK)
+    total_exercises = models.PositiveIntegerField(default=0)
+    completed_exercises = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Workout Week Rollup'
+        verbose_name_plural = 'Workout Week Rollups'
+        ordering = ['membership', 'week_number', 'day_of_week']
+        constraints = [
+            models.UniqueConstraint(fields=['membership', 'week_number', 'day_of_week'],
+                                    name='workout_rollup_unique_day'),
+        ]
+    
+    def __str__(self):
+        return f"{self.membership_id} - Week {self.week_number} {self.day_of_week}: {self.completed_exercises}/{self.total_exercises}"
+    
+    @classmethod
+    def for_plan(cls, plan):
+        """Unsaved, empty rollup for a workout plan"""
+        return cls(workout_plan=plan, membership_id=plan.membership_id,
+                   week_number=plan.week_number, day_of_week=plan.day_of_week)
+    
+    @classmethod
+    def apply(cls, workout_plan_id, total=0, completed=0):
+        """
+        Add the given deltas to a plan's totals with a single UPDATE, so
+        concurrent toggles never overwrite each other's counts. The row itself
+        is created with the plan.
+        """
+        cls.objects.filter(workout_plan_id=workout_plan_id).update(
+            total_exercises=F('total_exercises') + total,
+            completed_exercises=F('completed_exercises') + completed,
+            updated_at=timezone.now(),
+        )
 
 
 class ProteinIntake(models.Model):
@@ -260,6 +491,8 @@ class MedicalCheckup(models.Model):
     conducted_by = models.CharField(max_length=200, blank=True, help_text="Doctor/Medical professional name")
     updated_by_admin = models.ForeignKey('accounts.User', on_delete=models.SET_NULL, null=True, 
                                          related_name='checkup_updates', limit_choices_to={'role': 'ADMIN'})
+    reminder_sent_for = models.DateField(null=True, blank=True, editable=False,
+                                         help_text="Due date the last reminder was sent for (see send_checkup_reminders)")
     updated_at = models.DateTimeField(auto_now=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -267,6 +500,13 @@ class MedicalCheckup(models.Model):
         verbose_name = 'Medical Checkup'
         verbose_name_plural = 'Medical Checkups'
         ordering = ['-checkup_date']
+        indexes = [
+            # A member's checkups, newest first
+            models.Index(fields=['membership', '-checkup_date'], name='checkup_member_date_idx'),
+            # Range scans for the reminder job (memberships.checkups)
+            models.Index(fields=['status', 'checkup_date'], name='checkup_status_date_idx'),
+            models.Index(fields=['status', 'next_checkup_date'], name='checkup_status_next_idx'),
+        ]
     
     def __str__(self):
         return f"{self.membership.user.full_name} - {self.checkup_type} on {self.checkup_date}"
@@ -296,6 +536,164 @@ class TrainerRating(models.Model):
         verbose_name_plural = 'Trainer Ratings'
         ordering = ['-created_at']
         unique_together = ['user', 'trainer', 'membership']
+        indexes = [
+            # Keyset pagination of a trainer's reviews, newest first
+            models.Index(fields=['trainer', 'created_at', 'id'], name='rating_trainer_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.full_name} rated {self.trainer.full_name} - {self.rating} stars"
+    
+    def save(self, *args, **kwargs):
+        # The rating summary is updated by a post_save receiver inside this transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+
+
+class TrainerRatingSummary(models.Model):
+    """
+    Precomputed rating totals per trainer, kept in step with TrainerRating by
+    the receivers in memberships.signals (rebuild with rebuild_rating_summaries).
+
+    bayesian_score pulls trainers with few ratings towards RATING_PRIOR_MEAN,
+    weighted as RATING_PRIOR_WEIGHT ratings, so sorting by it does not favour
+    a single 5-star review.
+    """
+    trainer = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True,
+                                   related_name='rating_summary', limit_choices_to={'role': 'TRAINER'})
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    stars_1 = models.PositiveIntegerField(default=0)
+    stars_2 = models.PositiveIntegerField(default=0)
+    stars_3 = models.PositiveIntegerField(default=0)
+    stars_4 = models.PositiveIntegerField(default=0)
+    stars_5 = models.PositiveIntegerField(default=0)
+    bayesian_score = models.FloatField(default=0, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Trainer Rating Summary'
+        verbose_name_plural = 'Trainer Rating Summaries'
+    
+    def __str__(self):
+        return f"{self.trainer.full_name} - {self.average} ({self.rating_count} ratings)"
+    
+    @staticmethod
+    def prior():
+        """(prior mean, prior weight) used for the Bayesian score"""
+        return (
+            float(getattr(settings, 'RATING_PRIOR_MEAN', 3.0)),
+            float(getattr(settings, 'RATING_PRIOR_WEIGHT', 5)),
+        )
+    
+    @classmethod
+    def score(cls, rating_count, rating_sum):
+        """Bayesian-smoothed average for the given totals"""
+        mean, weight = cls.prior()
+        return (mean * weight + rating_sum) / (weight + rating_count)
+    
+    @classmethod
+    def apply(cls, trainer_id, stars, delta):
+        """
+        Add (delta=1) or remove (delta=-1) one rating of `stars` with a single
+        UPDATE, so concurrent ratings never overwrite each other's totals.
+        """
+        if delta > 0:
+            cls.objects.get_or_create(trainer_id=trainer_id, defaults={'bayesian_score': cls.score(0, 0)})
+        mean, weight = cls.prior()
+        cls.objects.filter(trainer_id=trainer_id).update(**{
+            'rating_count': F('rating_count') + delta,
+            'rating_sum': F('rating_sum') + delta * stars,
+            f'stars_{stars}': F(f'stars_{stars}') + delta,
+            # Right-hand F() values are the totals before this update
+            'bayesian_score': (Value(mean * weight) + F('rating_sum') + delta * stars) /
+                              (Value(weight) + F('rating_count') + delta),
+        })
+    
+    @property
+    def average(self):
+        return round(self.rating_sum / self.rating_count, 1) if self.rating_count else 0
+    
+    def distribution(self):
+        """Star counts with percentages, 5 stars first"""
+        rows = []
+        for stars in [5, 4, 3, 2, 1]:
+            count = getattr(self, f'stars_{stars}')
+            percentage = (count * 100 / self.rating_count) if self.rating_count else 0
+            rows.append({'stars': stars, 'count': count, 'percentage': round(percentage, 1)})
+        return rows
+
+
+class BackgroundJob(models.Model):
+    """Durable job queue entry processed by the run_workers management command"""
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('DONE', 'Done'),
+        ('FAILED', 'Failed'),
+    ]
+    
+    task = models.CharField(max_length=100, help_text="Registered task name, e.g. receipts.generate")
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now, help_text="Job is not picked up before this time")
+    locked_by = models.CharField(max_length=100, blank=True, help_text="Worker currently running the job")
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Background Job'
+        verbose_name_plural = 'Background Jobs'
+        ordering = ['run_after', 'id']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.task} #{self.id} ({self.status})"
+
+
+class EmailOutbox(models.Model):
+    """Outgoing email waiting to be delivered by the flush_outbox management command"""
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('SENDING', 'Sending'),
+        ('SENT', 'Sent'),
+        ('FAILED', 'Failed'),
+    ]
+    
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255)
+    to = models.JSONField(default=list, help_text="List of recipient addresses")
+    attachment_name = models.CharField(max_length=255, blank=True)
+    attachment_content = models.BinaryField(null=True, blank=True)
+    attachment_mimetype = models.CharField(max_length=100, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    next_attempt_at = models.DateTimeField(default=timezone.now, help_text="Message is not sent before this time")
+    locked_by = models.CharField(max_length=100, blank=True, help_text="Flush run currently sending the message")
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = 'Outbox Email'
+        verbose_name_plural = 'Email Outbox'
+        ordering = ['next_attempt_at', 'id']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_next_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
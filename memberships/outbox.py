@@ -0,0 +1,157 @@
+"""
+Email outbox.
+
+Views and background tasks call queue_email() instead of sending mail inline,
+so a slow or unavailable SMTP server never holds up a request. The
+flush_outbox management command delivers pending rows in batches, reusing one
+SMTP connection per batch, and reschedules failures with exponential backoff.
+"""
+import logging
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .jobs import retry_delay
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+
+def queue_email(subject, body, to, attachment=None, from_email=None):
+    """
+    Add an email to the outbox.
+
+    Args:
+        subject, body: Message subject and plain-text body
+        to: Recipient address or list of addresses
+        attachment: Optional (filename, content, mimetype) tuple, as for EmailMessage.attach()
+        from_email: Sender, defaults to settings.DEFAULT_FROM_EMAIL
+    """
+    return EmailOutbox.objects.create(**_outbox_fields(subject, body, to, attachment, from_email))
+
+
+def queue_emails(messages):
+    """Add several emails to the outbox in one INSERT. Takes dicts of queue_email() arguments."""
+    return EmailOutbox.objects.bulk_create([EmailOutbox(**_outbox_fields(**message)) for message in messages])
+
+
+def _outbox_fields(subject, body, to, attachment=None, from_email=None):
+    fields = {
+        'subject': subject,
+        'body': body,
+        'from_email': from_email or settings.DEFAULT_FROM_EMAIL,
+        'to': [to] if isinstance(to, str) else list(to),
+        'max_attempts': getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5),
+    }
+    if attachment:
+        fields['attachment_name'], fields['attachment_content'], fields['attachment_mimetype'] = attachment
+    return fields
+
+
+def _sendable(now):
+    """Pending messages that are due, plus messages left in SENDING by a crashed flush"""
+    stale_before = now - timedelta(seconds=getattr(settings, 'JOB_LOCK_TIMEOUT_SECONDS', 600))
+    return (
+        Q(status='PENDING', next_attempt_at__lte=now) |
+        Q(status='SENDING', locked_at__lt=stale_before)
+    )
+
+
+def claim_batch(batch_size):
+    """Claim up to batch_size due messages with one conditional UPDATE and return them"""
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    candidate_ids = list(
+        EmailOutbox.objects.filter(_sendable(now)).order_by('next_attempt_at', 'id').values_list('id', flat=True)[:batch_size]
+    )
+    if not candidate_ids:
+        return []
+    EmailOutbox.objects.filter(_sendable(now), id__in=candidate_ids).update(
+        status='SENDING', locked_by=token, locked_at=now
+    )
+    return list(EmailOutbox.objects.filter(locked_by=token, status='SENDING').order_by('id'))
+
+
+def _to_message(row, connection):
+    message = EmailMessage(
+        subject=row.subject,
+        body=row.body,
+        from_email=row.from_email,
+        to=row.to,
+        connection=connection,
+    )
+    if row.attachment_name and row.attachment_content is not None:
+        message.attach(row.attachment_name, bytes(row.attachment_content), row.attachment_mimetype or None)
+    return message
+
+
+def flush_batch(batch_size=None):
+    """
+    Deliver one batch of due messages over a single SMTP connection.
+
+    Returns per-batch metrics: claimed, sent, retried, failed and seconds, or
+    None when nothing was due.
+    """
+    rows = claim_batch(batch_size or getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 100))
+    if not rows:
+        return None
+
+    started = time.monotonic()
+    sent_ids = []
+    errors = {}
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        errors = {row.id: str(e) for row in rows}
+    else:
+        try:
+            for row in rows:
+                try:
+                    _to_message(row, connection).send(fail_silently=False)
+                    sent_ids.append(row.id)
+                except Exception as e:
+                    errors[row.id] = str(e)
+        finally:
+            connection.close()
+
+    now = timezone.now()
+    EmailOutbox.objects.filter(id__in=sent_ids).update(
+        status='SENT', sent_at=now, attempts=F('attempts') + 1, locked_by='', locked_at=None, last_error='',
+    )
+
+    retried = 0
+    failed_rows = []
+    for row in rows:
+        if row.id not in errors:
+            continue
+        row.attempts += 1
+        row.last_error = errors[row.id]
+        row.locked_by = ''
+        row.locked_at = None
+        if row.attempts < row.max_attempts:
+            row.status = 'PENDING'
+            row.next_attempt_at = now + retry_delay(row.attempts)
+            retried += 1
+        else:
+            row.status = 'FAILED'
+            logger.error('Email %s to %s failed permanently: %s', row.id, row.to, row.last_error)
+        failed_rows.append(row)
+    EmailOutbox.objects.bulk_update(
+        failed_rows, ['attempts', 'last_error', 'locked_by', 'locked_at', 'status', 'next_attempt_at']
+    )
+
+    metrics = {
+        'claimed': len(rows),
+        'sent': len(sent_ids),
+        'retried': retried,
+        'failed': len(failed_rows) - retried,
+        'seconds': time.monotonic() - started,
+    }
+    logger.info('Outbox batch: %(sent)s/%(claimed)s sent, %(retried)s to retry, %(failed)s failed in %(seconds).2fs', metrics)
+    return metrics
@@ -0,0 +1,140 @@
+from datetime import timedelta
+from itertools import groupby
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import ProteinIntake, UserMembership
+
+
+GRID_UPDATE_FIELDS = ['morning_intake', 'evening_intake', 'updated_by_admin', 'updated_at']
+
+PROTEIN_HISTORY_DAYS = 30
+
+
+def latest_protein_intakes(membership, limit=PROTEIN_HISTORY_DAYS):
+    """
+    The membership's latest `limit` protein intake days, newest first, read
+    backwards from the (membership, date) unique constraint.
+    """
+    return ProteinIntake.objects.filter(membership=membership).select_related(
+        'updated_by_admin'
+    ).order_by('-date')[:limit]
+
+
+def save_protein_grid(entries, updated_by, batch_size=500):
+    """
+    Upsert many days of protein intake flags in one transaction.
+
+    Rows are written with INSERT ... ON CONFLICT (membership, date) DO UPDATE,
+    so existing days are updated in place and their notes are left alone.
+
+    Args:
+        entries: Iterable of (membership_id, date, morning, evening); a later
+                 entry for the same membership and date wins
+        updated_by: Admin recorded as updated_by_admin
+
+    Returns the number of rows written.
+    """
+    rows = {}
+    for membership_id, date, morning, evening in entries:
+        rows[(membership_id, date)] = ProteinIntake(
+            membership_id=membership_id,
+            date=date,
+            morning_intake=morning,
+            evening_intake=evening,
+            updated_by_admin=updated_by,
+        )
+    with transaction.atomic():
+        ProteinIntake.objects.bulk_create(
+            rows.values(),
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['membership', 'date'],
+            update_fields=GRID_UPDATE_FIELDS,
+        )
+    return len(rows)
+
+
+def _rate(days, expected):
+    return round(days / expected * 100, 1) if expected else 0
+
+
+def _streaks(dates, last_day):
+    """(current, longest) run of consecutive dates; current must reach last_day or the day before"""
+    longest = run = 0
+    previous = None
+    for day in dates:
+        run = run + 1 if previous is not None and day - previous == timedelta(days=1) else 1
+        longest = max(longest, run)
+        previous = day
+    current = run if previous is not None and (last_day - previous).days <= 1 else 0
+    return current, longest
+
+
+def get_protein_adherence(start, end, membership_ids=None):
+    """
+    Morning/evening protein compliance for extra-protein members over [start, end].
+
+    Each member's window is clipped to their joining and expiry dates, and
+    never runs past today: days outside it are neither expected nor counted,
+    so a member who joined mid-range is rated on their own days only. Counts
+    come from one GROUP BY query;
+    streaks (consecutive days with both shakes) from a single ordered
+    (membership, date) extract walked once, so the cost is one pass over the
+    range's fully compliant days rather than a query per member.
+
+    Returns {'start', 'end', 'members': [...], 'cohort': {...}} where each
+    member has expected_days, days_logged, morning_days, evening_days,
+    full_days, their *_rate percentages, current_streak and longest_streak.
+    """
+    end = min(end, timezone.now().date())
+    memberships = UserMembership.objects.filter(extra_protein_needed=True)
+    if membership_ids is not None:
+        memberships = memberships.filter(id__in=membership_ids)
+    members = list(memberships.values(
+        'id', 'date_of_joining', 'expiry_date', full_name=F('user__full_name')
+    ).order_by('id'))
+
+    intakes = ProteinIntake.objects.filter(
+        Q(membership__expiry_date__isnull=True) | Q(date__lte=F('membership__expiry_date')),
+        membership__in=memberships, date__range=(start, end), date__gte=F('membership__date_of_joining'),
+    )
+    both = Q(morning_intake=True, evening_intake=True)
+    counts = {
+        row['membership_id']: row
+        for row in intakes.values('membership_id').annotate(
+            days_logged=Count('id'),
+            morning_days=Count('id', filter=Q(morning_intake=True)),
+            evening_days=Count('id', filter=Q(evening_intake=True)),
+            full_days=Count('id', filter=both),
+        ).order_by()
+    }
+    full_dates = {
+        membership_id: [day for _, day in rows]
+        for membership_id, rows in groupby(
+            intakes.filter(both).values_list('membership_id', 'date').order_by('membership_id', 'date'),
+            key=lambda row: row[0],
+        )
+    }
+
+    cohort = {'members': len(members), 'expected_days': 0, 'morning_days': 0, 'evening_days': 0, 'full_days': 0}
+    for member in members:
+        first_day = max(start, member.pop('date_of_joining'))
+        last_day = min(end, member.pop('expiry_date') or end)
+        member['expected_days'] = max((last_day - first_day).days + 1, 0)
+        row = counts.get(member['id'], {})
+        for field in ('days_logged', 'morning_days', 'evening_days', 'full_days'):
+            member[field] = row.get(field, 0)
+        for field in ('morning', 'evening', 'full'):
+            member[f'{field}_rate'] = _rate(member[f'{field}_days'], member['expected_days'])
+        member['current_streak'], member['longest_streak'] = _streaks(full_dates.get(member['id'], []), last_day)
+
+        for field in ('expected_days', 'morning_days', 'evening_days', 'full_days'):
+            cohort[field] += member[field]
+
+    for field in ('morning', 'evening', 'full'):
+        cohort[f'{field}_rate'] = _rate(cohort[f'{field}_days'], cohort['expected_days'])
+    cohort['members_on_streak'] = sum(1 for member in members if member['current_streak'])
+    return {'start': start, 'end': end, 'members': members, 'cohort': cohort}
@@ -0,0 +1,66 @@
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+
+from accounts.directory import invalidate_trainer_directory
+from accounts.models import User
+from .models import TrainerRating, TrainerRatingSummary
+
+
+# Keyset ordering of a trainer's ratings page, read in order from rating_trainer_created_idx
+RATINGS_ORDERING = ('-created_at', '-id')
+
+SUMMARY_FIELDS = ['rating_count', 'rating_sum', 'stars_1', 'stars_2', 'stars_3', 'stars_4', 'stars_5', 'bayesian_score']
+
+
+def ratings_for_trainer(trainer):
+    """A trainer's ratings with their authors, to be paged in RATINGS_ORDERING"""
+    return TrainerRating.objects.filter(trainer=trainer).select_related('user')
+
+
+def compute_rating_summaries(trainer_ids=None):
+    """
+    Fresh TrainerRatingSummary objects (unsaved) for every trainer, computed
+    from TrainerRating with a single GROUP BY query.
+    """
+    trainers = User.objects.filter(role='TRAINER')
+    if trainer_ids is not None:
+        trainers = trainers.filter(id__in=trainer_ids)
+
+    stars = {
+        f'stars_{n}': Count('received_ratings', filter=Q(received_ratings__rating=n))
+        for n in range(1, 6)
+    }
+    rows = trainers.values('id').annotate(
+        rating_count=Count('received_ratings'),
+        rating_sum=Coalesce(Sum('received_ratings__rating'), 0),
+        **stars,
+    ).order_by('id')
+
+    summaries = []
+    for row in rows:
+        trainer_id = row.pop('id')
+        summaries.append(TrainerRatingSummary(
+            trainer_id=trainer_id,
+            bayesian_score=TrainerRatingSummary.score(row['rating_count'], row['rating_sum']),
+            **row,
+        ))
+    return summaries
+
+
+def rebuild_rating_summaries(trainer_ids=None, batch_size=1000):
+    """
+    Recompute and upsert rating summaries in one transaction, then drop the
+    cached trainer directory that shows them. Returns the number written.
+    """
+    summaries = compute_rating_summaries(trainer_ids)
+    with transaction.atomic():
+        TrainerRatingSummary.objects.bulk_create(
+            summaries,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['trainer'],
+            update_fields=SUMMARY_FIELDS,
+        )
+        transaction.on_commit(invalidate_trainer_directory)
+    return len(summaries)
@@ -0,0 +1,122 @@
+"""
+Membership expiry notices.
+
+send_expiry_notices() sweeps the indexed expiry_date column for memberships
+expiring within the notice windows (MEMBERSHIP_EXPIRY_NOTICE_DAYS, e.g. 7, 3
+and 1 days). A membership gets one notice per window it enters: one expiring
+in five days gets the 7-day notice, and the 3-day one once it is three days
+out. Each notice is recorded in MembershipExpiryNotice in the same transaction
+that queues its email, so reruns on the same day send nothing.
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from accounts.pagination import keyset_paginate
+from .models import MembershipExpiryNotice, UserMembership
+from .outbox import queue_emails
+
+logger = logging.getLogger(__name__)
+
+
+# Each window is streamed in keyset order on the expiry_date index
+NOTICE_ORDERING = ('expiry_date', 'id')
+
+
+def notice_windows(days=None):
+    """
+    (days_before, first, last) bands for the notice windows, tightest first.
+
+    A membership expiring `d` days from today falls into the smallest window
+    with d <= days_before, so (7, 3, 1) gives 0-1, 2-3 and 4-7 days.
+    """
+    days = sorted(set(days if days is not None else getattr(settings, 'MEMBERSHIP_EXPIRY_NOTICE_DAYS', (7, 3, 1))))
+    return [(window, days[i - 1] + 1 if i else 0, window) for i, window in enumerate(days)]
+
+
+def due_notices(today, days_before, first, last):
+    """
+    Memberships (with their user) expiring `first` to `last` days from today
+    without a notice for this window yet, to be streamed in NOTICE_ORDERING.
+    """
+    sent = MembershipExpiryNotice.objects.filter(
+        membership=OuterRef('pk'), expiry_date=OuterRef('expiry_date'), days_before=days_before
+    )
+    return UserMembership.objects.expiring_between(
+        today + timedelta(days=first), today + timedelta(days=last)
+    ).exclude(payment_status='CANCELLED').filter(user__is_active=True).exclude(Exists(sent)).select_related('user')
+
+
+def _expiry_notice(membership, days_left):
+    user = membership.user
+    when = 'today' if days_left == 0 else f'in {days_left} day{"s" if days_left != 1 else ""}'
+    message = f"""
+Dear {user.full_name},
+
+Your HealthHub {membership.get_membership_tier_display()} membership expires {when}, on {membership.expiry_date.strftime('%A, %B %d, %Y')}.
+
+Renew at the front desk or contact us before then to keep your workout plans, trainer sessions and progress history uninterrupted.
+
+Registration ID: {membership.registration_id}
+
+Best regards,
+The HealthHub Team
+Where Fitness Meets Wellness
+"""
+    return {'subject': f'HealthHub - Your membership expires {when}', 'body': message, 'to': user.email}
+
+
+def send_expiry_notices(today=None, days=None, chunk_size=1000, dry_run=False):
+    """
+    Queue renewal notices for memberships entering an expiry window.
+
+    Each window is streamed in (expiry_date, id) keyset order, chunk_size
+    memberships at a time with their users joined. A chunk is locked, recorded
+    and its emails queued with one bulk insert each, all in one transaction;
+    flush_outbox then delivers them over shared SMTP connections.
+
+    Returns metrics: notices, per-window counts ({days_before: count}), seconds.
+    With dry_run nothing is written and notices counts what would be sent.
+    """
+    started = time.monotonic()
+    today = today or timezone.now().date()
+    metrics = {'notices': 0, 'windows': {}}
+
+    for days_before, first, last in notice_windows(days):
+        queryset = due_notices(today, days_before, first, last)
+        sent = 0
+        cursor = None
+        while True:
+            with transaction.atomic():
+                page = keyset_paginate(
+                    queryset.select_for_update(skip_locked=True, of=('self',)),
+                    NOTICE_ORDERING, cursor, chunk_size,
+                )
+                if not dry_run and page:
+                    MembershipExpiryNotice.objects.bulk_create([
+                        MembershipExpiryNotice(membership=membership, expiry_date=membership.expiry_date,
+                                               days_before=days_before)
+                        for membership in page
+                    ])
+                    queue_emails([
+                        _expiry_notice(membership, (membership.expiry_date - today).days) for membership in page
+                    ])
+            sent += len(page)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+
+        metrics['windows'][days_before] = sent
+        metrics['notices'] += sent
+
+    metrics['seconds'] = time.monotonic() - started
+    logger.info(
+        'Expiry notices: %s queued (%s) in %.2fs', metrics['notices'],
+        ', '.join(f'{count} at {window} days' for window, count in metrics['windows'].items()), metrics['seconds'],
+    )
+    return metrics
@@ -0,0 +1,291 @@
+"""
+Synthetic production-scale data for load testing (python manage.py seed_scale).
+
+Everything is written with bulk_create, members a batch at a time, so 100k
+members with their history take minutes rather than hours. bulk_create skips
+save() and signals, so what those would do is done here instead: fees and
+expiry dates are calculated before insert, workout rollups are written next to
+the exercises they count, and rating summaries are rebuilt at the end. It also
+stamps auto_now_add fields with the time of the insert, so registration and
+creation times are backdated afterwards with bulk_update.
+
+The whole dataset is written in one transaction, so a failed run leaves
+nothing behind and can simply be retried with the same prefix. The same seed
+and prefix always produce the same rows; dates are relative to today.
+"""
+import logging
+import random
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import AdminProfile, TrainerProfile, User
+from .models import (
+    Exercise, L3Addon, MedicalCheckup, PaymentReceipt, ProteinIntake, TrainerRating, UserMembership, WorkoutPlan,
+    WorkoutWeekRollup,
+)
+from .ratings import rebuild_rating_summaries
+
+logger = logging.getLogger(__name__)
+
+FIRST_NAMES = ['Aarav', 'Diya', 'Ishaan', 'Meera', 'Kabir', 'Ananya', 'Rohan', 'Saanvi', 'Vikram', 'Priya',
+               'Arjun', 'Kavya', 'Nikhil', 'Tara', 'Rahul', 'Zoya', 'Siddharth', 'Nisha', 'Aditya', 'Leela']
+LAST_NAMES = ['Sharma', 'Patel', 'Iyer', 'Khan', 'Reddy', 'Gupta', 'Nair', 'Das', 'Mehta', 'Joshi',
+              'Singh', 'Bose', 'Kapoor', 'Rao', 'Pillai', 'Verma']
+SPECIALIZATIONS = ['Fitness', 'Yoga', 'Strength', 'Cardio', 'Pilates', 'CrossFit', 'Martial Arts', 'Nutrition']
+MEDICAL_HISTORY = ['Asthma', 'Hypertension', 'Type 2 diabetes', 'Knee surgery (2021)', 'Lower back pain']
+CHECKUP_TYPES = ['General', 'Blood Test', 'ECG', 'Physiotherapy Review', 'Blood Pressure']
+REVIEWS = ['', '', 'Great sessions!', 'Very motivating.', 'Knows their stuff.', 'Could be more punctual.']
+EXERCISES = {
+    'CARDIO': ['Treadmill Run', 'Cycling', 'Rowing', 'Jump Rope'],
+    'STRENGTH': ['Squats', 'Bench Press', 'Deadlift', 'Lunges', 'Pull-ups'],
+    'FLEXIBILITY': ['Hamstring Stretch', 'Hip Openers'],
+    'HIIT': ['Burpees', 'Mountain Climbers', 'Tabata Sprints'],
+    'YOGA': ['Sun Salutation', 'Warrior Flow'],
+    'CORE': ['Plank', 'Russian Twists', 'Leg Raises'],
+}
+DAY_OFFSETS = {day: offset for offset, (day, label) in enumerate(WorkoutPlan.DAYS_OF_WEEK)}
+TIER_WEIGHTS = {'L1': 5, 'L2': 3, 'L3': 2}
+PAYMENT_WEIGHTS = {'PAID': 80, 'PENDING': 15, 'CANCELLED': 5}
+APPROVAL_WEIGHTS = {'APPROVED': 75, 'PENDING': 15, 'REJECTED': 10}
+
+
+def _uuid(rng):
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def _choice(rng, weights):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+class ScaleSeeder:
+    """
+    Generates one dataset. `prefix` namespaces usernames and emails so several
+    datasets can live in one database; seed() refuses to reuse a prefix. The
+    prefix is mixed into the random stream too, so datasets seeded alike still
+    get distinct registration ids and receipt numbers.
+    """
+
+    def __init__(self, seed=0, prefix='scale', weeks=4, batch_size=2000, password=None):
+        self.rng = random.Random(f'{seed}:{prefix}')
+        self.prefix = prefix
+        self.weeks = weeks
+        self.batch_size = batch_size
+        self.password = make_password(password) if password else make_password(None)
+        self.today = timezone.now().date()
+        self.now = timezone.now()
+        self.seconds_today = int((self.now - self.now.replace(hour=0, minute=0, second=0, microsecond=0)).total_seconds())
+        self.counts = {}
+
+    def _count(self, name, rows):
+        self.counts[name] = self.counts.get(name, 0) + len(rows)
+        return rows
+
+    def _backdate(self, model, rows, field, stamps):
+        """Overwrite an auto_now_add timestamp that bulk_create set to now"""
+        for row, stamp in zip(rows, stamps):
+            setattr(row, field, stamp)
+        model.objects.bulk_update(rows, [field], batch_size=self.batch_size)
+
+    def _create_users(self, users, name):
+        users = self._count(name, User.objects.bulk_create(users, batch_size=self.batch_size))
+        self._backdate(User, users, 'date_of_registration', [user.date_joined for user in users])
+        return users
+
+    def _user(self, username, role, days_ago, **fields):
+        rng = self.rng
+        return User(
+            username=f'{self.prefix}_{username}',
+            email=f'{self.prefix}_{username}@example.com',
+            password=self.password,
+            role=role,
+            full_name=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+            phone_number=f'+91{rng.randrange(7000000000, 9999999999)}',
+            # Any time of day `days_ago` days back, never later than now
+            date_joined=self.now - timedelta(days=days_ago, seconds=rng.randrange(0, self.seconds_today + 1)),
+            **fields,
+        )
+
+    def seed(self, admins, trainers, members):
+        """Create the whole dataset in one transaction and return row counts per model plus seconds"""
+        started = time.monotonic()
+        with transaction.atomic():
+            if User.objects.filter(username__startswith=f'{self.prefix}_').exists():
+                raise ValueError(f'Users with the prefix "{self.prefix}_" already exist; pick another prefix.')
+
+            self.admins = self.create_admins(admins)
+            self.approved_trainers = self.create_trainers(trainers)
+            for start in range(0, members, self.batch_size):
+                self.create_members(start, min(self.batch_size, members - start))
+                logger.info('Seeded %s of %s members', min(start + self.batch_size, members), members)
+
+            rebuild_rating_summaries()
+        self.counts['seconds'] = time.monotonic() - started
+        return self.counts
+
+    def create_admins(self, count):
+        users = self._create_users([
+            self._user(f'admin{i}', 'ADMIN', self.rng.randrange(365, 1000), is_staff=True) for i in range(count)
+        ], 'admins')
+        AdminProfile.objects.bulk_create([AdminProfile(user=user, qualification='MBA') for user in users])
+        return users
+
+    def create_trainers(self, count):
+        rng = self.rng
+        states = [_choice(rng, APPROVAL_WEIGHTS) for i in range(count)]
+        users = self._create_users([
+            self._user(f'trainer{i}', 'TRAINER', rng.randrange(30, 1000), is_active=state == 'APPROVED')
+            for i, state in enumerate(states)
+        ], 'trainers')
+
+        profiles = []
+        for user, state in zip(users, states):
+            reviewed = state != 'PENDING'
+            profiles.append(TrainerProfile(
+                user=user,
+                qualification=rng.choice(['BSc Sports Science', 'MSc Physiotherapy', 'Diploma in Fitness']),
+                specialization=rng.choice(SPECIALIZATIONS),
+                experience_years=rng.randrange(1, 20),
+                certification_details='ACE Certified Personal Trainer',
+                approval_status=state,
+                approved_by=rng.choice(self.admins) if reviewed and self.admins else None,
+                approval_date=self.now - timedelta(days=rng.randrange(1, 30)) if reviewed else None,
+                rejection_reason='Incomplete certification' if state == 'REJECTED' else '',
+            ))
+        TrainerProfile.objects.bulk_create(profiles, batch_size=self.batch_size)
+        return [user for user, state in zip(users, states) if state == 'APPROVED']
+
+    def create_members(self, start, count):
+        rng = self.rng
+        # Members register on the day they join
+        users = self._create_users([
+            self._user(f'member{i}', 'USER', rng.randrange(0, 400)) for i in range(start, start + count)
+        ], 'members')
+
+        memberships = []
+        for user in users:
+            tier = _choice(rng, TIER_WEIGHTS)
+            joined = user.date_joined.date()
+            in_advance = rng.random() < 0.7
+            membership = UserMembership(
+                user=user, membership_tier=tier, registration_id=_uuid(rng),
+                age=rng.randrange(16, 70), current_weight=Decimal(rng.randrange(450, 1100)) / 10,
+                date_of_joining=joined,
+                medical_history=rng.choice(MEDICAL_HISTORY) if rng.random() < 0.2 else '',
+                pay_monthly_in_advance=in_advance, months_selected=rng.randrange(1, 13) if in_advance else 0,
+                extra_protein_needed=tier == 'L2' and rng.random() < 0.5,
+                addon_fees=Decimal('1000') * rng.randrange(1, 5) if tier == 'L3' else Decimal('0'),
+            )
+            # What save() would have done
+            membership.calculate_total_fee()
+            membership.expiry_date = membership.calculate_expiry_date()
+
+            membership.payment_status = _choice(rng, PAYMENT_WEIGHTS)
+            if membership.payment_status != 'PENDING':
+                membership.payment_confirmed_by = rng.choice(self.admins) if self.admins else None
+                membership.payment_confirmed_date = self.now - timedelta(days=rng.randrange(0, 30))
+            memberships.append(membership)
+        self._count('memberships', UserMembership.objects.bulk_create(memberships))
+        self._backdate(UserMembership, memberships, 'created_at', [user.date_joined for user in users])
+
+        receipts = self._count('receipts', PaymentReceipt.objects.bulk_create([
+            PaymentReceipt(membership=membership, receipt_number=_uuid(rng)) for membership in memberships
+        ]))
+        self._backdate(PaymentReceipt, receipts, 'generated_at', [user.date_joined for user in users])
+        self.create_addons_and_ratings([m for m in memberships if m.membership_tier == 'L3'])
+        self.create_workouts([m for m in memberships if m.membership_tier == 'L2'])
+        self.create_protein_intakes([m for m in memberships if m.extra_protein_needed])
+        self.create_checkups([m for m in memberships if m.medical_history])
+
+    def create_addons_and_ratings(self, memberships):
+        rng = self.rng
+        addons, ratings, rated_at = [], [], []
+        for membership in memberships:
+            addon_types = rng.sample([choice for choice, label in L3Addon.ADDON_CHOICES], int(membership.addon_fees / 1000))
+            for addon_type in addon_types:
+                trainer = rng.choice(self.approved_trainers) if addon_type == 'TRAINER' and self.approved_trainers else None
+                addons.append(L3Addon(membership=membership, addon_type=addon_type, assigned_trainer=trainer))
+                if trainer and rng.random() < 0.6:
+                    ratings.append(TrainerRating(
+                        user_id=membership.user_id, trainer=trainer, membership=membership,
+                        rating=rng.choices([1, 2, 3, 4, 5], weights=[1, 2, 5, 12, 10])[0], review=rng.choice(REVIEWS),
+                    ))
+                    # Some time after joining
+                    member_for = int((self.now - membership.user.date_joined).total_seconds())
+                    rated_at.append(self.now - timedelta(seconds=rng.randrange(0, member_for + 1)))
+        self._count('addons', L3Addon.objects.bulk_create(addons))
+        self._count('ratings', TrainerRating.objects.bulk_create(ratings))
+        self._backdate(TrainerRating, ratings, 'created_at', rated_at)
+
+    def create_workouts(self, memberships):
+        """`weeks` weeks of plans up to the current one, for the weeks each member has been with us"""
+        rng = self.rng
+        this_week = self.today - timedelta(days=self.today.weekday())
+        plans = []
+        for membership in memberships:
+            first_week = membership.date_of_joining - timedelta(days=membership.date_of_joining.weekday())
+            for offset in range(self.weeks):
+                start_date = this_week - timedelta(weeks=offset)
+                if start_date < first_week:
+                    break
+                week_number = (start_date - first_week).days // 7 + 1
+                plans += [
+                    WorkoutPlan(membership_id=membership.id, week_number=week_number, day_of_week=day,
+                                start_date=start_date, end_date=start_date + timedelta(days=6))
+                    for day, label in WorkoutPlan.DAYS_OF_WEEK
+                ]
+        self._count('workout_plans', WorkoutPlan.objects.bulk_create(plans, batch_size=self.batch_size))
+
+        exercises, rollups = [], []
+        for plan in plans:
+            days_ago = (self.today - plan.start_date).days - DAY_OFFSETS[plan.day_of_week]
+            done_rate = 0.75 if days_ago > 0 else 0
+            rollup = WorkoutWeekRollup.for_plan(plan)
+            for order in range(rng.randrange(2, 6)):
+                exercise_type = rng.choice(list(EXERCISES))
+                completed = rng.random() < done_rate
+                exercises.append(Exercise(
+                    workout_plan_id=plan.id, exercise_name=rng.choice(EXERCISES[exercise_type]), exercise_type=exercise_type,
+                    sets=rng.randrange(1, 5), reps=rng.choice([8, 10, 12, 15, 20, 30]), order=order,
+                    is_completed=completed, completed_at=self.now - timedelta(days=days_ago) if completed else None,
+                ))
+                rollup.total_exercises += 1
+                rollup.completed_exercises += completed
+            rollups.append(rollup)
+        self._count('exercises', Exercise.objects.bulk_create(exercises, batch_size=self.batch_size))
+        WorkoutWeekRollup.objects.bulk_create(rollups, batch_size=self.batch_size)
+
+    def create_protein_intakes(self, memberships):
+        rng = self.rng
+        intakes = [
+            ProteinIntake(
+                membership_id=membership.id, date=self.today - timedelta(days=days_ago),
+                morning_intake=rng.random() < 0.85, evening_intake=rng.random() < 0.7,
+                updated_by_admin_id=rng.choice(self.admins).id if self.admins else None,
+            )
+            for membership in memberships
+            for days_ago in range(min(self.weeks * 7, (self.today - membership.date_of_joining).days + 1))
+        ]
+        self._count('protein_intakes', ProteinIntake.objects.bulk_create(intakes, batch_size=self.batch_size))
+
+    def create_checkups(self, memberships):
+        rng = self.rng
+        checkups = []
+        for membership in memberships:
+            for i in range(rng.randrange(1, 4)):
+                days = rng.randrange(-180, 30)
+                completed = days < 0
+                checkups.append(MedicalCheckup(
+                    membership=membership, checkup_date=self.today + timedelta(days=days),
+                    checkup_type=rng.choice(CHECKUP_TYPES), status='COMPLETED' if completed else 'SCHEDULED',
+                    findings='Within normal limits' if completed else '',
+                    next_checkup_date=self.today + timedelta(days=days + 90) if completed else None,
+                    conducted_by='Dr. ' + rng.choice(LAST_NAMES) if completed else '',
+                    updated_by_admin=rng.choice(self.admins) if self.admins else None,
+                ))
+        self._count('checkups', MedicalCheckup.objects.bulk_create(checkups, batch_size=self.batch_size))
@@ -0,0 +1,91 @@
+import threading
+from contextlib import contextmanager
+
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .models import Exercise, TrainerRating, TrainerRatingSummary, WorkoutPlan, WorkoutWeekRollup
+
+_rollups = threading.local()
+
+
+@contextmanager
+def rollup_deltas_suppressed():
+    """
+    Skip the per-exercise rollup receivers for writes made inside the block,
+    for callers that rebuild the affected rollups afterwards.
+    """
+    previous = getattr(_rollups, 'suppressed', False)
+    _rollups.suppressed = True
+    try:
+        yield
+    finally:
+        _rollups.suppressed = previous
+
+
+@receiver(post_init, sender=TrainerRating)
+def remember_rating(sender, instance, **kwargs):
+    """Keep the loaded (trainer, stars) so an edit can move the rating between summary buckets"""
+    instance._summary_key = (instance.__dict__.get('trainer_id'), instance.__dict__.get('rating'))
+
+
+@receiver(post_save, sender=TrainerRating)
+def rating_saved(sender, instance, created, **kwargs):
+    new_key = (instance.trainer_id, instance.rating)
+    old_key = None if created else instance._summary_key
+    if old_key != new_key:
+        if old_key and None not in old_key:
+            TrainerRatingSummary.apply(*old_key, delta=-1)
+        TrainerRatingSummary.apply(*new_key, delta=1)
+    instance._summary_key = new_key
+
+
+@receiver(post_delete, sender=TrainerRating)
+def rating_deleted(sender, instance, **kwargs):
+    TrainerRatingSummary.apply(instance.trainer_id, instance.rating, delta=-1)
+
+
+@receiver(post_save, sender=WorkoutPlan)
+def workout_plan_saved(sender, instance, created, **kwargs):
+    if created:
+        WorkoutWeekRollup.for_plan(instance).save(force_insert=True)
+    else:
+        WorkoutWeekRollup.objects.filter(workout_plan=instance).update(
+            membership_id=instance.membership_id, week_number=instance.week_number, day_of_week=instance.day_of_week,
+        )
+
+
+@receiver(post_init, sender=Exercise)
+def remember_exercise(sender, instance, **kwargs):
+    """Keep the loaded (plan, completed) so an edit only moves the counts that changed"""
+    instance._rollup_key = (instance.__dict__.get('workout_plan_id'), instance.__dict__.get('is_completed'))
+
+
+@receiver(post_save, sender=Exercise)
+def exercise_saved(sender, instance, created, **kwargs):
+    plan_id, completed = instance.workout_plan_id, bool(instance.is_completed)
+    old_plan_id, old_completed = (None, None) if created else instance._rollup_key
+    if getattr(_rollups, 'suppressed', False):
+        pass
+    elif created:
+        WorkoutWeekRollup.apply(plan_id, total=1, completed=int(completed))
+    elif old_plan_id != plan_id:
+        WorkoutWeekRollup.apply(old_plan_id, total=-1, completed=-int(bool(old_completed)))
+        WorkoutWeekRollup.apply(plan_id, total=1, completed=int(completed))
+    elif bool(old_completed) != completed:
+        WorkoutWeekRollup.apply(plan_id, completed=1 if completed else -1)
+    instance._rollup_key = (plan_id, completed)
+
+
+def _deleted_directly(origin, model):
+    """Whether a delete started from `model` rows themselves rather than cascading from a parent"""
+    return isinstance(origin, model) or (isinstance(origin, QuerySet) and origin.model is model)
+
+
+@receiver(post_delete, sender=Exercise)
+def exercise_deleted(sender, instance, origin=None, **kwargs):
+    # A cascade comes from deleting the plan (or its membership), whose rollup is deleted with it
+    if getattr(_rollups, 'suppressed', False) or not _deleted_directly(origin, Exercise):
+        return
+    WorkoutWeekRollup.apply(instance.workout_plan_id, total=-1, completed=-int(bool(instance.is_completed)))
@@ -0,0 +1,58 @@
+"""
+Private file storage for receipt PDFs.
+
+Receipts live under RECEIPT_ROOT, outside MEDIA_ROOT, so the media URL never
+serves them: the only way to fetch one is download_receipt, which checks that
+the requester owns the membership or is an admin.
+
+A receipt is re-rendered under the same name. Saving writes a temporary file
+next to it and swaps it in with os.replace, so readers always see either the
+old or the new complete PDF, and concurrent renders never leave renamed
+copies behind.
+"""
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ReceiptStorage(FileSystemStorage):
+    """FileSystemStorage rooted at RECEIPT_ROOT, with no public URL"""
+
+    @property
+    def base_location(self):
+        return settings.RECEIPT_ROOT
+
+    @property
+    def location(self):
+        return os.path.abspath(self.base_location)
+
+    def get_available_name(self, name, max_length=None):
+        # Saving replaces an existing receipt rather than picking a free name
+        return name
+
+    def _save(self, name, content):
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in content.chunks():
+                    f.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(tmp_path, self.file_permissions_mode)
+            os.replace(tmp_path, full_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return str(name).replace('\\', '/')
+
+    def url(self, name):
+        raise ValueError('Receipts have no public URL; serve them through download_receipt.')
+
+
+receipt_storage = ReceiptStorage()
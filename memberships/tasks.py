@@ -0,0 +1,45 @@
+"""Background tasks run by the run_workers management command"""
+from .emails import send_membership_email
+from .jobs import RENDER_SLOTS, task
+from .models import PaymentReceipt, UserMembership
+
+
+def _receipt_failed(payload, error):
+    PaymentReceipt.objects.filter(id=payload['receipt_id']).update(status='FAILED', last_error=str(error))
+
+
+@task('receipts.generate', on_give_up=_receipt_failed)
+def generate_receipt(payload):
+    """
+    Render the PDF receipt for a membership if it is stale and queue the
+    confirmation email with the rendered bytes attached.
+    """
+    receipt = PaymentReceipt.objects.get(id=payload['receipt_id'])
+    membership = UserMembership.objects.select_related('user').prefetch_related(
+        'l3_addons__assigned_trainer__trainer_profile'
+    ).get(id=receipt.membership_id)
+    receipt.membership = membership
+
+    try:
+        with RENDER_SLOTS:
+            pdf = receipt.get_pdf_bytes()
+    except Exception as e:
+        # Back to the queue; _receipt_failed marks it FAILED after the last attempt
+        PaymentReceipt.objects.filter(id=receipt.id).update(status='PENDING', last_error=str(e))
+        raise
+
+    if payload.get('send_email', True):
+        send_membership_email(membership.user, membership, pdf)
+
+
+@task('emails.membership_confirmation')
+def send_membership_confirmation(payload):
+    """Queue the membership confirmation email with the stored receipt attached"""
+    receipt = PaymentReceipt.objects.select_related('membership__user').prefetch_related(
+        'membership__l3_addons__assigned_trainer__trainer_profile'
+    ).get(membership_id=payload['membership_id'])
+    membership = receipt.membership
+
+    with RENDER_SLOTS:
+        pdf = receipt.get_pdf_bytes()
+    send_membership_email(membership.user, membership, pdf)
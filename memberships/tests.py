@@ -1,3 +1,815 @@
-from django.test import TestCase
+import importlib
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from accounts import urls as accounts_urls
+from accounts.dashboard import dashboard_memberships, dashboard_users
+from accounts.directory import DIRECTORY_CACHE_KEY, approved_trainer_profiles, get_trainer_directory_json
+from accounts.models import AdminProfile, TrainerProfile, User
+from accounts.pagination import keyset_query
+from accounts.views import DASHBOARD_PAGE_SIZE, MEMBER_PICKER_PAGE_SIZE
+from . import urls as memberships_urls
+from .checkups import due_checkups, latest_checkups
+from .jobs import TASKS, claim_job, enqueue, run_job
+from .protein import get_protein_adherence, latest_protein_intakes
+from .ratings import RATINGS_ORDERING, SUMMARY_FIELDS, compute_rating_summaries, ratings_for_trainer
+from .models import (
+    BackgroundJob, Exercise, L3Addon, MedicalCheckup, PaymentReceipt, ProteinIntake, TrainerRating, TrainerRatingSummary, UserMembership,
+    WorkoutPlan, WorkoutTemplate, WorkoutTemplateExercise, WorkoutWeekRollup
+)
+from .renewals import NOTICE_ORDERING, due_notices
+from .views import REVIEWS_PAGE_SIZE
+from .workouts import compute_workout_rollups, current_week_plans, save_week_plan
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+class QueryPlanTests(TestCase):
+    """
+    The hot queries behind the dashboards and daily jobs must be answered from
+    an index. Each test runs EXPLAIN QUERY PLAN on the output of the same builder
+    function the view or job calls (through keyset_query for paged lists) and
+    fails if any table is read with a full scan, if the expected index is not
+    used, or (for keyset pages) if the rows have to be sorted first.
+    """
+
+    def assertIndexed(self, queryset, index, ordered=False):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = [row[-1] for row in cursor.fetchall()]
+
+        scans = [step for step in plan if step.startswith('SCAN ') and step != 'SCAN CONSTANT ROW']
+        self.assertEqual(scans, [], f'Full scan in query plan: {plan}')
+        self.assertTrue(any(f'INDEX {index} ' in step for step in plan), f'{index} not used: {plan}')
+        if ordered:
+            self.assertNotIn('USE TEMP B-TREE FOR ORDER BY', plan, f'Rows are sorted, not read in index order: {plan}')
+
+    def test_users_by_role(self):
+        self.assertIndexed(User.objects.filter(role='ADMIN'), 'user_role_registered_idx')
+        for role in ('USER', 'TRAINER', 'ADMIN'):
+            with self.subTest(role=role):
+                users, ordering = dashboard_users(role)
+                self.assertIndexed(keyset_query(users, ordering, page_size=DASHBOARD_PAGE_SIZE),
+                                   'user_role_registered_idx', ordered=True)
+
+    def test_users_by_payment_status(self):
+        users, ordering = dashboard_users('USER', payment_status='PENDING')
+        self.assertIndexed(keyset_query(users, ordering, page_size=DASHBOARD_PAGE_SIZE),
+                           'user_role_registered_idx', ordered=True)
+
+    def test_trainers_by_approval_status(self):
+        pending, ordering = dashboard_users('PENDING')
+        self.assertIndexed(keyset_query(pending, ordering, page_size=DASHBOARD_PAGE_SIZE),
+                           'trainer_approval_status_idx', ordered=True)
+        self.assertIndexed(approved_trainer_profiles(), 'trainer_approval_status_idx')
+
+    def test_memberships_by_tier_and_payment_status(self):
+        memberships, ordering = dashboard_memberships('L2')
+        self.assertIndexed(keyset_query(memberships, ordering, page_size=DASHBOARD_PAGE_SIZE),
+                           'membership_tier_created_idx', ordered=True)
+        memberships, ordering = dashboard_memberships('L2', payment_status='PAID')
+        self.assertIndexed(keyset_query(memberships, ordering, page_size=DASHBOARD_PAGE_SIZE),
+                           'membership_tier_payment_idx', ordered=True)
+
+    def test_current_workout_week(self):
+        self.assertIndexed(current_week_plans(1), 'workout_active_week_idx')
+
+    def test_trainer_ratings_page(self):
+        ratings = keyset_query(ratings_for_trainer(1), RATINGS_ORDERING, page_size=REVIEWS_PAGE_SIZE)
+        self.assertIndexed(ratings, 'rating_trainer_created_idx', ordered=True)
+
+    def test_latest_protein_intakes(self):
+        # Served by the (membership, date) unique constraint read backwards
+        self.assertIndexed(latest_protein_intakes(1), 'memberships_proteinintake_membership_id_date_0d1702e4_uniq',
+                           ordered=True)
+
+    def test_latest_medical_checkups(self):
+        self.assertIndexed(latest_checkups(1, limit=10), 'checkup_member_date_idx', ordered=True)
+
+    def test_checkup_reminder_scans(self):
+        today = timezone.now().date()
+        scheduled, follow_ups = [queryset for kind, field, queryset in due_checkups(today, today + timedelta(days=3))]
+        self.assertIndexed(scheduled, 'checkup_status_date_idx')
+        self.assertIndexed(follow_ups, 'checkup_status_next_idx')
+
+    def test_expiry_notice_scan(self):
+        today = timezone.now().date()
+        memberships = keyset_query(due_notices(today, 7, 4, 7), NOTICE_ORDERING, page_size=1000)
+        self.assertIndexed(memberships, 'memberships_usermembership_expiry_date_b4d3f8a3', ordered=True)
+
+
+# Most queries each request may run; every view must also cost the same at N and 10 x N rows.
+# Work deferred to transaction.on_commit (e.g. clearing the trainer directory cache) is not counted.
+QUERY_BUDGETS = {
+    'landing_page': 0,
+    'home': 1,
+    'register_admin': 1,
+    'register_trainer': 0,
+    'register_user': 1,
+    'login': 0,
+    'logout': 4,
+    'fee_calculator': 0,
+    'approved_trainers_list': 2,
+    'approved_trainers_list_json': 8,  # Cache miss: the two directory queries plus the database cache's get and set
+    'membership_success': 2,
+    'admin_dashboard': 5,
+    'admin_dashboard_trainers': 5,
+    'admin_dashboard_pending': 5,
+    'admin_dashboard_filtered': 5,
+    'admin_user_modal': 3,
+    'admin_membership_modal': 5,
+    'admin_payment_modal': 3,
+    'admin_trainer_review_modal': 3,
+    'admin_edit_user': 6,
+    'approve_trainer': 7,
+    'reject_trainer': 7,
+    'bulk_review_trainers': 8,
+    'confirm_payment': 5,
+    'cancel_payment': 5,
+    'admin_manage_user_data': 8,
+    'admin_update_protein_intake': 7,
+    'protein_grid': 7,
+    'save_protein_grid': 6,
+    'protein_adherence_admin': 5,
+    'protein_adherence_member': 6,
+    'admin_create_workout_plan': 4,
+    'admin_create_workout_plan_post': 14,
+    'admin_add_medical_checkup': 4,
+    'admin_add_medical_checkup_post': 5,
+    'workout_templates': 3,
+    'workout_templates_post': 7,
+    'new_workout_template': 2,
+    'assign_workout_template': 6,
+    'assign_workout_template_post': 12,
+    'admin_workout_progress_chart': 5,
+    'trainer_dashboard': 5,
+    'trainer_ratings': 5,
+    'trainer_ratings_json': 5,
+    'user_dashboard_l1': 3,
+    'user_dashboard_l2': 10,
+    'user_dashboard_l3': 7,
+    'download_receipt': 6,
+    'toggle_exercise_completion': 12,
+    'update_exercise_completion': 11,
+    'workout_progress_chart': 4,
+    'workout_progress_chart_json': 4,
+    'rate_trainer': 6,
+    'rate_trainer_post': 14,
+}
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix='healthhub-tests-'),
+                   RECEIPT_ROOT=tempfile.mkdtemp(prefix='healthhub-tests-receipts-'))
+class QueryBudgetTests(TestCase):
+    """
+    Every URL in accounts/urls.py and memberships/urls.py is requested as the
+    role that uses it, once with N rows of everything seeded and again with
+    10 x N. The number of queries must not change (no N+1 patterns) and must
+    stay within the view's entry in QUERY_BUDGETS.
+
+    The rows that grow are the ones each page lists: members of every tier,
+    approved and pending trainers, add-ons and ratings of the same trainer,
+    workout weeks, protein intakes and checkups of the same member, and
+    workout templates. Each request runs in a savepoint that is rolled back,
+    so POSTs see the same data in both rounds.
+    """
+    N = 3
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        shutil.rmtree(settings.RECEIPT_ROOT, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = timezone.now().date()
+        cls.admin = cls.create_user('admin', 'ADMIN')
+        AdminProfile.objects.create(user=cls.admin, qualification='MBA')
+        cls.trainer = cls.create_trainer('trainer', 'APPROVED')
+        cls.pending = cls.create_trainer('pending', 'PENDING').trainer_profile
+        cls.l1 = cls.create_member('l1', 'L1')
+        cls.l2 = cls.create_member('l2', 'L2')
+        cls.l3 = cls.create_member('l3', 'L3')
+        cls.template = cls.create_template('template')
+        cls.exercise = cls.add_workout_week(cls.l2.membership, 1).exercises.first()
+        cls.seeded = 0
+
+    @classmethod
+    def create_user(cls, username, role, **fields):
+        return User.objects.create(
+            username=username, email=f'{username}@example.com', full_name=username.title(), role=role,
+            phone_number='+919876543210', **fields
+        )
+
+    @classmethod
+    def create_trainer(cls, username, approval_status):
+        user = cls.create_user(username, 'TRAINER', is_active=approval_status == 'APPROVED')
+        TrainerProfile.objects.create(
+            user=user, qualification='BSc', specialization='Strength', experience_years=3,
+            certification_details='ACE', approval_status=approval_status,
+            approved_by=cls.admin if approval_status == 'APPROVED' else None,
+        )
+        return user
+
+    @classmethod
+    def create_member(cls, username, tier):
+        user = cls.create_user(username, 'USER')
+        membership = UserMembership.objects.create(
+            user=user, membership_tier=tier, age=30, current_weight=Decimal('70'), date_of_joining=cls.today,
+            pay_monthly_in_advance=True, months_selected=3, extra_protein_needed=tier == 'L2',
+            medical_history='Asthma' if tier == 'L2' else '',
+        )
+        PaymentReceipt.objects.create(membership=membership)
+        if tier == 'L3':
+            L3Addon.objects.create(membership=membership, addon_type='TRAINER', assigned_trainer=cls.trainer)
+            L3Addon.objects.create(membership=membership, addon_type='ZUMBA')
+            TrainerRating.objects.create(user=user, trainer=cls.trainer, membership=membership, rating=4, review='Good')
+        return user
+
+    @classmethod
+    def create_template(cls, name):
+        template = WorkoutTemplate.objects.create(name=name, created_by=cls.admin)
+        WorkoutTemplateExercise.objects.bulk_create([
+            WorkoutTemplateExercise(template=template, day_of_week=day, exercise_name='Squat', exercise_type='STRENGTH')
+            for day, label in WorkoutPlan.DAYS_OF_WEEK
+        ])
+        return template
+
+    @classmethod
+    def add_workout_week(cls, membership, week_number):
+        start_date = cls.today - timedelta(weeks=week_number - 1)
+        save_week_plan(membership, week_number, start_date, {
+            day: [{'exercise_name': 'Run', 'exercise_type': 'CARDIO', 'sets': 1, 'reps': 20},
+                  {'exercise_name': 'Plank', 'exercise_type': 'CORE', 'sets': 3, 'reps': 1}]
+            for day, label in WorkoutPlan.DAYS_OF_WEEK
+        })
+        return WorkoutPlan.objects.get(membership=membership, week_number=week_number, day_of_week='MON')
+
+    def seed(self, count):
+        """Add `count` more of every kind of row the pages list"""
+        l2 = self.l2.membership
+        for i in range(self.seeded, self.seeded + count):
+            self.create_trainer(f'trainer{i}', 'APPROVED')
+            self.create_trainer(f'pending{i}', 'PENDING')
+            self.create_member(f'l1_{i}', 'L1')
+            member = self.create_member(f'l2_{i}', 'L2')
+            self.add_workout_week(member.membership, 1)
+            self.create_member(f'l3_{i}', 'L3')
+            self.create_template(f'template{i}')
+
+            self.add_workout_week(l2, i + 2)
+            day = self.today - timedelta(days=i)
+            ProteinIntake.objects.create(membership=l2, date=day, morning_intake=True, updated_by_admin=self.admin)
+            ProteinIntake.objects.create(membership=member.membership, date=day, evening_intake=True)
+            MedicalCheckup.objects.create(membership=l2, checkup_date=day, checkup_type='General', status='COMPLETED',
+                                          next_checkup_date=self.today + timedelta(days=30), updated_by_admin=self.admin)
+        self.seeded += count
+
+    def cases(self):
+        """(name, role, method, url, data) for every route"""
+        l1, l2, l3, pending = self.l1, self.l2, self.l3, self.pending
+        receipt = l1.membership.receipt.receipt_number
+        week = {'week_number': 1, 'start_date': self.today.isoformat(), 'MON_exercise_count': 1,
+                'MON_exercise_0_name': 'Row', 'MON_exercise_0_type': 'CARDIO', 'MON_exercise_0_sets': 1,
+                'MON_exercise_0_reps': 10}
+        return [
+            ('landing_page', None, 'get', reverse('landing_page'), None),
+            ('home', None, 'get', reverse('home'), None),
+            ('register_admin', None, 'get', reverse('register_admin'), None),
+            ('register_trainer', None, 'get', reverse('register_trainer'), None),
+            ('register_user', None, 'get', reverse('register_user'), None),
+            ('login', None, 'get', reverse('login'), None),
+            ('logout', 'l1', 'get', reverse('logout'), None),
+            ('fee_calculator', None, 'get', reverse('fee_calculator') + '?tier=L2&months=6&pay_advance=true', None),
+            ('approved_trainers_list', None, 'get', reverse('approved_trainers_list'), None),
+            ('approved_trainers_list_json', None, 'get', reverse('approved_trainers_list') + '?format=json', None),
+            ('membership_success', None, 'get', reverse('membership_success', args=[l1.membership.id]), None),
+
+            ('admin_dashboard', 'admin', 'get', reverse('admin_dashboard') + '?tier=L3', None),
+            ('admin_dashboard_trainers', 'admin', 'get', reverse('admin_dashboard') + '?role=TRAINER', None),
+            ('admin_dashboard_pending', 'admin', 'get', reverse('admin_dashboard') + '?role=PENDING', None),
+            ('admin_dashboard_filtered', 'admin', 'get',
+             reverse('admin_dashboard') + '?tier=L2&payment_status=PENDING&expiring=1&q=l', None),
+            ('admin_user_modal', 'admin', 'get', reverse('admin_user_modal', args=[self.trainer.id]), None),
+            ('admin_membership_modal', 'admin', 'get', reverse('admin_membership_modal', args=[l3.membership.id]), None),
+            ('admin_payment_modal', 'admin', 'get', reverse('admin_payment_modal', args=[l1.id, 'confirm']), None),
+            ('admin_trainer_review_modal', 'admin', 'get',
+             reverse('admin_trainer_review_modal', args=[pending.id]), None),
+            ('admin_edit_user', 'admin', 'post', reverse('admin_edit_user', args=[self.trainer.id]), {
+                'full_name': 'Trainer', 'email': 'trainer@example.com', 'phone_number': '+919876543210',
+                'specialization': 'Yoga', 'experience_years': 4, 'qualification': 'MSc', 'certification_details': 'ACE',
+            }),
+            ('approve_trainer', 'admin', 'post', reverse('approve_trainer', args=[pending.id]), {}),
+            ('reject_trainer', 'admin', 'post', reverse('reject_trainer', args=[pending.id]), {'rejection_reason': 'No'}),
+            ('bulk_review_trainers', 'admin', 'post', reverse('bulk_review_trainers'),
+             {'action': 'approve', 'trainer_ids': [pending.id]}),
+            ('confirm_payment', 'admin', 'post', reverse('confirm_payment', args=[l1.id]), {'payment_notes': 'Cash'}),
+            ('cancel_payment', 'admin', 'post', reverse('cancel_payment', args=[l1.id]), {'cancellation_reason': 'No'}),
+            ('admin_manage_user_data', 'admin', 'get', reverse('admin_manage_user_data', args=[l2.id]), None),
+            ('admin_update_protein_intake', 'admin', 'post', reverse('admin_update_protein_intake'), {
+                'membership_id': l2.membership.id, 'date': self.today.isoformat(), 'morning': 'true',
+            }),
+            ('protein_grid', 'admin', 'get', reverse('protein_grid'), None),
+            ('save_protein_grid', 'admin', 'json', reverse('save_protein_grid'), {'entries': [
+                {'membership_id': l2.membership.id, 'date': self.today.isoformat(), 'morning': True, 'evening': True},
+            ]}),
+            ('protein_adherence_admin', 'admin', 'get', reverse('protein_adherence'), None),
+            ('protein_adherence_member', 'l2', 'get', reverse('protein_adherence'), None),
+            ('admin_create_workout_plan', 'admin', 'get', reverse('admin_create_workout_plan', args=[l2.id]), None),
+            ('admin_create_workout_plan_post', 'admin', 'post',
+             reverse('admin_create_workout_plan', args=[l2.id]), {**week, 'replace_existing': 'on'}),
+            ('admin_add_medical_checkup', 'admin', 'get', reverse('admin_add_medical_checkup', args=[l2.id]), None),
+            ('admin_add_medical_checkup_post', 'admin', 'post', reverse('admin_add_medical_checkup', args=[l2.id]), {
+                'checkup_date': self.today.isoformat(), 'checkup_type': 'Blood Test',
+            }),
+            ('workout_templates', 'admin', 'get', reverse('workout_templates'), None),
+            ('workout_templates_post', 'admin', 'post', reverse('workout_templates'), {**week, 'name': 'New template'}),
+            ('new_workout_template', 'admin', 'get', reverse('new_workout_template'), None),
+            ('assign_workout_template', 'admin', 'get', reverse('assign_workout_template', args=[self.template.id]), None),
+            ('assign_workout_template_post', 'admin', 'post',
+             reverse('assign_workout_template', args=[self.template.id]),
+             {**week, 'week_number': 99, 'cohort': 'selected', 'membership_ids': [l2.membership.id]}),
+            ('admin_workout_progress_chart', 'admin', 'get',
+             reverse('admin_workout_progress_chart', args=[l2.id]), None),
+
+            ('trainer_dashboard', 'trainer', 'get', reverse('trainer_dashboard'), None),
+            ('trainer_ratings', 'trainer', 'get', reverse('trainer_ratings', args=[self.trainer.id]), None),
+            ('trainer_ratings_json', 'trainer', 'get',
+             reverse('trainer_ratings', args=[self.trainer.id]) + '?format=json', None),
+
+            ('user_dashboard_l1', 'l1', 'get', reverse('user_dashboard'), None),
+            ('user_dashboard_l2', 'l2', 'get', reverse('user_dashboard'), None),
+            ('user_dashboard_l3', 'l3', 'get', reverse('user_dashboard'), None),
+            ('download_receipt', 'l1', 'get', reverse('download_receipt', args=[receipt]), None),
+            ('toggle_exercise_completion', 'l2', 'post', reverse('toggle_exercise_completion'),
+             {'exercise_id': self.exercise.id}),
+            ('update_exercise_completion', 'l2', 'json', reverse('update_exercise_completion'),
+             {'exercises': [{'id': self.exercise.id, 'completed': True}]}),
+            ('workout_progress_chart', 'l2', 'get', reverse('workout_progress_chart'), None),
+            ('workout_progress_chart_json', 'l2', 'get', reverse('workout_progress_chart') + '?format=json', None),
+            ('rate_trainer', 'l3', 'get', reverse('rate_trainer', args=[self.trainer.id]), None),
+            ('rate_trainer_post', 'l3', 'post', reverse('rate_trainer', args=[self.trainer.id]),
+             {'rating': 5, 'review': 'Great'}),
+        ]
+
+    def count_queries(self, role, method, url, data):
+        """Queries run by one request, rolled back afterwards"""
+        users = {'admin': self.admin, 'trainer': self.trainer, 'l1': self.l1, 'l2': self.l2, 'l3': self.l3}
+        if role:
+            self.client.force_login(users[role])
+        else:
+            self.client.logout()
+        cache.clear()
+
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as queries:
+                if method == 'json':
+                    response = self.client.post(url, json.dumps(data), content_type='application/json')
+                else:
+                    response = getattr(self.client, method)(url, data)
+            transaction.set_rollback(True)
+        self.assertLess(response.status_code, 400, f'{method.upper()} {url} returned {response.status_code}')
+        return len(queries)
+
+    def test_routes_are_covered(self):
+        covered = {resolve(url.split('?')[0]).url_name for name, role, method, url, data in self.cases()}
+        routes = {pattern.name for pattern in accounts_urls.urlpatterns + memberships_urls.urlpatterns}
+        self.assertEqual(routes - covered, set())
+
+    def test_query_counts_are_constant_and_within_budget(self):
+        self.seed(self.N)
+        small = {name: self.count_queries(role, method, url, data) for name, role, method, url, data in self.cases()}
+        self.seed(9 * self.N)
+        large = {name: self.count_queries(role, method, url, data) for name, role, method, url, data in self.cases()}
+
+        for name in small:
+            with self.subTest(view=name):
+                self.assertEqual(large[name], small[name], f'{name}: {small[name]} queries at N, {large[name]} at 10 x N')
+                self.assertIn(name, QUERY_BUDGETS)
+                self.assertLessEqual(large[name], QUERY_BUDGETS[name])
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix='healthhub-tests-'),
+                   RECEIPT_ROOT=tempfile.mkdtemp(prefix='healthhub-tests-receipts-'))
+class ReceiptStorageTests(TestCase):
+    """Receipt PDFs are only reachable through download_receipt, never from MEDIA_URL"""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        shutil.rmtree(settings.RECEIPT_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create(
+            username='member', email='member@example.com', full_name='Member', role='USER',
+            phone_number='+919876543210',
+        )
+        membership = UserMembership.objects.create(
+            user=self.user, membership_tier='L1', age=30, current_weight=Decimal('70'),
+            date_of_joining=timezone.now().date(), pay_monthly_in_advance=True, months_selected=3,
+        )
+        self.receipt = PaymentReceipt.objects.create(membership=membership)
+        self.receipt.ensure_pdf()
+
+    def test_receipt_is_stored_outside_media_root(self):
+        path = self.receipt.pdf_file.path
+        self.assertTrue(path.startswith(str(settings.RECEIPT_ROOT)))
+        self.assertFalse(path.startswith(str(settings.MEDIA_ROOT)))
+
+    def test_rerender_replaces_receipt_in_place(self):
+        name = self.receipt.pdf_file.name
+        self.receipt.ensure_pdf(force=True)
+        self.assertEqual(self.receipt.pdf_file.name, name)
+        stem = os.path.splitext(os.path.basename(name))[0]
+        files = os.listdir(os.path.dirname(self.receipt.pdf_file.path))
+        self.assertEqual([f for f in files if f.startswith(stem) or f.endswith('.tmp')], [os.path.basename(name)])
+
+    def test_media_url_does_not_serve_receipts(self):
+        # static() only adds the media route with DEBUG on, so load the URLconf that way
+        from healthhub import urls
+        with override_settings(DEBUG=True):
+            debug_urls = importlib.reload(urls)
+        self.addCleanup(importlib.reload, urls)
+        with override_settings(ROOT_URLCONF=debug_urls):
+            response = self.client.get(f'{settings.MEDIA_URL}{self.receipt.pdf_file.name}')
+            self.assertEqual(response.status_code, 404)
+
+            self.client.force_login(self.user)
+            response = self.client.get(reverse('download_receipt', args=[self.receipt.receipt_number]))
+            self.assertEqual(response.status_code, 200)
+
+
+class ExerciseCompletionPayloadTests(TestCase):
+    """update_exercise_completion only accepts integer ids and boolean completed flags"""
+
+    def setUp(self):
+        self.user = User.objects.create(
+            username='member', email='member@example.com', full_name='Member', role='USER',
+            phone_number='+919876543210',
+        )
+        membership = UserMembership.objects.create(
+            user=self.user, membership_tier='L2', age=30, current_weight=Decimal('70'),
+            date_of_joining=timezone.now().date(), pay_monthly_in_advance=True, months_selected=3,
+        )
+        save_week_plan(membership, 1, timezone.now().date(), {
+            'MON': [{'exercise_name': 'Run', 'exercise_type': 'CARDIO', 'sets': 1, 'reps': 20}],
+        })
+        self.exercise = WorkoutPlan.objects.get(membership=membership, day_of_week='MON').exercises.get()
+        self.client.force_login(self.user)
+
+    def post(self, items):
+        return self.client.post(reverse('update_exercise_completion'), json.dumps({'exercises': items}),
+                                content_type='application/json')
+
+    def test_rejects_non_boolean_and_missing_fields(self):
+        for item in ({'id': self.exercise.id, 'completed': 'false'}, {'id': self.exercise.id, 'completed': 0},
+                     {'id': str(self.exercise.id), 'completed': True}, {'id': self.exercise.id}, {'completed': True}):
+            with self.subTest(item=item):
+                response = self.post([item])
+                self.assertEqual(response.status_code, 400)
+                self.assertFalse(response.json()['success'])
+        self.exercise.refresh_from_db()
+        self.assertFalse(self.exercise.is_completed)
+
+    def test_accepts_boolean_flags(self):
+        response = self.post([{'id': self.exercise.id, 'completed': True}])
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['exercises'][0]['is_completed'])
+
+
+class ProteinGridPayloadTests(TestCase):
+    """save_protein_grid_view only accepts integer membership ids and boolean morning/evening flags"""
+
+    def setUp(self):
+        admin = User.objects.create(
+            username='admin', email='admin@example.com', full_name='Admin', role='ADMIN',
+            phone_number='+919876543210',
+        )
+        user = User.objects.create(
+            username='member', email='member@example.com', full_name='Member', role='USER',
+            phone_number='+919876543210',
+        )
+        self.membership = UserMembership.objects.create(
+            user=user, membership_tier='L2', age=30, current_weight=Decimal('70'), extra_protein_needed=True,
+            date_of_joining=timezone.now().date(), pay_monthly_in_advance=True, months_selected=3,
+        )
+        self.client.force_login(admin)
+
+    def post(self, entries):
+        return self.client.post(reverse('save_protein_grid'), json.dumps({'entries': entries}),
+                                content_type='application/json')
+
+    def test_rejects_non_boolean_and_non_integer_fields(self):
+        entry = {'membership_id': self.membership.id, 'date': '2026-10-12', 'morning': True, 'evening': True}
+        for changes in ({'morning': 'false'}, {'evening': 0}, {'membership_id': str(self.membership.id)},
+                        {'membership_id': float(self.membership.id)}, {'membership_id': True}, {'date': '12/10/2026'}):
+            with self.subTest(changes=changes):
+                response = self.post([{**entry, **changes}])
+                self.assertEqual(response.status_code, 400)
+                self.assertFalse(response.json()['success'])
+        self.assertFalse(ProteinIntake.objects.exists())
+
+    def test_accepts_boolean_flags(self):
+        response = self.post([
+            {'membership_id': self.membership.id, 'date': '2026-10-12', 'morning': True, 'evening': False},
+        ])
+        self.assertEqual(response.status_code, 200)
+        intake = ProteinIntake.objects.get(membership=self.membership)
+        self.assertEqual((intake.morning_intake, intake.evening_intake), (True, False))
+
+
+class ProteinAdherenceTests(TestCase):
+    """Adherence is measured over each member's own days inside the requested range"""
+
+    def test_member_who_joined_mid_window(self):
+        today = timezone.now().date()
+        user = User.objects.create(
+            username='member', email='member@example.com', full_name='Member', role='USER',
+            phone_number='+919876543210',
+        )
+        membership = UserMembership.objects.create(
+            user=user, membership_tier='L2', age=30, current_weight=Decimal('70'),
+            date_of_joining=today - timedelta(days=4), pay_monthly_in_advance=True, months_selected=3,
+            extra_protein_needed=True,
+        )
+        # Every day of the range is logged, including five from before the member joined
+        ProteinIntake.objects.bulk_create([
+            ProteinIntake(membership=membership, date=today - timedelta(days=n), morning_intake=True, evening_intake=True)
+            for n in range(10)
+        ])
+
+        member, = get_protein_adherence(today - timedelta(days=9), today)['members']
+        self.assertEqual(member['expected_days'], 5)
+        self.assertEqual(member['full_days'], 5)
+        self.assertEqual(member['full_rate'], 100.0)
+        self.assertEqual((member['current_streak'], member['longest_streak']), (5, 5))
+
+
+class RunJobTests(TestCase):
+    """run_job always releases a job it still owns, and never touches one reclaimed by another worker"""
+
+    def setUp(self):
+        self.addCleanup(TASKS.pop, 'tests.fail', None)
+
+    def register(self, on_give_up):
+        def fail(payload):
+            raise RuntimeError('task failed')
+        TASKS['tests.fail'] = (fail, on_give_up)
+
+    def test_failing_on_give_up_still_marks_job_failed(self):
+        def give_up(payload, error):
+            raise RuntimeError('callback failed')
+        self.register(give_up)
+        enqueue('tests.fail', max_attempts=1)
+
+        self.assertFalse(run_job(claim_job('worker-1')))
+        job = BackgroundJob.objects.get()
+        self.assertEqual((job.status, job.locked_by, job.locked_at), ('FAILED', '', None))
+        self.assertIn('task failed', job.last_error)
+
+    def test_reclaimed_job_is_not_overwritten(self):
+        given_up = []
+        self.register(lambda payload, error: given_up.append(payload))
+        enqueue('tests.fail', max_attempts=1)
+        job = claim_job('worker-1')
+        # The lock went stale and another worker took the job over
+        BackgroundJob.objects.filter(id=job.id).update(locked_by='worker-2', locked_at=timezone.now())
+
+        self.assertFalse(run_job(job))
+        reclaimed = BackgroundJob.objects.get()
+        self.assertEqual((reclaimed.status, reclaimed.locked_by), ('RUNNING', 'worker-2'))
+        self.assertEqual(given_up, [])
+
+
+class TrainerDirectoryCacheTests(TestCase):
+    """The cached directory is cleared once the change that affects it commits, not before"""
+
+    def test_rating_clears_directory_after_commit(self):
+        trainer = User.objects.create(
+            username='trainer', email='trainer@example.com', full_name='Trainer', role='TRAINER',
+            phone_number='+919876543210',
+        )
+        TrainerProfile.objects.create(
+            user=trainer, qualification='BSc', specialization='Strength', experience_years=3,
+            certification_details='ACE', approval_status='APPROVED',
+        )
+        user = User.objects.create(
+            username='member', email='member@example.com', full_name='Member', role='USER',
+            phone_number='+919876543211',
+        )
+        membership = UserMembership.objects.create(
+            user=user, membership_tier='L3', age=30, current_weight=Decimal('70'),
+            date_of_joining=timezone.now().date(), pay_monthly_in_advance=True, months_selected=3,
+        )
+        get_trainer_directory_json()
+        key = DIRECTORY_CACHE_KEY.format(sort='default')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            TrainerRating.objects.create(user=user, trainer=trainer, membership=membership, rating=5)
+            self.assertIsNotNone(cache.get(key))
+        self.assertIsNone(cache.get(key))
+
+
+class RatingSummarySignalTests(TestCase):
+    """The incrementally maintained summaries always equal a full recomputation"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.trainers = [cls.create_user(f'trainer{i}', 'TRAINER') for i in range(2)]
+        cls.members = []
+        for i in range(3):
+            user = cls.create_user(f'member{i}', 'USER')
+            cls.members.append(UserMembership.objects.create(
+                user=user, membership_tier='L3', age=30, current_weight=Decimal('70'),
+                date_of_joining=timezone.now().date(), pay_monthly_in_advance=True, months_selected=3,
+            ))
+
+    @classmethod
+    def create_user(cls, username, role):
+        return User.objects.create(
+            username=username, email=f'{username}@example.com', full_name=username.title(), role=role,
+            phone_number='+919876543210',
+        )
+
+    def rate(self, member, trainer, stars):
+        return TrainerRating.objects.create(user_id=member.user_id, trainer=trainer, membership=member, rating=stars)
+
+    def assertSummariesCurrent(self):
+        stored = {summary.trainer_id: summary for summary in TrainerRatingSummary.objects.all()}
+        for expected in compute_rating_summaries():
+            summary = stored.get(expected.trainer_id, TrainerRatingSummary(bayesian_score=expected.score(0, 0)))
+            with self.subTest(trainer=expected.trainer_id):
+                for field in SUMMARY_FIELDS:
+                    if field == 'bayesian_score':
+                        self.assertAlmostEqual(summary.bayesian_score, expected.bayesian_score)
+                    else:
+                        self.assertEqual(getattr(summary, field), getattr(expected, field), field)
+
+    def test_create(self):
+        self.rate(self.members[0], self.trainers[0], 5)
+        self.rate(self.members[1], self.trainers[0], 3)
+        self.assertSummariesCurrent()
+
+    def test_edit_moves_rating_between_buckets(self):
+        self.rate(self.members[0], self.trainers[0], 4)
+        rating = self.rate(self.members[1], self.trainers[0], 5)
+        rating = TrainerRating.objects.get(id=rating.id)
+        rating.rating = 2
+        rating.save()
+        self.assertSummariesCurrent()
+        summary = TrainerRatingSummary.objects.get(trainer=self.trainers[0])
+        self.assertEqual((summary.stars_5, summary.stars_2), (0, 1))
+
+    def test_delete(self):
+        self.rate(self.members[0], self.trainers[0], 5)
+        self.rate(self.members[1], self.trainers[0], 1).delete()
+        TrainerRating.objects.get(membership=self.members[0]).delete()
+        self.assertSummariesCurrent()
+
+    def test_change_trainer(self):
+        self.rate(self.members[0], self.trainers[1], 2)
+        rating = self.rate(self.members[1], self.trainers[0], 5)
+        rating = TrainerRating.objects.get(id=rating.id)
+        rating.trainer = self.trainers[1]
+        rating.rating = 4
+        rating.save()
+        self.assertSummariesCurrent()
+
+
+class WorkoutRollupSignalTests(TestCase):
+    """Exercise receivers keep WorkoutWeekRollup equal to a full recomputation"""
+
+    def setUp(self):
+        user = User.objects.create(
+            username='member', email='member@example.com', full_name='Member', role='USER',
+            phone_number='+919876543210',
+        )
+        self.membership = UserMembership.objects.create(
+            user=user, membership_tier='L2', age=30, current_weight=Decimal('70'),
+            date_of_joining=timezone.now().date(), pay_monthly_in_advance=True, months_selected=3,
+        )
+        save_week_plan(self.membership, 1, timezone.now().date(), {
+            day: [{'exercise_name': 'Run', 'exercise_type': 'CARDIO', 'sets': 1, 'reps': 20}]
+            for day in ('MON', 'TUE')
+        })
+        self.monday = WorkoutPlan.objects.get(membership=self.membership, day_of_week='MON')
+        self.tuesday = WorkoutPlan.objects.get(membership=self.membership, day_of_week='TUE')
+
+    def assertRollupsCurrent(self):
+        stored = {
+            rollup.workout_plan_id: (rollup.total_exercises, rollup.completed_exercises)
+            for rollup in WorkoutWeekRollup.objects.all()
+        }
+        expected = {
+            rollup.workout_plan_id: (rollup.total_exercises, rollup.completed_exercises)
+            for rollup in compute_workout_rollups()
+        }
+        self.assertEqual(stored, expected)
+
+    def add(self, plan, completed=False):
+        return Exercise.objects.create(workout_plan=plan, exercise_name='Squat', exercise_type='STRENGTH',
+                                       is_completed=completed)
+
+    def test_create_and_complete(self):
+        self.add(self.monday, completed=True)
+        exercise = Exercise.objects.get(id=self.add(self.monday).id)
+        exercise.is_completed = True
+        exercise.save()
+        exercise.is_completed = False
+        exercise.save()
+        self.assertRollupsCurrent()
+
+    def test_move_to_another_plan(self):
+        exercise = Exercise.objects.get(id=self.add(self.monday, completed=True).id)
+        exercise.workout_plan = self.tuesday
+        exercise.save()
+        self.assertRollupsCurrent()
+
+    def test_delete(self):
+        self.add(self.monday, completed=True).delete()
+        Exercise.objects.filter(workout_plan=self.tuesday).delete()
+        self.assertRollupsCurrent()
+
+    def test_plan_delete_skips_rollup_deltas(self):
+        for i in range(5):
+            self.add(self.monday, completed=i % 2 == 0)
+        with CaptureQueriesContext(connection) as queries:
+            self.monday.delete()
+        self.assertEqual([q['sql'] for q in queries if q['sql'].startswith('UPDATE')], [])
+        self.assertRollupsCurrent()
+
+
+class WorkoutFormTests(TestCase):
+    """The workout forms bound the client-supplied row counts and keep the input on errors"""
+
+    def test_exercise_count_is_capped(self):
+        admin = User.objects.create(
+            username='admin', email='admin@example.com', full_name='Admin', role='ADMIN',
+            phone_number='+919876543210',
+        )
+        self.client.force_login(admin)
+        response = self.client.post(reverse('workout_templates'), {
+            'name': 'Huge', 'MON_exercise_count': '1000000000', 'MON_exercise_0_name': 'Run',
+            'MON_exercise_0_type': 'CARDIO',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'at most')
+        self.assertContains(response, 'value="Huge"')
+        self.assertFalse(WorkoutTemplate.objects.exists())
+
+    def assign_template_setup(self, member_count):
+        admin = User.objects.create(
+            username='admin', email='admin@example.com', full_name='Admin', role='ADMIN',
+            phone_number='+919876543210',
+        )
+        self.client.force_login(admin)
+        template = WorkoutTemplate.objects.create(name='Base')
+        members = [
+            UserMembership.objects.create(
+                user=User.objects.create(
+                    username=f'member{i}', email=f'member{i}@example.com', full_name=f'Member {i}', role='USER',
+                    phone_number='+919876543210',
+                ),
+                membership_tier='L2', age=30, current_weight=Decimal('70'), date_of_joining=timezone.now().date(),
+                pay_monthly_in_advance=True, months_selected=3,
+            )
+            for i in range(member_count)
+        ]
+        return reverse('assign_workout_template', args=[template.id]), members
+
+    def test_assign_member_picker_is_paginated(self):
+        url, members = self.assign_template_setup(MEMBER_PICKER_PAGE_SIZE + 5)
+        response = self.client.get(url)
+        self.assertEqual(len(response.context['members_page'].object_list), MEMBER_PICKER_PAGE_SIZE)
+        self.assertContains(response, f'All L2 members ({len(members)})')
+        response = self.client.get(url + response.context['next_url'])
+        self.assertEqual(len(response.context['members_page'].object_list), 5)
+        self.assertIsNone(response.context['next_url'])
+        response = self.client.get(url, {'q': 'member 7'})
+        self.assertEqual([m.id for m in response.context['members_page'].object_list], [members[7].id])
+
+    def test_assign_errors_keep_the_form(self):
+        url, members = self.assign_template_setup(3)
+        response = self.client.post(url, {
+            'week_number': '4', 'start_date': 'not-a-date', 'cohort': 'selected', 'membership_ids': [members[1].id],
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'value="4"')
+        self.assertContains(response, 'value="selected" checked')
+        self.assertEqual([m.id for m in response.context['selected_members']], [members[1].id])
+        self.assertFalse(WorkoutPlan.objects.exists())
@@ -4,6 +4,7 @@ from . import views
 urlpatterns = [
     path('register/user/', views.register_user, name='register_user'),
     path('success/<int:membership_id>/', views.membership_success, name='membership_success'),
+    path('receipt/<uuid:receipt_number>/', views.download_receipt, name='download_receipt'),
     path('fee-calculator/', views.fee_calculator_ajax, name='fee_calculator'),
     
     # Trainer rating URLs
@@ -4,233 +4,382 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+import django
+from django.apps import apps
 from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
 from datetime import datetime
-import os
+import copy
+import hashlib
+import io
+import json
+import threading
 
+from .storage import receipt_storage
 
-def generate_membership_receipt(membership, file_path):
+
+# Bump whenever the receipt layout or wording changes, so stored PDFs are re-rendered
+RECEIPT_TEMPLATE_VERSION = 1
+
+
+# Tier amenities shown on the receipt (L3 add-ons are appended per membership)
+TIER_AMENITIES = {
+    'L1': ('Basic Gym Access', 'Standard Equipment'),
+    'L2': (
+        'All L1 Features',
+        'AI Workout Planner',
+        'Nutrition Recommendations',
+        'Weekly Performance Insights',
+        'Stress & Activity Analysis',
+    ),
+    'L3': (
+        'All L1 + L2 Features',
+        'Daily Protein Shake (40g) - Your favorite flavor!',
+    ),
+}
+
+MONTHLY_RATES = {'L1': 1500, 'L2': 2500, 'L3': 2500}
+
+FOOTER_TEXT = """
+    <para align=center>
+    <b>Thank you for joining HealthHub!</b><br/>
+    For any queries, contact us at support@healthhub.com or call +1-800-FITNESS<br/>
+    <i>This is a computer-generated receipt and does not require a signature.</i>
+    </para>
     """
-    Generate a PDF receipt for user membership registration
-    
+
+
+class ReceiptRenderer:
+    """
+    Renders membership receipts as PDF.
+
+    Paragraph styles, table styles and the static header/footer flowables are
+    built once when the renderer is created; each render only builds the
+    per-membership tables. Use get_receipt_renderer() for the shared instance.
+
     Args:
-        membership: UserMembership instance
-        file_path: Full path where PDF will be saved
+        compress: Compress PDF page streams (smaller files, more CPU).
+                  Defaults to settings.RECEIPT_PDF_COMPRESSION.
     """
-    
-    # Create the PDF object
-    doc = SimpleDocTemplate(file_path, pagesize=letter,
-                           rightMargin=72, leftMargin=72,
-                           topMargin=72, bottomMargin=18)
-    
-    # Container for the 'Flowable' objects
-    elements = []
-    
-    # Define styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#2C3E50'),
-        spaceAfter=30,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold'
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=16,
-        textColor=colors.HexColor('#34495E'),
-        spaceAfter=12,
-        fontName='Helvetica-Bold'
-    )
-    
-    normal_style = ParagraphStyle(
-        'CustomNormal',
-        parent=styles['Normal'],
-        fontSize=11,
-        textColor=colors.HexColor('#2C3E50'),
-    )
-    
-    # Header
-    title = Paragraph("<b>HealthHub - Payment Receipt</b>", title_style)
-    elements.append(title)
-    elements.append(Spacer(1, 0.2 * inch))
-    
-    # Receipt Info
-    receipt_info = [
-        ['Registration ID:', str(membership.registration_id)],
-        ['Receipt Date:', datetime.now().strftime('%B %d, %Y')],
-        ['Receipt Number:', str(membership.receipt.receipt_number) if hasattr(membership, 'receipt') else 'N/A'],
-    ]
-    
-    receipt_table = Table(receipt_info, colWidths=[2*inch, 4*inch])
-    receipt_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
-        ('ALIGN', (1, 0), (1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#7F8C8D')),
-        ('TEXTCOLOR', (1, 0), (1, -1), colors.HexColor('#2C3E50')),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-    ]))
-    elements.append(receipt_table)
-    elements.append(Spacer(1, 0.3 * inch))
-    
-    # User Information Section
-    elements.append(Paragraph("<b>Member Information</b>", heading_style))
-    
-    user_info = [
-        ['Name:', membership.user.full_name],
-        ['Email:', membership.user.email],
-        ['Phone:', membership.user.phone_number],
-        ['Age:', str(membership.age)],
-        ['Weight:', f"{membership.current_weight} kg"],
-        ['Date of Joining:', membership.date_of_joining.strftime('%B %d, %Y')],
-    ]
-    
-    user_table = Table(user_info, colWidths=[2*inch, 4*inch])
-    user_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-        ('ALIGN', (1, 0), (1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#2C3E50')),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#BDC3C7')),
-        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#ECF0F1')),
-    ]))
-    elements.append(user_table)
-    elements.append(Spacer(1, 0.3 * inch))
-    
-    # Membership Details Section
-    elements.append(Paragraph("<b>Membership Details</b>", heading_style))
-    
-    tier_name = membership.get_membership_tier_display()
-    membership_details = [
-        ['Membership Type:', tier_name],
-    ]
-    
-    # Add tier-specific amenities
-    if membership.membership_tier == 'L1':
-        amenities = ['Basic Gym Access', 'Standard Equipment']
-    elif membership.membership_tier == 'L2':
-        amenities = [
-            'All L1 Features',
-            'AI Workout Planner',
-            'Nutrition Recommendations',
-            'Weekly Performance Insights',
-            'Stress & Activity Analysis'
-        ]
-        if membership.extra_protein_needed:
+
+    def __init__(self, compress=None):
+        if compress is None:
+            compress = getattr(settings, 'RECEIPT_PDF_COMPRESSION', True)
+        self.compress = compress
+
+        # Define styles
+        styles = getSampleStyleSheet()
+        self.title_style = ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=24,
+            textColor=colors.HexColor('#2C3E50'),
+            spaceAfter=30,
+            alignment=TA_CENTER,
+            fontName='Helvetica-Bold'
+        )
+
+        self.heading_style = ParagraphStyle(
+            'CustomHeading',
+            parent=styles['Heading2'],
+            fontSize=16,
+            textColor=colors.HexColor('#34495E'),
+            spaceAfter=12,
+            fontName='Helvetica-Bold'
+        )
+
+        self.normal_style = ParagraphStyle(
+            'CustomNormal',
+            parent=styles['Normal'],
+            fontSize=11,
+            textColor=colors.HexColor('#2C3E50'),
+        )
+
+        self.receipt_table_style = TableStyle([
+            ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
+            ('ALIGN', (1, 0), (1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#7F8C8D')),
+            ('TEXTCOLOR', (1, 0), (1, -1), colors.HexColor('#2C3E50')),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+        ])
+
+        self.user_table_style = TableStyle([
+            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+            ('ALIGN', (1, 0), (1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#2C3E50')),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#BDC3C7')),
+            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#ECF0F1')),
+        ])
+
+        self.membership_table_style = TableStyle([
+            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+            ('ALIGN', (1, 0), (1, -1), 'LEFT'),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#2C3E50')),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#BDC3C7')),
+            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#ECF0F1')),
+        ])
+
+        self.fee_table_style = TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+            ('FONTNAME', (0, 0), (-1, -2), 'Helvetica'),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#2C3E50')),
+            ('GRID', (0, 0), (-1, -3), 0.5, colors.HexColor('#BDC3C7')),
+            ('LINEABOVE', (0, -1), (-1, -1), 2, colors.HexColor('#27AE60')),
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3498DB')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#D5F4E6')),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+            ('TOPPADDING', (0, 0), (-1, -1), 8),
+        ])
+
+        # Static flowables (parsed once, shallow-copied per render so layout
+        # state is never shared between concurrent builds)
+        self._title = Paragraph("<b>HealthHub - Payment Receipt</b>", self.title_style)
+        self._member_heading = Paragraph("<b>Member Information</b>", self.heading_style)
+        self._membership_heading = Paragraph("<b>Membership Details</b>", self.heading_style)
+        self._fee_heading = Paragraph("<b>Fee Breakdown</b>", self.heading_style)
+        self._footer = Paragraph(FOOTER_TEXT, self.normal_style)
+
+    def amenities(self, membership):
+        """Amenity lines for the membership's tier, including L3 add-ons"""
+        amenities = list(TIER_AMENITIES.get(membership.membership_tier, ()))
+        if membership.membership_tier == 'L2' and membership.extra_protein_needed:
             amenities.append('Extra Protein Supplementation')
-    elif membership.membership_tier == 'L3':
-        amenities = [
-            'All L1 + L2 Features',
-            'Daily Protein Shake (40g) - Your favorite flavor!'
+        elif membership.membership_tier == 'L3':
+            # Add L3 addons with trainer info
+            for addon in membership.l3_addons.all():
+                addon_text = addon.get_addon_type_display()
+                if addon.addon_type == 'TRAINER' and addon.assigned_trainer:
+                    trainer = addon.assigned_trainer
+                    profile = getattr(trainer, 'trainer_profile', None)
+                    if profile:
+                        addon_text += f" - {trainer.full_name} ({profile.specialization})"
+                    else:
+                        addon_text += f" - {trainer.full_name}"
+                amenities.append(addon_text)
+        return amenities
+
+    def fee_rows(self, membership):
+        """Fee breakdown table rows"""
+        fee_data = [
+            ['Description', 'Amount (₹)'],
+            ['Base Registration Fee', f'₹{membership.base_registration_fee:,.2f}'],
         ]
-        
-        # Add L3 addons with trainer info
-        for addon in membership.l3_addons.all():
-            addon_text = addon.get_addon_type_display()
-            if addon.addon_type == 'TRAINER' and addon.assigned_trainer:
-                trainer = addon.assigned_trainer
-                profile = getattr(trainer, 'trainer_profile', None)
-                if profile:
-                    addon_text += f" - {trainer.full_name} ({profile.specialization})"
-                else:
-                    addon_text += f" - {trainer.full_name}"
-            amenities.append(addon_text)
-    else:
-        amenities = []
-    
-    membership_details.append(['Amenities:', ', '.join(amenities) if len(amenities) <= 3 else '\n'.join(amenities)])
-    
-    if membership.pay_monthly_in_advance:
-        membership_details.append(['Advance Payment:', f'{membership.months_selected} months'])
-    
-    membership_table = Table(membership_details, colWidths=[2*inch, 4*inch])
-    membership_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-        ('ALIGN', (1, 0), (1, -1), 'LEFT'),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#2C3E50')),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#BDC3C7')),
-        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#ECF0F1')),
-    ]))
-    elements.append(membership_table)
-    elements.append(Spacer(1, 0.3 * inch))
-    
-    # Fee Breakdown Section
-    elements.append(Paragraph("<b>Fee Breakdown</b>", heading_style))
-    
-    fee_data = [
-        ['Description', 'Amount (₹)'],
-        ['Base Registration Fee', f'₹{membership.base_registration_fee:,.2f}'],
-    ]
-    
-    if membership.monthly_fee > 0:
-        if membership.membership_tier == 'L1':
-            monthly_rate = 1500
-        elif membership.membership_tier in ['L2', 'L3']:
-            monthly_rate = 2500
-        else:
-            monthly_rate = 0
-        
-        fee_data.append([
-            f'Monthly Fee ({membership.months_selected} months @ ₹{monthly_rate}/month)',
-            f'₹{(monthly_rate * membership.months_selected):,.2f}'
-        ])
-        
-        if membership.discount_amount > 0:
+
+        if membership.monthly_fee > 0:
+            monthly_rate = MONTHLY_RATES.get(membership.membership_tier, 0)
             fee_data.append([
-                f'Discount (₹200 × {membership.months_selected - 2} extra months)',
-                f'- ₹{membership.discount_amount:,.2f}'
+                f'Monthly Fee ({membership.months_selected} months @ ₹{monthly_rate}/month)',
+                f'₹{(monthly_rate * membership.months_selected):,.2f}'
             ])
-    
-    if membership.addon_fees > 0:
-        fee_data.append(['L3 Add-ons', f'₹{membership.addon_fees:,.2f}'])
-    
-    fee_data.append(['', ''])  # Separator
-    fee_data.append(['<b>Total Amount Paid</b>', f'<b>₹{membership.total_amount:,.2f}</b>'])
-    
-    fee_table = Table(fee_data, colWidths=[4*inch, 2*inch])
-    fee_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-        ('FONTNAME', (0, 0), (-1, -2), 'Helvetica'),
-        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#2C3E50')),
-        ('GRID', (0, 0), (-1, -3), 0.5, colors.HexColor('#BDC3C7')),
-        ('LINEABOVE', (0, -1), (-1, -1), 2, colors.HexColor('#27AE60')),
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3498DB')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#D5F4E6')),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ('TOPPADDING', (0, 0), (-1, -1), 8),
-    ]))
-    elements.append(fee_table)
-    elements.append(Spacer(1, 0.5 * inch))
-    
-    # Footer
-    footer_text = """
-    <para align=center>
-    <b>Thank you for joining HealthHub!</b><br/>
-    For any queries, contact us at support@healthhub.com or call +1-800-FITNESS<br/>
-    <i>This is a computer-generated receipt and does not require a signature.</i>
-    </para>
+
+            if membership.discount_amount > 0:
+                fee_data.append([
+                    f'Discount (₹200 × {membership.months_selected - 2} extra months)',
+                    f'- ₹{membership.discount_amount:,.2f}'
+                ])
+
+        if membership.addon_fees > 0:
+            fee_data.append(['L3 Add-ons', f'₹{membership.addon_fees:,.2f}'])
+
+        fee_data.append(['', ''])  # Separator
+        fee_data.append(['<b>Total Amount Paid</b>', f'<b>₹{membership.total_amount:,.2f}</b>'])
+        return fee_data
+
+    def build_elements(self, membership):
+        """Flowables for one membership receipt"""
+        elements = [copy.copy(self._title), Spacer(1, 0.2 * inch)]
+
+        # Receipt Info (dated when the receipt was issued, so re-renders are identical)
+        receipt = getattr(membership, 'receipt', None)
+        receipt_date = timezone.localdate(receipt.generated_at) if receipt and receipt.generated_at else datetime.now()
+        receipt_info = [
+            ['Registration ID:', str(membership.registration_id)],
+            ['Receipt Date:', receipt_date.strftime('%B %d, %Y')],
+            ['Receipt Number:', str(receipt.receipt_number) if receipt else 'N/A'],
+        ]
+        receipt_table = Table(receipt_info, colWidths=[2*inch, 4*inch])
+        receipt_table.setStyle(self.receipt_table_style)
+        elements.append(receipt_table)
+        elements.append(Spacer(1, 0.3 * inch))
+
+        # User Information Section
+        elements.append(copy.copy(self._member_heading))
+        user_info = [
+            ['Name:', membership.user.full_name],
+            ['Email:', membership.user.email],
+            ['Phone:', membership.user.phone_number],
+            ['Age:', str(membership.age)],
+            ['Weight:', f"{membership.current_weight} kg"],
+            ['Date of Joining:', membership.date_of_joining.strftime('%B %d, %Y')],
+        ]
+        user_table = Table(user_info, colWidths=[2*inch, 4*inch])
+        user_table.setStyle(self.user_table_style)
+        elements.append(user_table)
+        elements.append(Spacer(1, 0.3 * inch))
+
+        # Membership Details Section
+        elements.append(copy.copy(self._membership_heading))
+        amenities = self.amenities(membership)
+        membership_details = [
+            ['Membership Type:', membership.get_membership_tier_display()],
+            ['Amenities:', ', '.join(amenities) if len(amenities) <= 3 else '\n'.join(amenities)],
+        ]
+        if membership.pay_monthly_in_advance:
+            membership_details.append(['Advance Payment:', f'{membership.months_selected} months'])
+        membership_table = Table(membership_details, colWidths=[2*inch, 4*inch])
+        membership_table.setStyle(self.membership_table_style)
+        elements.append(membership_table)
+        elements.append(Spacer(1, 0.3 * inch))
+
+        # Fee Breakdown Section
+        elements.append(copy.copy(self._fee_heading))
+        fee_table = Table(self.fee_rows(membership), colWidths=[4*inch, 2*inch])
+        fee_table.setStyle(self.fee_table_style)
+        elements.append(fee_table)
+        elements.append(Spacer(1, 0.5 * inch))
+
+        # Footer
+        elements.append(copy.copy(self._footer))
+        return elements
+
+    def render(self, membership, target):
+        """
+        Render a receipt.
+
+        Args:
+            membership: UserMembership instance
+            target: File path or writable binary file-like object
+        """
+        doc = SimpleDocTemplate(target, pagesize=letter,
+                               rightMargin=72, leftMargin=72,
+                               topMargin=72, bottomMargin=18,
+                               pageCompression=1 if self.compress else 0)
+        doc.build(self.build_elements(membership))
+        return target
+
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+
+def get_receipt_renderer():
+    """Process-wide ReceiptRenderer, created on first use"""
+    global _renderer
+    if _renderer is None:
+        with _renderer_lock:
+            if _renderer is None:
+                _renderer = ReceiptRenderer()
+    return _renderer
+
+
+def generate_membership_receipt(membership, file_path=None, renderer=None):
+    """
+    Generate a PDF receipt for user membership registration
+
+    Args:
+        membership: UserMembership instance
+        file_path: Full path where PDF will be saved. If omitted, the PDF is
+                   rendered in memory and its bytes are returned instead.
+        renderer: ReceiptRenderer to use (defaults to the shared instance)
     """
-    footer = Paragraph(footer_text, normal_style)
-    elements.append(footer)
-    
-    # Build PDF
-    doc.build(elements)
-    
+    renderer = renderer or get_receipt_renderer()
+    if file_path is None:
+        buffer = io.BytesIO()
+        renderer.render(membership, buffer)
+        return buffer.getvalue()
+    renderer.render(membership, file_path)
     return file_path
+
+
+def receipt_file_name(membership):
+    """Storage name of a membership's receipt PDF"""
+    return f'receipts/receipt_{membership.registration_id}.pdf'
+
+
+def receipt_fingerprint(membership):
+    """
+    SHA-256 of everything printed on a membership's receipt: member details,
+    tier, fees, add-ons with their assigned trainer, receipt number/date and
+    RECEIPT_TEMPLATE_VERSION. A stored PDF is stale when this changes.
+    """
+    user = membership.user
+    receipt = getattr(membership, 'receipt', None)
+    addons = []
+    for addon in membership.l3_addons.all():
+        trainer = addon.assigned_trainer if addon.addon_type == 'TRAINER' else None
+        profile = getattr(trainer, 'trainer_profile', None) if trainer else None
+        addons.append([
+            addon.addon_type,
+            trainer.id if trainer else None,
+            trainer.full_name if trainer else None,
+            profile.specialization if profile else None,
+        ])
+
+    inputs = {
+        'template_version': RECEIPT_TEMPLATE_VERSION,
+        'registration_id': membership.registration_id,
+        'receipt_number': receipt.receipt_number if receipt else None,
+        'receipt_date': timezone.localdate(receipt.generated_at) if receipt and receipt.generated_at else None,
+        'user': [user.full_name, user.email, user.phone_number],
+        'age': membership.age,
+        'current_weight': membership.current_weight,
+        'date_of_joining': membership.date_of_joining,
+        'tier': membership.membership_tier,
+        'extra_protein_needed': membership.extra_protein_needed,
+        'pay_monthly_in_advance': membership.pay_monthly_in_advance,
+        'months_selected': membership.months_selected,
+        'fees': [
+            membership.base_registration_fee,
+            membership.monthly_fee,
+            membership.discount_amount,
+            membership.addon_fees,
+            membership.total_amount,
+        ],
+        'addons': sorted(addons, key=lambda a: (a[0], a[1] or 0)),
+    }
+    encoded = json.dumps(inputs, cls=DjangoJSONEncoder, sort_keys=True)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def store_receipt_pdf(membership, pdf_bytes):
+    """
+    Save rendered receipt bytes to the private receipt storage and return the
+    stored name. The storage swaps the new file in atomically, so a previous
+    copy stays readable until it is replaced.
+    """
+    return receipt_storage.save(receipt_file_name(membership), ContentFile(pdf_bytes))
+
+
+def init_render_worker():
+    """Process pool initializer: set up Django in a spawned worker process"""
+    if not apps.ready:
+        django.setup()
+
+
+def render_receipt_in_worker(membership):
+    """
+    Process pool task: render one receipt from a pickled membership (with its
+    user, receipt and add-ons already loaded, so the worker never queries the DB).
+
+    Returns (receipt_id, file_name, error).
+    """
+    try:
+        return membership.receipt.id, store_receipt_pdf(membership, generate_membership_receipt(membership)), None
+    except Exception as e:
+        return membership.receipt.id, None, str(e)
@@ -1,86 +1,20 @@
-from django.shortcuts import render, redirect
+from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth import login
-from django.conf import settings
-from django.core.mail import EmailMessage
 from django.contrib.auth.decorators import login_required
-from django.db.models import Avg, Count, Q
+from django.db import transaction
+from django.http import FileResponse, HttpResponseForbidden, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
 from accounts.forms import CommonRegistrationForm
 from accounts.models import User
+from accounts.pagination import keyset_paginate
 from .forms import UserMembershipForm, L3AddonForm
-from .models import UserMembership, L3Addon, PaymentReceipt, TrainerRating
-from .utils import generate_membership_receipt
+from .jobs import RENDER_SLOTS, enqueue
+from .models import UserMembership, L3Addon, PaymentReceipt, TrainerRating, TrainerRatingSummary
+from .ratings import RATINGS_ORDERING, ratings_for_trainer
 from decimal import Decimal
-import os
-
-
-def send_membership_email(user, membership, pdf_path):
-    """Send membership registration confirmation email with PDF receipt"""
-    subject = 'Welcome to HealthHub - Membership Registration Successful'
-    
-    # Get membership tier display name
-    tier_names = {
-        'L1': 'L1 FitStarter',
-        'L2': 'L2 ProActive',
-        'L3': 'L3 EliteChamp'
-    }
-    tier_name = tier_names.get(membership.membership_tier, membership.membership_tier)
-    
-    # Build addons list
-    addons_list = ""
-    if membership.membership_tier == 'L3':
-        l3_addons = membership.l3_addons.all()
-        if l3_addons:
-            addons_list = "\n\nL3 Add-ons Selected:"
-            for addon in l3_addons:
-                addons_list += f"\n  - {addon.get_addon_type_display()}"
-                if addon.assigned_trainer:
-                    addons_list += f" (Trainer: {addon.assigned_trainer.full_name})"
-    
-    message = f"""
-Dear {user.full_name},
-
-Congratulations! Your HealthHub membership registration is complete.
-
-Membership Details:
-- Registration ID: {membership.registration_id}
-- Tier: {tier_name}
-- Base Fee: ₹{membership.base_registration_fee}
-- Monthly Fee: ₹{membership.monthly_fee:.2f}
-- Discount: ₹{membership.discount_amount:.2f}
-- Add-on Fees: ₹{membership.addon_fees:.2f}
-- Total Amount: ₹{membership.total_amount:.2f}
-- Registration Date: {membership.date_of_joining.strftime('%B %d, %Y')}
-{addons_list}
-
-Your membership receipt is attached to this email for your records.
-
-You can now login to your member dashboard using your username and password.
-
-Login URL: http://127.0.0.1:8000/login/
-
-Thank you for choosing HealthHub. We look forward to helping you achieve your fitness goals!
-
-Best regards,
-The HealthHub Team
-Where Fitness Meets Wellness
-"""
-    
-    try:
-        email = EmailMessage(
-            subject=subject,
-            body=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[user.email]
-        )
-        
-        # Attach PDF receipt
-        if os.path.exists(pdf_path):
-            email.attach_file(pdf_path)
-        
-        email.send(fail_silently=False)
-    except Exception as e:
-        print(f"Error sending email: {e}")
+import io
 
 
 def register_user(request):
@@ -91,86 +25,70 @@ def register_user(request):
         addon_form = L3AddonForm(request.POST)
         
         if common_form.is_valid() and membership_form.is_valid():
-            # Create user
-            user = common_form.save(commit=False)
-            user.role = 'USER'
-            user.save()
-            
-            # Create membership
-            membership = membership_form.save(commit=False)
-            membership.user = user
-            
-            # Calculate addon fees for L3
-            addon_total = Decimal('0')
-            if membership.membership_tier == 'L3' and addon_form.is_valid():
-                addon_selections = []
+            with transaction.atomic():
+                # Create user
+                user = common_form.save(commit=False)
+                user.role = 'USER'
+                user.save()
                 
-                if addon_form.cleaned_data.get('personal_trainer'):
-                    addon_selections.append('TRAINER')
-                    addon_total += Decimal('1000')
+                # Create membership
+                membership = membership_form.save(commit=False)
+                membership.user = user
                 
-                if addon_form.cleaned_data.get('zumba_martial_arts'):
-                    addon_selections.append('ZUMBA')
-                    addon_total += Decimal('1000')
+                # Calculate addon fees for L3
+                addon_total = Decimal('0')
+                if membership.membership_tier == 'L3' and addon_form.is_valid():
+                    addon_selections = []
+                    
+                    if addon_form.cleaned_data.get('personal_trainer'):
+                        addon_selections.append('TRAINER')
+                        addon_total += Decimal('1000')
+                    
+                    if addon_form.cleaned_data.get('zumba_martial_arts'):
+                        addon_selections.append('ZUMBA')
+                        addon_total += Decimal('1000')
+                    
+                    if addon_form.cleaned_data.get('premium_nutrition'):
+                        addon_selections.append('NUTRITION')
+                        addon_total += Decimal('1000')
+                    
+                    if addon_form.cleaned_data.get('mental_wellness'):
+                        addon_selections.append('WELLNESS')
+                        addon_total += Decimal('1000')
+                    
+                    membership.addon_fees = addon_total
                 
-                if addon_form.cleaned_data.get('premium_nutrition'):
-                    addon_selections.append('NUTRITION')
-                    addon_total += Decimal('1000')
+                # Save membership (this will trigger calculate_total_fee)
+                membership.save()
                 
-                if addon_form.cleaned_data.get('mental_wellness'):
-                    addon_selections.append('WELLNESS')
-                    addon_total += Decimal('1000')
-                
-                membership.addon_fees = addon_total
-            
-            # Save membership (this will trigger calculate_total_fee)
-            membership.save()
-            
-            # Create L3 addons if applicable
-            if membership.membership_tier == 'L3' and addon_form.is_valid():
-                selected_trainer_id = addon_form.cleaned_data.get('selected_trainer')
-                assigned_trainer = None
-                
-                # Get the trainer object if trainer addon is selected
-                if 'TRAINER' in addon_selections and selected_trainer_id:
-                    try:
-                        assigned_trainer = User.objects.get(id=selected_trainer_id, role='TRAINER')
-                    except User.DoesNotExist:
-                        pass
-                
-                for addon_type in addon_selections:
-                    # Assign trainer only to the TRAINER addon
-                    trainer = assigned_trainer if addon_type == 'TRAINER' else None
-                    L3Addon.objects.create(
-                        membership=membership,
-                        addon_type=addon_type,
-                        fee=Decimal('1000'),
-                        assigned_trainer=trainer
-                    )
-            
-            # Generate PDF receipt
-            receipt = PaymentReceipt.objects.create(membership=membership)
-            
-            # Create receipts directory if it doesn't exist
-            receipts_dir = os.path.join(settings.MEDIA_ROOT, 'receipts')
-            os.makedirs(receipts_dir, exist_ok=True)
-            
-            # Generate PDF
-            pdf_filename = f'receipt_{membership.registration_id}.pdf'
-            pdf_path = os.path.join(receipts_dir, pdf_filename)
-            
-            try:
-                generate_membership_receipt(membership, pdf_path)
-                receipt.pdf_file = f'receipts/{pdf_filename}'
-                receipt.save()
-                
-                # Send confirmation email with PDF receipt
-                send_membership_email(user, membership, pdf_path)
-                
-            except Exception as e:
-                messages.warning(request, f'Registration successful but PDF generation failed: {str(e)}')
+                # Create L3 addons if applicable
+                if membership.membership_tier == 'L3' and addon_form.is_valid():
+                    selected_trainer_id = addon_form.cleaned_data.get('selected_trainer')
+                    assigned_trainer = None
+                    
+                    # Get the trainer object if trainer addon is selected
+                    if 'TRAINER' in addon_selections and selected_trainer_id:
+                        try:
+                            assigned_trainer = User.objects.get(id=selected_trainer_id, role='TRAINER')
+                        except User.DoesNotExist:
+                            pass
+                    
+                    for addon_type in addon_selections:
+                        # Assign trainer only to the TRAINER addon
+                        trainer = assigned_trainer if addon_type == 'TRAINER' else None
+                        L3Addon.objects.create(
+                            membership=membership,
+                            addon_type=addon_type,
+                            fee=Decimal('1000'),
+                            assigned_trainer=trainer
+                        )
+                    
+                # Queue the PDF receipt and confirmation email; they are generated by
+                # the run_workers command once this transaction has committed
+                receipt = PaymentReceipt.objects.create(membership=membership)
+                enqueue('receipts.generate', {'receipt_id': receipt.id})
             
-            messages.success(request, f'User registration completed successfully! A confirmation email with your membership receipt has been sent to {user.email}. Please login to continue.')
+            messages.success(request, f'User registration completed successfully! A confirmation email with your membership receipt will be sent to {user.email} shortly. Please login to continue.')
             return redirect('login')
         else:
             # Display form errors
@@ -205,6 +123,44 @@ def membership_success(request, membership_id):
         return redirect('home')
 
 
+@login_required
+def download_receipt(request, receipt_number):
+    """Download a receipt PDF, rendering it first if it is missing or stale"""
+    receipt = get_object_or_404(
+        PaymentReceipt.objects.select_related('membership__user').prefetch_related(
+            'membership__l3_addons__assigned_trainer__trainer_profile'
+        ),
+        receipt_number=receipt_number
+    )
+    if request.user.role != 'ADMIN' and receipt.membership.user_id != request.user.id:
+        return HttpResponseForbidden('You do not have access to this receipt.')
+    
+    try:
+        with RENDER_SLOTS:
+            pdf = receipt.ensure_pdf()
+    except Exception as e:
+        PaymentReceipt.objects.filter(id=receipt.id).update(status='FAILED', last_error=str(e))
+        messages.error(request, 'Your receipt could not be generated right now. Please try again later.')
+        return redirect('admin_dashboard' if request.user.role == 'ADMIN' else 'user_dashboard')
+    
+    # The fingerprint identifies the PDF contents, so it doubles as the ETag
+    etag = quote_etag(receipt.fingerprint)
+    last_modified = int(receipt.rendered_at.timestamp())
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        # Serve a freshly rendered PDF from memory instead of reading it back
+        response = FileResponse(
+            io.BytesIO(pdf) if pdf else receipt.pdf_file.open('rb'),
+            as_attachment=True,
+            filename=f'receipt_{receipt.membership.registration_id}.pdf',
+            content_type='application/pdf',
+        )
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
 def fee_calculator_ajax(request):
     """AJAX endpoint for real-time fee calculation"""
     if request.method == 'GET':
@@ -308,38 +264,56 @@ def rate_trainer(request, trainer_id):
     return render(request, 'memberships/rate_trainer.html', context)
 
 
+REVIEWS_PAGE_SIZE = 20
+
+
 @login_required
 def trainer_ratings(request, trainer_id):
-    """View all ratings for a specific trainer"""
+    """View ratings for a specific trainer, a page at a time - supports both HTML and JSON format"""
     try:
         trainer = User.objects.get(id=trainer_id, role='TRAINER')
     except User.DoesNotExist:
+        if request.GET.get('format') == 'json':
+            return JsonResponse({'success': False, 'error': 'Trainer not found'}, status=404)
         messages.error(request, 'Trainer not found.')
-        return redirect('approved_trainers')
+        return redirect('approved_trainers_list')
     
-    ratings = TrainerRating.objects.filter(trainer=trainer).select_related('user', 'membership')
+    # Seek on RATINGS_ORDERING so every page costs the same
+    page = keyset_paginate(ratings_for_trainer(trainer), RATINGS_ORDERING, request.GET.get('cursor'), REVIEWS_PAGE_SIZE)
     
-    # Calculate average rating
-    avg_rating = ratings.aggregate(Avg('rating'))['rating__avg'] or 0
-    total_ratings = ratings.count()
+    # Totals and star distribution are precomputed (see TrainerRatingSummary)
+    summary = TrainerRatingSummary.objects.filter(trainer=trainer).first() or TrainerRatingSummary(trainer=trainer)
     
-    # Rating distribution with percentages
-    rating_distribution = []
-    for stars in [5, 4, 3, 2, 1]:
-        count = ratings.filter(rating=stars).count()
-        percentage = (count * 100 / total_ratings) if total_ratings > 0 else 0
-        rating_distribution.append({
-            'stars': stars,
-            'count': count,
-            'percentage': round(percentage, 1)
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'success': True,
+            'trainer': {'id': trainer.id, 'full_name': trainer.full_name},
+            'avg_rating': summary.average,
+            'total_ratings': summary.rating_count,
+            'ratings': [
+                {
+                    'id': rating.id,
+                    'user': rating.user.full_name,
+                    'rating': rating.rating,
+                    'review': rating.review,
+                    'created_at': rating.created_at,
+                }
+                for rating in page
+            ],
+            'next_cursor': page.next_cursor,
         })
     
+    params = request.GET.copy()
+    params['cursor'] = page.next_cursor
     context = {
         'trainer': trainer,
-        'ratings': ratings,
-        'avg_rating': round(avg_rating, 1),
-        'total_ratings': total_ratings,
-        'rating_distribution': rating_distribution
+        'ratings': page,
+        'page': page,
+        'next_url': f'?{params.urlencode()}' if page.has_next else None,
+        'first_url': request.path,
+        'avg_rating': summary.average,
+        'total_ratings': summary.rating_count,
+        'rating_distribution': summary.distribution()
     }
     return render(request, 'memberships/trainer_ratings.html', context)
 
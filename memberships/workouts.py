@@ -0,0 +1,302 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Case, Count, DateTimeField, F, Q, Sum, Value, When
+from django.utils import timezone
+
+from .models import Exercise, WorkoutPlan, WorkoutWeekRollup
+from .signals import rollup_deltas_suppressed
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_ASSIGN_CHUNK_SIZE = 200
+
+ROLLUP_FIELDS = ['membership', 'week_number', 'day_of_week', 'total_exercises', 'completed_exercises', 'updated_at']
+
+
+def _completion_rate(completed, total):
+    return round(completed / total * 100, 1) if total else 0
+
+
+def current_week_plans(membership, today=None):
+    """
+    The membership's active plans for the week containing today, Monday first,
+    with their exercises. Served by workout_active_week_idx.
+    """
+    today = today or timezone.now().date()
+    return WorkoutPlan.objects.filter(
+        membership=membership, start_date__lte=today, end_date__gte=today, is_active=True
+    ).prefetch_related('exercises').order_by('day_of_week')
+
+
+def get_workout_stats(membership):
+    """
+    Exercise totals and completion counts for a membership's workout plans,
+    read from its WorkoutWeekRollup rows (one per plan-day) in a single query.
+
+    Returns a dict with:
+        weekly_stats: {week_number: {total_exercises, completed_exercises,
+                       completion_rate, start_date, end_date}}, ordered by week
+        day_stats: {day code: {total, completed, completion_rate}} for MON-SAT
+        total_exercises, completed_exercises, overall_completion_rate
+    """
+    rows = WorkoutWeekRollup.objects.filter(membership=membership).values(
+        'week_number', 'day_of_week', 'total_exercises', 'completed_exercises',
+        start_date=F('workout_plan__start_date'), end_date=F('workout_plan__end_date'),
+    ).order_by('week_number', 'day_of_week')
+
+    weekly_stats = {}
+    day_stats = {day: {'total': 0, 'completed': 0} for day, _ in WorkoutPlan.DAYS_OF_WEEK}
+    for row in rows:
+        week = weekly_stats.setdefault(row['week_number'], {
+            'total_exercises': 0,
+            'completed_exercises': 0,
+            'start_date': row['start_date'],
+            'end_date': row['end_date'],
+        })
+        week['total_exercises'] += row['total_exercises']
+        week['completed_exercises'] += row['completed_exercises']
+        week['start_date'] = min(week['start_date'], row['start_date'])
+        week['end_date'] = max(week['end_date'], row['end_date'])
+
+        day_stats[row['day_of_week']]['total'] += row['total_exercises']
+        day_stats[row['day_of_week']]['completed'] += row['completed_exercises']
+
+    for week in weekly_stats.values():
+        week['completion_rate'] = _completion_rate(week['completed_exercises'], week['total_exercises'])
+    for day in day_stats.values():
+        day['completion_rate'] = _completion_rate(day['completed'], day['total'])
+
+    total_exercises = sum(week['total_exercises'] for week in weekly_stats.values())
+    completed_exercises = sum(week['completed_exercises'] for week in weekly_stats.values())
+    return {
+        'weekly_stats': weekly_stats,
+        'day_stats': day_stats,
+        'total_exercises': total_exercises,
+        'completed_exercises': completed_exercises,
+        'overall_completion_rate': _completion_rate(completed_exercises, total_exercises),
+    }
+
+
+def compute_workout_rollups(membership_ids=None, plan_ids=None):
+    """
+    Fresh WorkoutWeekRollup objects (unsaved) for every workout plan, counted
+    from Exercise with a single GROUP BY query.
+    """
+    plans = WorkoutPlan.objects.all()
+    if membership_ids is not None:
+        plans = plans.filter(membership_id__in=membership_ids)
+    if plan_ids is not None:
+        plans = plans.filter(id__in=plan_ids)
+
+    rows = plans.values('id', 'membership_id', 'week_number', 'day_of_week').annotate(
+        total_exercises=Count('exercises'),
+        completed_exercises=Count('exercises', filter=Q(exercises__is_completed=True)),
+    ).order_by('id')
+    return [WorkoutWeekRollup(workout_plan_id=row.pop('id'), **row) for row in rows]
+
+
+def rebuild_workout_rollups(membership_ids=None, plan_ids=None, batch_size=1000):
+    """Recompute and upsert workout rollups in one transaction. Returns the number written."""
+    rollups = compute_workout_rollups(membership_ids, plan_ids)
+    with transaction.atomic():
+        WorkoutWeekRollup.objects.bulk_create(
+            rollups,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['workout_plan'],
+            update_fields=ROLLUP_FIELDS,
+        )
+    return len(rollups)
+
+
+def save_week_plan(membership, week_number, start_date, exercises_by_day, replace=False):
+    """
+    Write a week of workout plans and their exercises in one transaction.
+
+    Missing day plans and all exercises are inserted with bulk_create, so a full
+    week costs a handful of queries rather than one write per exercise. The
+    week's rollups are then recomputed in a single upsert.
+
+    Args:
+        membership: L2 UserMembership the plan belongs to
+        week_number: Week number since joining
+        start_date: First day of the week; new plans end six days later
+        exercises_by_day: {day code: [Exercise field dicts]}, already validated
+        replace: Delete the week's existing exercises first instead of appending
+
+    Returns metrics: plans_created, exercises_created, exercises_removed, seconds.
+    """
+    started = time.monotonic()
+    with transaction.atomic():
+        plans = {
+            plan.day_of_week: plan
+            for plan in WorkoutPlan.objects.select_for_update().filter(membership=membership, week_number=week_number)
+        }
+        new_plans = [
+            WorkoutPlan(membership=membership, week_number=week_number, day_of_week=day,
+                        start_date=start_date, end_date=start_date + timedelta(days=6), is_active=True)
+            for day, _ in WorkoutPlan.DAYS_OF_WEEK if day not in plans
+        ]
+        # bulk_create skips post_save, so the plans' rollup rows are written here
+        WorkoutPlan.objects.bulk_create(new_plans)
+        WorkoutWeekRollup.objects.bulk_create([WorkoutWeekRollup.for_plan(plan) for plan in new_plans])
+        plans.update({plan.day_of_week: plan for plan in new_plans})
+
+        removed = 0
+        if replace:
+            # The rebuild below recounts these plans, so skip the one rollup UPDATE per deleted row
+            with rollup_deltas_suppressed():
+                removed, _ = Exercise.objects.filter(workout_plan__in=plans.values()).delete()
+
+        exercises = [
+            Exercise(workout_plan=plans[day], order=order, **fields)
+            for day, day_exercises in exercises_by_day.items()
+            for order, fields in enumerate(day_exercises)
+        ]
+        Exercise.objects.bulk_create(exercises)
+        rebuild_workout_rollups(plan_ids=[plan.id for plan in plans.values()])
+
+    metrics = {
+        'plans_created': len(new_plans),
+        'exercises_created': len(exercises),
+        'exercises_removed': removed,
+        'seconds': time.monotonic() - started,
+    }
+    logger.info(
+        'Workout week %s for membership %s: %s plan(s), %s exercise(s) created, %s removed in %.3fs',
+        week_number, membership.id, metrics['plans_created'], metrics['exercises_created'],
+        metrics['exercises_removed'], metrics['seconds'],
+    )
+    return metrics
+
+
+def clone_workout_template(template, memberships, week_number, start_date, chunk_size=TEMPLATE_ASSIGN_CHUNK_SIZE):
+    """
+    Clone a WorkoutTemplate onto every L2 membership in `memberships` for one week.
+
+    Memberships are processed in chunks, each in its own transaction with a
+    fixed number of statements: the chunk's missing day plans, all of its
+    exercises and its rollups are each written with one bulk insert. Members
+    who already have exercises that week are skipped rather than given a
+    second copy.
+
+    Returns metrics: memberships, assigned, skipped, plans_created,
+    exercises_created, seconds.
+    """
+    started = time.monotonic()
+    exercises_by_day = template.exercises_by_day()
+    membership_ids = list(
+        memberships.filter(membership_tier='L2').order_by('id').values_list('id', flat=True)
+    )
+    end_date = start_date + timedelta(days=6)
+    assigned = plans_created = exercises_created = 0
+
+    for i in range(0, len(membership_ids), chunk_size):
+        chunk = membership_ids[i:i + chunk_size]
+        with transaction.atomic():
+            busy = set(Exercise.objects.filter(
+                workout_plan__membership_id__in=chunk, workout_plan__week_number=week_number
+            ).values_list('workout_plan__membership_id', flat=True).distinct())
+            targets = [membership_id for membership_id in chunk if membership_id not in busy]
+
+            plans = {
+                (plan.membership_id, plan.day_of_week): plan
+                for plan in WorkoutPlan.objects.filter(membership_id__in=targets, week_number=week_number)
+            }
+            new_plans = [
+                WorkoutPlan(membership_id=membership_id, week_number=week_number, day_of_week=day,
+                            start_date=start_date, end_date=end_date, is_active=True)
+                for membership_id in targets
+                for day, _ in WorkoutPlan.DAYS_OF_WEEK
+                if (membership_id, day) not in plans
+            ]
+            WorkoutPlan.objects.bulk_create(new_plans)
+            plans.update({(plan.membership_id, plan.day_of_week): plan for plan in new_plans})
+
+            exercises = [
+                Exercise(workout_plan=plans[(membership_id, day)], order=order, **fields)
+                for membership_id in targets
+                for day, day_exercises in exercises_by_day.items()
+                for order, fields in enumerate(day_exercises)
+            ]
+            Exercise.objects.bulk_create(exercises)
+
+            # Target plans had no exercises, so their rollups are exactly the template's counts
+            rollups = []
+            for plan in plans.values():
+                rollup = WorkoutWeekRollup.for_plan(plan)
+                rollup.total_exercises = len(exercises_by_day.get(plan.day_of_week, []))
+                rollups.append(rollup)
+            WorkoutWeekRollup.objects.bulk_create(
+                rollups, update_conflicts=True, unique_fields=['workout_plan'], update_fields=ROLLUP_FIELDS,
+            )
+
+        assigned += len(targets)
+        plans_created += len(new_plans)
+        exercises_created += len(exercises)
+
+    metrics = {
+        'memberships': len(membership_ids),
+        'assigned': assigned,
+        'skipped': len(membership_ids) - assigned,
+        'plans_created': plans_created,
+        'exercises_created': exercises_created,
+        'seconds': time.monotonic() - started,
+    }
+    logger.info(
+        'Workout template %r week %s: assigned to %s of %s membership(s), %s plan(s) and %s exercise(s) in %.3fs',
+        template.name, week_number, metrics['assigned'], metrics['memberships'], metrics['plans_created'],
+        metrics['exercises_created'], metrics['seconds'],
+    )
+    return metrics
+
+
+def set_exercise_completion(user, states):
+    """
+    Mark a member's exercises completed or not with one conditional UPDATE.
+
+    Only exercises belonging to `user` are touched, and only rows whose state
+    actually changes are written, so repeating a request is harmless. The
+    affected plans' rollups are then recomputed rather than adjusted, which
+    keeps them right under concurrent requests.
+
+    Args:
+        user: Member whose exercises are updated
+        states: {exercise_id: completed}
+
+    Returns (exercises, week_totals): the exercises' resulting id,
+    is_completed and completed_at, and total/completed counts for every week
+    they belong to. Unknown or foreign ids are left out of `exercises`.
+    """
+    completed_ids = [exercise_id for exercise_id, completed in states.items() if completed]
+    owned = Exercise.objects.filter(id__in=list(states), workout_plan__membership__user=user)
+
+    with transaction.atomic():
+        changed = owned.filter(
+            Q(id__in=completed_ids, is_completed=False) | (~Q(id__in=completed_ids) & Q(is_completed=True))
+        ).update(
+            is_completed=Case(When(id__in=completed_ids, then=Value(True)), default=Value(False)),
+            completed_at=Case(
+                When(id__in=completed_ids, then=Value(timezone.now())),
+                default=Value(None),
+                output_field=DateTimeField(),
+            ),
+        )
+        exercises = list(owned.values(
+            'id', 'is_completed', 'completed_at', 'workout_plan_id', week_number=F('workout_plan__week_number')
+        ).order_by('id'))
+        if changed:
+            rebuild_workout_rollups(plan_ids={exercise['workout_plan_id'] for exercise in exercises})
+
+    week_totals = list(WorkoutWeekRollup.objects.filter(
+        membership__user=user, week_number__in={exercise['week_number'] for exercise in exercises}
+    ).values('week_number').annotate(
+        total_exercises=Sum('total_exercises'),
+        completed_exercises=Sum('completed_exercises'),
+    ).order_by('week_number'))
+    for week in week_totals:
+        week['completion_rate'] = _completion_rate(week['completed_exercises'], week['total_exercises'])
+    return exercises, week_totals